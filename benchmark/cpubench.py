@@ -0,0 +1,134 @@
+################################################################################
+# Copyright 2016 Martin Grap
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+## @package cpubench Measures the CPU usage of the displayserver
+#
+# \file cpubench.py
+# \brief This file measures the CPU usage of the displayserver while it is idle and while a countdown is shown. The
+#        server is started with the SDL dummy video driver, i.e. no window is opened. It is started via
+#        "python3 cpubench.py". Additional parameters for the server can be given after "--", e.g.
+#        "python3 cpubench.py -- --asyncio --fps 10".
+#
+import os
+import sys
+import time
+import argparse
+import resource
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'client'))
+
+import displayclient
+
+## \brief Directory which contains the displayserver
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server')
+## \brief TCP port on which the displayserver is listening. Has to match displayserver.PORT.
+SERVER_PORT = 4321
+## \brief Time in seconds the server is given to start up
+STARTUP_TIME = 2.0
+
+
+## \brief This function returns the CPU time used by a running process.
+#
+#  \param [pid] An integer. The process ID.
+#
+#  \returns A float. The user and system CPU time in seconds. It is read from /proc and therefore only works on Linux.
+#
+def process_cpu_time(pid):
+    with open('/proc/{}/stat'.format(pid), 'r') as f:
+        # The command name may contain spaces. The fields of interest follow the closing parenthesis.
+        fields = f.read().rsplit(')', 1)[1].split()
+
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+## \brief This function measures the CPU usage of a process while a scenario is executed.
+#
+#  \param [pid] An integer. The process ID.
+#
+#  \param [scenario] A callable without parameters.
+#
+#  \returns A tuple (cpu_time, wall_time) in seconds.
+#
+def measure(pid, scenario):
+    cpu_start = process_cpu_time(pid)
+    wall_start = time.monotonic()
+    scenario()
+
+    return (process_cpu_time(pid) - cpu_start, time.monotonic() - wall_start)
+
+
+## \brief This function runs all scenarios against a freshly started server and prints the results.
+#
+#  \param [duration] A float. The duration of each scenario in seconds.
+#
+#  \param [server_args] A list of strings. Additional command line parameters for the server.
+#
+#  \returns Nothing.
+#
+def run(duration, server_args):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+    server = subprocess.Popen([sys.executable, 'displayserver.py'] + server_args, cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL)
+    time.sleep(STARTUP_TIME)
+    client = displayclient.SignClient('127.0.0.1', SERVER_PORT)
+
+    if client.connect() != displayclient.ERR_OK:
+        server.kill()
+        raise Exception('Unable to connect to server')
+
+    def idle():
+        client.show_intro()
+        time.sleep(duration)
+
+    def countdown():
+        for i in range(int(duration)):
+            client.show_question('Wie heißt die Hauptstadt#von Albanien?', int(duration) - i)
+            time.sleep(1.0)
+
+    def server_countdown():
+        client.start_countdown('Wie heißt die Hauptstadt#von Albanien?', int(duration))
+        time.sleep(duration)
+
+    def burst():
+        end = time.monotonic() + duration
+        count = 0
+
+        while time.monotonic() < end:
+            client.show_question('Wie heißt die Hauptstadt#von Albanien?', count % 1000)
+            count += 1
+
+        print('{:<24} {:>10.0f}'.format('burst commands/s', count / duration))
+
+    print('{:<24} {:>10} {:>10} {:>10}'.format('scenario', 'CPU s', 'wall s', 'CPU %'))
+
+    try:
+        for name, scenario in [('idle', idle), ('countdown (1 Hz)', countdown), ('countdown (server)', server_countdown), ('burst', burst)]:
+            cpu_time, wall_time = measure(server.pid, scenario)
+            print('{:<24} {:>10.2f} {:>10.2f} {:>10.1f}'.format(name, cpu_time, wall_time, (100.0 * cpu_time) / wall_time))
+    finally:
+        client.make_stop()
+        server.wait()
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    print('{:<24} {:>10.2f}'.format('total server CPU s', usage.ru_utime + usage.ru_stime))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measures the CPU usage of the displayserver')
+    parser.add_argument('--duration', type=float, default=5.0, help='duration of each scenario in seconds')
+    parser.add_argument('server_args', nargs='*', help='parameters for the server, given after --')
+    args = parser.parse_args()
+    run(args.duration, args.server_args)
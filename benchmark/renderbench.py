@@ -0,0 +1,271 @@
+################################################################################
+# Copyright 2016 Martin Grap
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+## @package renderbench Measures how long the displayserver needs to draw its scenes
+#
+# \file renderbench.py
+# \brief This file measures how long the Processor of the displayserver needs to draw each scene into the background
+#        for several screen sizes and font sizes. It uses the SDL dummy video driver, i.e. no window is opened and no
+#        display is needed. It is started via "python3 renderbench.py". Use "python3 renderbench.py --help" to list
+#        the available options.
+#
+#  Each scene is measured twice. For "cold" every render starts with an empty TextCache, so that each text has to be
+#  rendered into a new surface. For "warm" the TextCache is kept, which is the normal case in the server. The number
+#  of surfaces is the number of texts that had to be rendered per scene, i.e. the number of surfaces allocated.
+#
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+# Has to be set before pygame is initialized
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+import pygame
+import displayserver
+import displayschema
+
+## \brief Minimum number of seconds a single measurement runs
+MIN_DURATION = 0.5
+## \brief Screen sizes which are measured by default
+SIZES = [(800, 600), (1024, 768), (1280, 720), (1920, 1080)]
+## \brief Scalings of the font sizes in percent which are measured by default
+FONT_PERCENTS = [75, 100, 125]
+## \brief A question which is drawn in two lines
+QUESTION = 'Wie heißt die Hauptstadt#von Albanien?'
+## \brief A question which is drawn in four lines
+LONG_QUESTION = 'Welcher Komponist schrieb#die Oper "Die Zauberflöte"#und in welchem Jahr#wurde sie uraufgeführt?'
+## \brief The names of the teams
+TEAMS = ['Die Schlauen', 'Team Blau', 'Quizfüchse', 'Nordlichter']
+
+
+## \brief This class is a TextCache that counts the surfaces which have been allocated for rendering texts and the
+#         bytes used by their pixels.
+#
+class CountingTextCache(displayserver.TextCache):
+    ## \brief Constructor.
+    #
+    #  \param [fonts] Is a FontCache object. It provides the fonts used for rendering.
+    #
+    def __init__(self, fonts):
+        displayserver.TextCache.__init__(self, fonts)
+        ## \brief An integer. Number of bytes used by the pixels of all surfaces that have been allocated.
+        self.allocated = 0
+
+    ## \brief This method returns a surface that holds a rendered text and counts it if it had to be rendered.
+    #
+    #  \param [text] A string. The text to render.
+    #
+    #  \param [size] An integer. The font size in pixels.
+    #
+    #  \param [colour] A tuple (r, g, b). The colour of the text.
+    #
+    #  \returns A pygame.Surface object.
+    #
+    def render(self, text, size, colour):
+        misses = self.misses
+        result = displayserver.TextCache.render(self, text, size, colour)
+
+        if self.misses != misses:
+            self.allocated += displayserver.TextCache.surface_size(result)
+
+        return result
+
+
+## \brief This function returns a playing field data structure as it is used by the client.
+#
+#  \param [answered] An integer. The number of questions which have been answered. They are filled in column by column.
+#
+#  \returns A dictionary.
+#
+def make_playing_field(answered):
+    result = {}
+    count = 0
+
+    for i in ['Geschichte', 'Geografie', 'Musik', 'Sport', 'Wissenschaft']:
+        result[i] = {}
+        for j in displayschema.QUESTION_VALUES:
+            result[i][j] = {'answeredby':None, 'wronganswersby':set()}
+
+            if count < answered:
+                result[i][j]['answeredby'] = TEAMS[count % len(TEAMS)]
+                result[i][j]['wronganswersby'].add(TEAMS[(count + 1) % len(TEAMS)])
+
+            count += 1
+
+    return result
+
+
+## \brief This function returns the scenes which are measured.
+#
+#  \returns A list of tuples (name, params). params is the list of parameters of the command as it is received by the
+#           server after decoding, i.e. the command name followed by the parameters.
+#
+def make_scenes():
+    result = {}
+
+    for i, team in enumerate(TEAMS):
+        result[team] = (i * 60) - 40
+
+    return [
+        ('intro', [displayschema.SHOW_INTRO.name]),
+        ('thanks', [displayschema.SHOW_THANKS.name]),
+        ('question', [displayschema.SHOW_QUESTION.name, QUESTION, -1]),
+        ('question timer', [displayschema.SHOW_QUESTION.name, QUESTION, 60]),
+        ('question long timer', [displayschema.SHOW_QUESTION.name, LONG_QUESTION, 60]),
+        ('field empty', [displayschema.SHOW_PLAYING_FIELD.name, make_playing_field(0)]),
+        ('field half', [displayschema.SHOW_PLAYING_FIELD.name, make_playing_field(12)]),
+        ('field full', [displayschema.SHOW_PLAYING_FIELD.name, make_playing_field(25)]),
+        ('result', [displayschema.SHOW_RESULT.name, result])
+    ]
+
+
+## \brief This function encodes and decodes the parameters of a command in the same way as they are sent to the
+#         server.
+#
+#  \param [params] A list. The command name followed by the parameters.
+#
+#  \returns A list. The parameters as returned by TlvEntry.decode().
+#
+def transfer(params):
+    return displayschema.MESSAGES[params[0]].encode(*params[1:]).decode()
+
+
+## \brief This function measures how long a command needs to draw its scene.
+#
+#  Before each render another scene is drawn, so that the scene is always drawn completely and the playing field is
+#  not updated incrementally. Only the command itself is measured.
+#
+#  \param [background] Is a pygame.Surface. The background on which the Processor draws.
+#
+#  \param [fonts] Is a FontCache object. It is shared by all measurements, as is the case in the server.
+#
+#  \param [font_percent] An integer. Scales all font sizes in percent.
+#
+#  \param [params] A list. The decoded parameters of the command.
+#
+#  \param [cold] A boolean. If it is true each render starts with an empty TextCache.
+#
+#  \returns A tuple (ms, surfaces, kib). ms is the average time per render in milliseconds, surfaces the average number
+#           of surfaces allocated per render and kib the average number of KiB used by their pixels.
+#
+def measure_scene(background, fonts, font_percent, params, cold):
+    other = [displayschema.SHOW_INTRO.name]
+
+    if params[0] == displayschema.SHOW_INTRO.name:
+        other = [displayschema.SHOW_THANKS.name]
+
+    proc = displayserver.Processor(background, fonts, CountingTextCache(fonts), None, font_percent)
+    # Warm up the font cache and, for warm measurements, the text cache
+    proc.execute(proc.parse_command(params))
+    count = 0
+    surfaces = 0
+    allocated = 0
+    elapsed = 0.0
+
+    while elapsed < MIN_DURATION:
+        if cold:
+            proc = displayserver.Processor(background, fonts, CountingTextCache(fonts), None, font_percent)
+
+        proc.execute(proc.parse_command(other))
+        command = proc.parse_command(params)
+        misses = proc.texts.misses
+        allocated_before = proc.texts.allocated
+        start = time.perf_counter()
+        proc.execute(command)
+        elapsed += time.perf_counter() - start
+        surfaces += proc.texts.misses - misses
+        allocated += proc.texts.allocated - allocated_before
+        count += 1
+
+    return ((elapsed * 1000) / count, surfaces / count, allocated / (1024 * count))
+
+
+## \brief This function runs all measurements and prints their results.
+#
+#  \param [sizes] A list of tuples (width, height). The screen sizes.
+#
+#  \param [font_percents] A list of integers. The scalings of the font sizes in percent.
+#
+#  \param [name_filter] A string or None. Only the scenes whose name contains this string are measured.
+#
+#  \returns A list of dictionaries. One entry for each measurement.
+#
+def run(sizes, font_percents, name_filter = None):
+    results = []
+    scenes = [(name, transfer(params)) for name, params in make_scenes() if (name_filter == None) or (name_filter in name)]
+    fonts = displayserver.FontCache()
+    pygame.init()
+    print('{:<20} {:>10} {:>6} {:>10} {:>10} {:>10} {:>10} {:>10}'.format('scene', 'size', 'font %', 'cold ms', 'warm ms', 'cold surf', 'cold KiB', 'warm surf'))
+
+    for size in sizes:
+        background = displayserver.create_background(pygame.display.set_mode(size))
+
+        for font_percent in font_percents:
+            for name, params in scenes:
+                cold_ms, cold_surfaces, cold_kib = measure_scene(background, fonts, font_percent, params, True)
+                warm_ms, warm_surfaces, warm_kib = measure_scene(background, fonts, font_percent, params, False)
+                size_text = '{}x{}'.format(size[0], size[1])
+                print('{:<20} {:>10} {:>6} {:>10.3f} {:>10.3f} {:>10.1f} {:>10.1f} {:>10.1f}'.format(
+                    name, size_text, font_percent, cold_ms, warm_ms, cold_surfaces, cold_kib, warm_surfaces))
+                results.append({'name':'{} {} {}%'.format(name, size_text, font_percent), 'cold_ms':cold_ms, 'warm_ms':warm_ms,
+                                'cold_surfaces':cold_surfaces, 'cold_kib':cold_kib, 'warm_surfaces':warm_surfaces})
+
+    pygame.quit()
+
+    return results
+
+
+## \brief The main function of this program.
+#
+def main():
+    global MIN_DURATION
+
+    parser = argparse.ArgumentParser(description='Measures how long the displayserver needs to draw its scenes')
+    parser.add_argument('--size', type=displayserver.parse_size, action='append', help='screen size as WIDTHxHEIGHT, can be given several times (default: {})'.format(
+        ' '.join('{}x{}'.format(i[0], i[1]) for i in SIZES)))
+    parser.add_argument('--font-percent', type=int, action='append', help='scaling of the font sizes in percent, can be given several times (default: {})'.format(
+        ' '.join(str(i) for i in FONT_PERCENTS)))
+    parser.add_argument('--filter', help='only measure the scenes whose name contains this string')
+    parser.add_argument('--duration', type=float, default=MIN_DURATION, help='minimum number of seconds per measurement')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+    MIN_DURATION = args.duration
+    sizes = SIZES
+    font_percents = FONT_PERCENTS
+
+    if args.size != None:
+        sizes = args.size
+
+    if args.font_percent != None:
+        font_percents = args.font_percent
+
+    results = run(sizes, font_percents, args.filter)
+
+    if args.json != None:
+        with open(args.json, 'w') as f:
+            info = {'python':platform.python_version(), 'machine':platform.machine(), 'platform':platform.platform(),
+                    'pygame':pygame.version.ver, 'time':time.strftime('%Y-%m-%dT%H:%M:%S')}
+            json.dump({'info':info, 'results':results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
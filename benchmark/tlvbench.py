@@ -0,0 +1,583 @@
+################################################################################
+# Copyright 2016 Martin Grap
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+## @package tlvbench Contains benchmarks for the TLV encoder and decoder
+#
+# \file tlvbench.py
+# \brief This file contains benchmarks for the TLV encoder and decoder. It is started via "python3 tlvbench.py". Use
+#        "python3 tlvbench.py --help" to list the available options.
+#
+import os
+import sys
+import json
+import time
+import pickle
+import socket
+import argparse
+import platform
+import threading
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'client'))
+
+import displayclient
+import tlvobject
+import displayschema
+
+## \brief Minimum number of seconds a single measurement runs
+MIN_DURATION = 0.5
+
+
+## \brief This function encodes a sequence of TlvEntry objects in the way tlvobject did before the encoder
+#         joined all parts at once. Each header and each contents byte array is appended by concatenation.
+#
+#  \param [tlv_objects] Is a sequence of TlvEntry objects.
+#
+#  \returns A byte array.
+#
+def legacy_to_bytes(tlv_objects):
+    result = bytes()
+
+    for i in tlv_objects:
+        result = result + tlvobject.TlvStream.make_header(i.tag, len(i.value))
+        result = result + i.value
+
+    return result
+
+
+## \brief This function creates a TlvEntry that represents a sequence in the way tlvobject did before the encoder
+#         joined all parts at once.
+#
+#  \param [obj_sequence] Is a sequence of TlvEntry objects.
+#
+#  \returns A TlvEntry object.
+#
+def legacy_sequence(obj_sequence):
+    result = tlvobject.TlvEntry()
+    result.tag = tlvobject.TAG_SEQUENCE
+    result.value = legacy_to_bytes(obj_sequence)
+    return result
+
+
+## \brief This function builds and encodes a frame in the way SignClient.make_call and TlvStream.write_tlv did
+#         before the encoder joined all parts at once.
+#
+#  \param [make_params] A callable that returns a list of TlvEntry objects.
+#
+#  \returns A byte array that contains the header and the contents bytes of the frame.
+#
+def legacy_encode_frame(make_params):
+    param = legacy_sequence(make_params())
+    data = tlvobject.TlvStream.make_header(param.tag, len(param.value))
+    data = data + param.value
+    return data
+
+
+## \brief This function builds and encodes a frame using the current encoder.
+#
+#  \param [make_params] A callable that returns a list of TlvEntry objects.
+#
+#  \returns A byte array that contains the header and the contents bytes of the frame.
+#
+def encode_frame(make_params):
+    param = tlvobject.TlvEntry().to_sequence(make_params())
+    return tlvobject.TlvStream.to_bytes([param])
+
+
+## \brief This function returns a playing field data structure as it is used by the client.
+#
+#  \returns A dictionary.
+#
+def make_playing_field():
+    result = {}
+
+    for i in ['Geschichte', 'Geografie', 'Musik', 'Sport', 'Wissenschaft']:
+        result[i] = {}
+        for j in [20, 40, 60, 80, 100]:
+            result[i][j] = {'answeredby':None, 'wronganswersby':set()}
+
+    result['Musik'][40]['answeredby'] = 'A'
+    result['Sport'][100]['wronganswersby'].add('B')
+
+    return result
+
+
+## \brief The pickled playing field as it is sent by the showplayingfield command
+PICKLED_FIELD = pickle.dumps(make_playing_field())
+
+
+## \brief This function returns the parameters of a showquestion command.
+#
+#  \returns A list of TlvEntry objects.
+#
+def showquestion_params():
+    question = 'Wie heißt die Hauptstadt#von Albanien?'
+    return [tlvobject.TlvEntry().to_string('showquestion'), tlvobject.TlvEntry().to_string(question), tlvobject.TlvEntry().to_varint(42)]
+
+
+## \brief This function returns the parameters of a showplayingfield command.
+#
+#  \returns A list of TlvEntry objects.
+#
+def showplayingfield_params():
+    return [tlvobject.TlvEntry().to_string('showplayingfield'), tlvobject.TlvEntry().to_byte_array(PICKLED_FIELD)]
+
+
+## \brief This function returns the parameters of a command that carries a byte array of almost LEN_MAX bytes
+#         nested in a sequence.
+#
+#  \param [sequence_maker] A callable that turns a list of TlvEntry objects into a sequence TlvEntry.
+#
+#  \returns A callable that returns a list of TlvEntry objects.
+#
+def large_params(sequence_maker):
+    def make_params():
+        inner = [tlvobject.TlvEntry().to_string('image'), tlvobject.TlvEntry().to_byte_array(LARGE_PAYLOAD)]
+        return [tlvobject.TlvEntry().to_string('large'), sequence_maker(inner)]
+
+    return make_params
+
+
+## \brief A byte array which fills a frame up to LEN_MAX when sent by large_params
+LARGE_PAYLOAD = bytes(tlvobject.LEN_MAX - 64)
+
+
+## \brief This function returns a function that creates the parameters of a command that contains sequences
+#         which are nested to the given depth.
+#
+#  \param [depth] An integer. It specifies the nesting depth.
+#
+#  \param [sequence_maker] A callable that turns a list of TlvEntry objects into a sequence TlvEntry.
+#
+#  \returns A callable that returns a list of TlvEntry objects.
+#
+def nested_params(depth, sequence_maker):
+    def make_params():
+        inner = [tlvobject.TlvEntry().to_string('x' * 100), tlvobject.TlvEntry().to_int(depth)]
+
+        for i in range(depth):
+            inner = [sequence_maker(inner), tlvobject.TlvEntry().to_string('level')]
+
+        return [tlvobject.TlvEntry().to_string('nested')] + inner
+
+    return make_params
+
+
+## \brief This function measures how many times per second a function can be called.
+#
+#  \param [func] A callable without parameters.
+#
+#  \returns A float. The number of calls per second.
+#
+def measure_rate(func):
+    count = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+
+    while elapsed < MIN_DURATION:
+        for i in range(100):
+            func()
+        count += 100
+        elapsed = time.perf_counter() - start
+
+    return count / elapsed
+
+
+## \brief This function measures the peak amount of memory allocated during a single call of a function.
+#
+#  CPython does not offer a counter for individual allocations. The peak of the memory traced by tracemalloc
+#  is used instead. It grows with every intermediate copy of the frame that exists at the same time.
+#
+#  \param [func] A callable without parameters.
+#
+#  \returns An integer. The peak number of bytes allocated during the call.
+#
+def measure_peak_alloc(func):
+    # Warm up caches
+    func()
+    tracemalloc.start()
+
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return peak - base
+
+
+## \brief This function compares the legacy encoder with the current one.
+#
+#  \returns Nothing.
+#
+def bench_encoder():
+    messages = [
+        ('showquestion', showquestion_params, showquestion_params),
+        ('showplayingfield', showplayingfield_params, showplayingfield_params),
+        ('nested depth 8', nested_params(8, legacy_sequence), nested_params(8, lambda x: tlvobject.TlvEntry().to_sequence(x))),
+        ('large byte array', large_params(legacy_sequence), large_params(lambda x: tlvobject.TlvEntry().to_sequence(x))),
+    ]
+
+    print('{:<20} {:>14} {:>14} {:>14} {:>14}'.format('message', 'legacy op/s', 'current op/s', 'legacy peak B', 'current peak B'))
+
+    for name, legacy_params, current_params in messages:
+        if legacy_encode_frame(legacy_params) != encode_frame(current_params):
+            raise Exception('Encoders disagree on ' + name)
+
+        legacy_rate = measure_rate(lambda: legacy_encode_frame(legacy_params))
+        current_rate = measure_rate(lambda: encode_frame(current_params))
+        legacy_peak = measure_peak_alloc(lambda: legacy_encode_frame(legacy_params))
+        current_peak = measure_peak_alloc(lambda: encode_frame(current_params))
+
+        print('{:<20} {:>14.0f} {:>14.0f} {:>14} {:>14}'.format(name, legacy_rate, current_rate, legacy_peak, current_peak))
+
+
+## \brief This function decodes a double value in the way tlvobject did before TAG_DOUBLE_BINARY was introduced.
+#
+#  \param [entry] A TlvEntry object with the tag TAG_DOUBLE.
+#
+#  \returns A float.
+#
+def legacy_decode_double(entry):
+    return eval(entry.value.decode())
+
+
+## \brief This function compares the encoding and decoding throughput of the textual and the binary double format.
+#
+#  \returns Nothing.
+#
+def bench_double():
+    value = 3.141592653589793
+    legacy = tlvobject.TlvEntry()
+    legacy.tag = tlvobject.TAG_DOUBLE
+    legacy.value = str(value).encode()
+    binary = tlvobject.TlvEntry().to_double(value)
+
+    def legacy_encode():
+        entry = tlvobject.TlvEntry()
+        entry.tag = tlvobject.TAG_DOUBLE
+        entry.value = str(value).encode()
+
+    print('{:<32} {:>14}'.format('double', 'op/s'))
+    print('{:<32} {:>14.0f}'.format('legacy encode (str)', measure_rate(legacy_encode)))
+    print('{:<32} {:>14.0f}'.format('binary encode (struct)', measure_rate(lambda: tlvobject.TlvEntry().to_double(value))))
+    print('{:<32} {:>14.0f}'.format('legacy decode (eval)', measure_rate(lambda: legacy_decode_double(legacy))))
+    print('{:<32} {:>14.0f}'.format('legacy decode (float)', measure_rate(legacy.tlv_convert)))
+    print('{:<32} {:>14.0f}'.format('binary decode (struct)', measure_rate(binary.tlv_convert)))
+
+
+## \brief This function decodes a TLV object that has been received from the network and converts all nested
+#         values.
+#
+#  \param [encoded] A byte array that holds the contents bytes of a TLV object.
+#
+#  \param [tag] An integer. The tag of the TLV object.
+#
+#  \returns A python3 value.
+#
+def decode_all(encoded, tag):
+    entry = tlvobject.TlvEntry()
+    entry.tag = tag
+    entry.value = encoded
+    return materialize(entry.tlv_convert())
+
+
+## \brief This function converts a decoded TLV value recursively into plain python3 containers, i.e. it decodes
+#         all elements of lazily decoded sequences.
+#
+#  \param [value] A python3 value as returned by TlvEntry.tlv_convert().
+#
+#  \returns A python3 value.
+#
+def materialize(value):
+    if isinstance(value, tlvobject.TlvSequence):
+        return [materialize(i) for i in value]
+    elif isinstance(value, dict):
+        return {k: materialize(v) for k, v in value.items()}
+    else:
+        return value
+
+
+## \brief This function compares the payloads of the showplayingfield and showresult commands when they are sent as pickled
+#         byte arrays and when they are encoded and decoded by the types in displayschema.
+#
+#  \returns Nothing.
+#
+def bench_board():
+    field = make_playing_field()
+    result = {'A': 120, 'B': -40, 'C': 60}
+    payloads = [
+        ('playing field', field, displayschema.PLAYING_FIELD),
+        ('result', result, displayschema.RESULT),
+    ]
+
+    print('{:<20} {:>12} {:>12} {:>16} {:>16}'.format('payload', 'pickle B', 'TLV B', 'unpickle op/s', 'TLV decode op/s'))
+
+    for name, python_value, field_type in payloads:
+        pickled = pickle.dumps(python_value)
+        tlv = field_type.encoder(python_value)
+        encoded = bytes(tlv.value)
+        pickle_rate = measure_rate(lambda: pickle.loads(pickled))
+        # The server decodes the parameter generically and then checks it with the decoder of its type
+        tlv_rate = measure_rate(lambda: field_type.decoder(tlvobject.TlvDecoder.decode(tlv.tag, encoded)))
+
+        print('{:<20} {:>12} {:>12} {:>16.0f} {:>16.0f}'.format(name, len(pickled), len(encoded), pickle_rate, tlv_rate))
+
+
+## \brief Sizes in bytes of the payloads used by the suite. The largest one fills a frame with a classic header.
+PAYLOAD_SIZES = [16, 256, 4096, tlvobject.LEN_MAX]
+## \brief Nesting depths of the sequences used by the suite
+NESTING_DEPTHS = [1, 4, 16, 64]
+
+
+## \brief A class that runs the benchmark suite and collects its results.
+#
+class BenchSuite:
+    ## \brief Constructor.
+    #
+    #  \param [name_filter] A string or None. If it is not None only benchmarks whose name contains this string are run.
+    #
+    def __init__(self, name_filter = None):
+        ## \brief A string or None. Only benchmarks whose name contains this string are run.
+        self._filter = name_filter
+        ## \brief A list of dictionaries. Each dictionary describes the result of a single benchmark.
+        self.results = []
+
+    ## \brief This method runs a single benchmark, prints its result and records it.
+    #
+    #  \param [name] A string. The name of the benchmark. It has to be unique within the suite.
+    #
+    #  \param [func] A callable without parameters. It performs one operation.
+    #
+    #  \param [num_bytes] An integer. The number of bytes processed by one operation. It is used to calculate bytes/s.
+    #
+    #  \returns Nothing.
+    #
+    def run(self, name, func, num_bytes):
+        if (self._filter != None) and (self._filter not in name):
+            return
+
+        rate = measure_rate(func)
+        result = {'name':name, 'ops_per_s':rate, 'bytes_per_s':rate * num_bytes, 'peak_alloc':measure_peak_alloc(func)}
+        self.results.append(result)
+        print('{:<40} {:>12.0f} {:>14.0f} {:>12}'.format(name, result['ops_per_s'], result['bytes_per_s'], result['peak_alloc']))
+
+    ## \brief This method runs the encode and decode benchmarks for one TLV object.
+    #
+    #  \param [name] A string. Describes the TLV object.
+    #
+    #  \param [make_entry] A callable that creates the TlvEntry object which is to be encoded.
+    #
+    #  \returns Nothing.
+    #
+    def run_codec(self, name, make_entry):
+        entry = make_entry()
+        encoded = bytes(tlvobject.TlvStream.to_bytes([entry]))
+        contents = bytes(entry.value)
+
+        self.run('encode ' + name, lambda: tlvobject.TlvStream.to_bytes([make_entry()]), len(encoded))
+        self.run('decode ' + name, lambda: decode_all(contents, entry.tag), len(encoded))
+
+    ## \brief This method runs the encode and decode benchmarks for every tag type.
+    #
+    #  \returns Nothing.
+    #
+    def run_tags(self):
+        legacy_double = tlvobject.TlvEntry()
+        legacy_double.tag = tlvobject.TAG_DOUBLE
+        legacy_double.value = b'3.141592653589793'
+
+        self.run_codec('int', lambda: tlvobject.TlvEntry().to_int(-123456))
+        self.run_codec('varint', lambda: tlvobject.TlvEntry().to_varint(-123456))
+        self.run_codec('small varint', lambda: tlvobject.TlvEntry().to_varint(42))
+        self.run_codec('result code', lambda: tlvobject.TlvEntry().to_result(42))
+        self.run_codec('string', lambda: tlvobject.TlvEntry().to_string('Wie heißt die Hauptstadt#von Albanien?'))
+        self.run_codec('byte array', lambda: tlvobject.TlvEntry().to_byte_array(PICKLED_FIELD))
+        self.run_codec('null', lambda: tlvobject.TlvEntry().to_null())
+        self.run_codec('double', lambda: tlvobject.TlvEntry().to_double(3.141592653589793))
+        self.run_codec('legacy double', lambda: legacy_double)
+        self.run_codec('sequence', lambda: tlvobject.TlvEntry().to_sequence(showquestion_params()))
+        self.run_codec('map', lambda: tlvobject.TlvEntry().to_value({'A': 120, 'B': -40, 'C': 60}))
+        self.run_codec('set', lambda: tlvobject.TlvEntry().to_value({'A', 'B', 'C'}))
+        self.run_codec('correlated', lambda: tlvobject.TlvEntry().to_correlated(7, tlvobject.TlvEntry().to_int(0)))
+        self.run_codec('showplayingfield', lambda: tlvobject.TlvEntry().to_sequence([tlvobject.TlvEntry().to_string('showplayingfield'), displayschema.encode_playing_field(make_playing_field())]))
+
+    ## \brief This method runs the encode and decode benchmarks for nested sequences.
+    #
+    #  \returns Nothing.
+    #
+    def run_nesting(self):
+        for depth in NESTING_DEPTHS:
+            make_params = nested_params(depth, lambda x: tlvobject.TlvEntry().to_sequence(x))
+            self.run_codec('nesting depth {}'.format(depth), lambda: tlvobject.TlvEntry().to_sequence(make_params()))
+
+    ## \brief This method runs the encode and decode benchmarks for byte arrays and strings of different sizes.
+    #
+    #  \returns Nothing.
+    #
+    def run_sizes(self):
+        for size in PAYLOAD_SIZES:
+            payload = bytes(size)
+            text = 'x' * size
+            self.run_codec('byte array {} B'.format(size), lambda: tlvobject.TlvEntry().to_byte_array(payload))
+            self.run_codec('string {} B'.format(size), lambda: tlvobject.TlvEntry().to_string(text))
+
+    ## \brief This method measures round trips through a pair of connected sockets. The peer echoes every TLV object
+    #         via TlvStream.transact_server.
+    #
+    #  \returns Nothing.
+    #
+    def run_socket(self):
+        for size in PAYLOAD_SIZES:
+            client_sock, server_sock = socket.socketpair()
+            echo_thread = threading.Thread(target=echo_server, args=(server_sock,))
+            echo_thread.start()
+
+            try:
+                request = tlvobject.TlvEntry().to_sequence([tlvobject.TlvEntry().to_string('echo'), tlvobject.TlvEntry().to_byte_array(bytes(size))])
+                frame_len = len(tlvobject.TlvStream.to_bytes([request]))
+                self.run('round trip {} B'.format(size), lambda: tlvobject.TlvStream.transact_client(client_sock, request), 2 * frame_len)
+            finally:
+                client_sock.close()
+                echo_thread.join()
+                server_sock.close()
+
+    ## \brief This method compares TlvEntry.tlv_convert() with the single pass decoder TlvEntry.decode() on the frames
+    #         of the showquestion and showplayingfield commands. The result of tlv_convert() is materialized as the
+    #         server accesses all elements of a command.
+    #
+    #  \returns Nothing.
+    #
+    def run_decoder(self):
+        frames = [
+            ('showquestion', tlvobject.TlvEntry().to_sequence(showquestion_params())),
+            ('showplayingfield', tlvobject.TlvEntry().to_sequence([tlvobject.TlvEntry().to_string('showplayingfield'), displayschema.encode_playing_field(make_playing_field())]))
+        ]
+        
+        for name, frame in frames:
+            entry = tlvobject.TlvEntry()
+            entry.tag = frame.tag
+            entry.value = bytes(frame.value)
+            frame_len = len(tlvobject.TlvStream.to_bytes([entry]))
+            
+            self.run('tlv_convert ' + name, lambda: materialize(entry.tlv_convert()), frame_len)
+            self.run('single pass ' + name, entry.decode, frame_len)
+
+    ## \brief This method runs all parts of the suite.
+    #
+    #  \returns Nothing.
+    #
+    def run_all(self):
+        print('{:<40} {:>12} {:>14} {:>12}'.format('benchmark', 'op/s', 'bytes/s', 'peak B'))
+        self.run_tags()
+        self.run_decoder()
+        self.run_nesting()
+        self.run_sizes()
+        self.run_socket()
+
+
+## \brief A processor for TlvStream.transact_server which returns every TLV object it receives.
+#
+class EchoProcessor:
+    ## \brief This method returns the TLV object sent by the client.
+    #
+    #  \param [tlv_param] A TlvEntry object.
+    #
+    #  \returns The TlvEntry object given in parameter tlv_param.
+    #
+    def process(self, tlv_param):
+        return tlv_param
+
+
+## \brief This function answers TLV objects received through a socket until the peer closes the connection.
+#
+#  \param [sock] A socket object.
+#
+#  \returns Nothing.
+#
+def echo_server(sock):
+    pool = tlvobject.TlvBufferPool()
+    processor = EchoProcessor()
+
+    try:
+        while True:
+            tlvobject.TlvStream.transact_server(sock, processor, pool)
+    except tlvobject.TlvException:
+        # The client has closed the connection
+        pass
+
+
+## \brief This function prints the change of each benchmark result compared to a previous run.
+#
+#  \param [results] A list of dictionaries as collected by BenchSuite.
+#
+#  \param [baseline_file] A string. The name of a file that has been written via the --json option.
+#
+#  \returns Nothing.
+#
+def compare(results, baseline_file):
+    with open(baseline_file, 'r') as f:
+        baseline = {}
+        for i in json.load(f)['results']:
+            baseline[i['name']] = i
+
+    print()
+    print('{:<40} {:>12} {:>12} {:>9}'.format('benchmark', 'base op/s', 'op/s', 'change'))
+
+    for i in results:
+        if i['name'] in baseline:
+            base_rate = baseline[i['name']]['ops_per_s']
+            change = (100.0 * (i['ops_per_s'] - base_rate)) / base_rate
+            print('{:<40} {:>12.0f} {:>12.0f} {:>8.1f}%'.format(i['name'], base_rate, i['ops_per_s'], change))
+
+
+## \brief The main function of this program.
+#
+def main():
+    global MIN_DURATION
+
+    parser = argparse.ArgumentParser(description='Benchmarks for the TLV encoder and decoder')
+    parser.add_argument('--json', help='write the results of the suite to this file')
+    parser.add_argument('--compare', help='compare the results of the suite with a file written via --json')
+    parser.add_argument('--filter', help='only run the benchmarks of the suite whose name contains this string')
+    parser.add_argument('--duration', type=float, default=MIN_DURATION, help='minimum number of seconds per measurement')
+    parser.add_argument('--legacy', action='store_true', help='compare the current encoder and decoder with the legacy implementations instead of running the suite')
+    args = parser.parse_args()
+    MIN_DURATION = args.duration
+
+    if args.legacy:
+        bench_encoder()
+        print()
+        bench_double()
+        print()
+        bench_board()
+    else:
+        suite = BenchSuite(args.filter)
+        suite.run_all()
+
+        if args.json != None:
+            with open(args.json, 'w') as f:
+                info = {'python':platform.python_version(), 'machine':platform.machine(), 'platform':platform.platform(), 'time':time.strftime('%Y-%m-%dT%H:%M:%S')}
+                json.dump({'info':info, 'results':suite.results}, f, indent=2)
+
+        if args.compare != None:
+            compare(suite.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
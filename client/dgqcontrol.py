@@ -216,6 +216,10 @@ class DasGrosseQuiz:
         ablauf_grid.attach(self._free_question_button, 3, 2, 1, 1)
         self._free_question_button.connect('clicked', self.clear_question)             
         
+        self._countdown_button = Gtk.Button(label = 'Countdown anhalten')
+        ablauf_grid.attach(self._countdown_button, 0, 3, 4, 1)
+        self._countdown_button.connect('clicked', self.toggle_countdown)
+        
         ablauf_box.pack_start(ablauf_grid, False, True, 0)
         
         self._window.add(self._background_box)
@@ -339,6 +343,10 @@ class DasGrosseQuiz:
         self._playing_field.raspi.disconnect()
         
         if self._playing_field.raspi.connect() == ERR_OK:
+            # The displayserver may have been restarted. Therefore it is told again what to show.
+            if self._playing_field.restore_display() != ERR_OK:
+                self.error_message('Kann Anzeige nicht wiederherstellen')
+            
             self.info_message('Verbindung wiederhergestellt')
         else:
             self.error_message('Verbindung konnte nicht wiederhergestellt werden')
@@ -525,6 +533,14 @@ class DasGrosseQuiz:
         # Make background of button for the current question appear in yellow
         if q != None:
             self._questions_grid[q.category][q.value].get_style_context().add_class('question_button')
+        
+        # The countdown can only be paused while a question with a time limit is shown
+        self._countdown_button.set_sensitive((q != None) and q.show_time)
+        
+        if self._playing_field.countdown_paused:
+            self._countdown_button.set_label('Countdown fortsetzen')
+        else:
+            self._countdown_button.set_label('Countdown anhalten')
 
     ## \brief This method is used as callback that is called when the user clicked on any button which indicates that a team
     #         answered the current question correctly or that all teams gave a wrong answer. In that case TEAM_NONE answered
@@ -572,6 +588,22 @@ class DasGrosseQuiz:
         if self._playing_field.save_state(AUTOSAVE_FILE_NAME) != ERR_OK:
             self.error_message('Sicherung fehlgeschlagen')
 
+    ## \brief This method is used as callback that is called when the user clicked on the "Countdown anhalten" Button. It pauses
+    #         the countdown of the current question or resumes it if it is already paused.
+    #
+    #  \param [button] An object of type Gtk.Button. This is the button which has been clicked.
+    #    
+    #  \returns Nothing.
+    #
+    def toggle_countdown(self, button):
+        if self._playing_field.countdown_paused:
+            if self._playing_field.resume_countdown() != ERR_OK:
+                self.error_message('Kann Countdown nicht fortsetzen')
+        else:
+            if self._playing_field.pause_countdown() != ERR_OK:
+                self.error_message('Kann Countdown nicht anhalten')
+        self.update_state()
+
     ## \brief This method is used as callback that is called when the user wants the audience to start answering a question by clicking
     #         on a question button. The clicked question then also becomes the current question and is displayed on the display server's
     #         screen.
@@ -19,9 +19,17 @@
 # \file displayclient.py
 # \brief Contains classes that implement a client for the displayserver of "Das grosse Quiz".
 #
+import os
+import sys
 import socket
-import pickle
+import asyncio
+
+# The modules which are shared by client and server reside in the "common" directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
 import tlvobject
+import tlvasync
+import displayschema
 
 ERR_OK = 0
 ERR_ERROR = 42
@@ -43,6 +51,9 @@ class SignClient:
         self._port = port
         self._is_connected = False
         self._sock = None
+        self._pipeline = None
+        self._compression = None
+        self._batch = None
 
     ## \brief This method connects to the displayserver. The client stays connected as long as the game runs.
     #
@@ -54,16 +65,29 @@ class SignClient:
             if not self._is_connected:
                 self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 self._sock.connect((self._host, self._port))
+                # Agree with the server on the compression codec used for this connection
+                self._compression = tlvobject.TlvCompression()
+                tlvobject.TlvStream.negotiate_client(self._sock, self._compression)
+                self._pipeline = tlvobject.TlvPipeline(self._sock, self._compression)
                 self._is_connected = True
         except:
             result = ERR_ERROR
             if self._sock != None:
                 self._sock.close()
                 self._sock = None
+                self._pipeline = None
                 self._is_connected = False 
         
         return result           
 
+    ## \brief This property returns the compression settings and statistics of the current connection.
+    #
+    #  \returns An object of type tlvobject.TlvCompression or None if the client has never been connected.
+    #        
+    @property
+    def compression(self):
+        return self._compression
+
     ## \brief This method disconnects the client from the displayserver.
     #
     #  \returns Nothing.
@@ -74,41 +98,136 @@ class SignClient:
                 self._sock.shutdown(socket.SHUT_RDWR)
                 self._sock.close()
                 self._sock = None                
+                self._pipeline = None
         finally:
             self._is_connected = False
 
-    ## \brief This method allows to send a command to the client.
+    ## \brief This method allows to send a command to the client. Between begin_batch() and end_batch() the command is
+    #         not sent but collected for the batch.
     #
     #  \param [command] A string. It has to hold the command that is to be sent to the server.
     #        
     #  \param [parameters] A list of tlvobject.TlvEntry objects. These objects specify the parameters of the command.
     #        
-    #  \returns An int. A return value of 0 signifies successfull execution of the command.
+    #  \returns An int. A return value of 0 signifies successfull execution of the command. When a batch is collected
+    #           0 is returned. The real result is returned by end_batch().
     #            
     def make_call(self, command, parameters = []):
+        if self._batch != None:
+            self._batch.append((command, parameters))
+            return ERR_OK
+        
         result = ERR_OK
-        parm_sequence = [tlvobject.TlvEntry().to_string(command)] 
+        parm_sequence = [displayschema.command_entry(command)] 
         parm_sequence = parm_sequence + parameters
          
         try:
             param = tlvobject.TlvEntry().to_sequence(parm_sequence)
-            result = tlvobject.TlvStream.transact_client(self._sock, param)
+            # Answers to calls that are still in flight have to be received before the answer to this call
+            self._pipeline.wait_all()
+            result = tlvobject.TlvStream.transact_client(self._sock, param, None, self._compression)
+        except:
+            result = ERR_ERROR
+        
+        return result
+
+    ## \brief This method sends several commands to the server in a single message. The server executes them atomically,
+    #         i.e. none of them is executed if one of them is malformed, and draws the screen only once.
+    #
+    #  \param [calls] A list of tuples (command, parameters). command is a string and parameters is a list of
+    #         tlvobject.TlvEntry objects.
+    #        
+    #  \returns A list of ints. It contains the result of each command in the order given by calls. A value of 0
+    #           signifies successfull execution of the corresponding command.
+    #            
+    def make_batch_call(self, calls):
+        result = [ERR_ERROR] * len(calls)
+        batch_sequence = [tlvobject.TlvEntry().to_string('batch')]
+        
+        for command, parameters in calls:
+            batch_sequence.append(tlvobject.TlvEntry().to_sequence([displayschema.command_entry(command)] + parameters))
+         
+        try:
+            param = tlvobject.TlvEntry().to_sequence(batch_sequence)
+            self._pipeline.wait_all()
+            answer = list(tlvobject.TlvStream.transact_client(self._sock, param, None, self._compression))
+            
+            if len(answer) == len(calls):
+                result = answer
+        except:
+            result = [ERR_ERROR] * len(calls)
+        
+        return result
+
+    ## \brief This method starts to collect a batch. All commands sent via make_call() (and therefore all show_...() methods)
+    #         are collected until end_batch() is called.
+    #
+    #  \returns Nothing.
+    #            
+    def begin_batch(self):
+        self._batch = []
+
+    ## \brief This method sends all commands collected since begin_batch() in a single message.
+    #
+    #  \returns A list of ints. It contains the result of each collected command. A value of 0 signifies successfull
+    #           execution of the corresponding command.
+    #            
+    def end_batch(self):
+        calls = self._batch
+        self._batch = None
+        
+        return self.make_batch_call(calls)
+
+    ## \brief This method allows to send a command to the server without waiting for the answer. The server processes
+    #         commands in the order in which they have been sent. The answer has to be retrieved by calling end_call().
+    #
+    #  \param [command] A string. It has to hold the command that is to be sent to the server.
+    #        
+    #  \param [parameters] A list of tlvobject.TlvEntry objects. These objects specify the parameters of the command.
+    #        
+    #  \returns An int. The request ID of the call or None if sending the command failed.
+    #            
+    def begin_call(self, command, parameters = []):
+        result = None
+        parm_sequence = [displayschema.command_entry(command)] 
+        parm_sequence = parm_sequence + parameters
+         
+        try:
+            param = tlvobject.TlvEntry().to_sequence(parm_sequence)
+            result = self._pipeline.submit(param)
+        except:
+            result = None
+        
+        return result
+
+    ## \brief This method returns the result of a command that has been sent via begin_call(). It waits for the
+    #         answer of the server if it has not been received yet.
+    #
+    #  \param [request_id] An int. The request ID returned by begin_call().
+    #        
+    #  \returns An int. A return value of 0 signifies successfull execution of the command.
+    #            
+    def end_call(self, request_id):
+        result = ERR_OK
+         
+        try:
+            result = self._pipeline.collect(request_id)
         except:
             result = ERR_ERROR
         
         return result
 
     ## \brief This method allows to send a command to the client. The command has one parameter which is created by
-    #         "pickling" a python object.
+    #         converting a python object into the corresponding TLV object.
     #
     #  \param [command] A string. It has to hold the command that is to be sent to the server.
     #        
-    #  \param [param_object] An object that can be pickled using pickle.dumps().
+    #  \param [param_object] An object that can be converted by tlvobject.TlvEntry.to_value().
     #        
     #  \returns An int. A return value of 0 signifies successfull execution of the command.
     #                
-    def make_pickle_call(self, command, param_object):
-        param_sequence = [tlvobject.TlvEntry().to_byte_array(pickle.dumps(param_object))]
+    def make_value_call(self, command, param_object):
+        param_sequence = [tlvobject.TlvEntry().to_value(param_object)]
         return self.make_call(command, param_sequence)
 
     ## \brief This method sends the stop command to the server and subsequently disconnects the client.
@@ -116,7 +235,7 @@ class SignClient:
     #  \returns Nothing.
     #                
     def make_stop(self):
-        result = self.make_call('stop')
+        result = self.make_call(displayschema.STOP.name)
         self.disconnect()
         return result
 
@@ -129,24 +248,68 @@ class SignClient:
     #  \returns An int. A return value of 0 signifies successfull execution of the command.
     #       
     def show_question(self, question, time):
-        param_sequence = [tlvobject.TlvEntry().to_string(question), tlvobject.TlvEntry().to_int(time)]
-        return self.make_call('showquestion', param_sequence)
+        schema = displayschema.SHOW_QUESTION
+        return self.make_call(schema.name, schema.encode_params(question, time))
+
+    ## \brief This method instucts the displayserver to show a question on the screen without waiting for the answer.
+    #
+    #  \param [question] A string. If the string contains '#' characters each of them is interpreted as a line break.
+    #
+    #  \param [time] An integer. It specifies the time in seconds which is left for answering the question.
+    #    
+    #  \returns An int or None. The request ID that has to be passed to end_call(). None signifies an error.
+    #       
+    def begin_show_question(self, question, time):
+        schema = displayschema.SHOW_QUESTION
+        return self.begin_call(schema.name, schema.encode_params(question, time))
+
+    ## \brief This method instucts the displayserver to show a question on the screen and to count down the time that
+    #         is left for answering it. The server updates the time on its own, i.e. no further commands have to be sent.
+    #
+    #  \param [question] A string. If the string contains '#' characters each of them is interpreted as a line break.
+    #
+    #  \param [time] An integer. It specifies the time in seconds which is left for answering the question.
+    #    
+    #  \returns An int. A return value of 0 signifies successfull execution of the command.
+    #       
+    def start_countdown(self, question, time):
+        schema = displayschema.START_COUNTDOWN
+        return self.make_call(schema.name, schema.encode_params(question, time))
+
+    ## \brief This method instucts the displayserver to pause the countdown of the question that is shown.
+    #
+    #  \returns An int. A return value of 0 signifies successfull execution of the command.
+    #       
+    def pause_countdown(self):
+        return self.make_call(displayschema.PAUSE_COUNTDOWN.name)
+
+    ## \brief This method instucts the displayserver to resume a paused countdown.
+    #
+    #  \returns An int. A return value of 0 signifies successfull execution of the command.
+    #       
+    def resume_countdown(self):
+        return self.make_call(displayschema.RESUME_COUNTDOWN.name)
+
+    ## \brief This method instucts the displayserver to stop the countdown. The time that is left remains visible.
+    #
+    #  \returns An int. A return value of 0 signifies successfull execution of the command.
+    #       
+    def stop_countdown(self):
+        return self.make_call(displayschema.STOP_COUNTDOWN.name)
 
     ## \brief This method instructs the displayserver to show an intro message.
     #
     #  \returns An int. A return value of 0 signifies successfull execution of the command.
     #       
     def show_intro(self):
-        param_sequence = []
-        return self.make_call('showintro', param_sequence)
+        return self.make_call(displayschema.SHOW_INTRO.name)
 
     ## \brief This method instructs the displayserver to show a "Thank you" message.
     #
     #  \returns An int. A return value of 0 signifies successfull execution of the command.
     #
     def show_thanks(self):
-        param_sequence = []
-        return self.make_call('danksagung', param_sequence)
+        return self.make_call(displayschema.SHOW_THANKS.name)
 
     ## \brief This method instucts the displayserver to display a message that describes the final result of the game.
     #
@@ -157,7 +320,8 @@ class SignClient:
     #  \returns An int. A return value of 0 signifies successfull execution of the command.
     #       
     def show_result(self, current_result):
-        return self.make_pickle_call('showresult', current_result)
+        schema = displayschema.SHOW_RESULT
+        return self.make_call(schema.name, schema.encode_params(current_result))
 
     ## \brief This method instucts the displayserver to display the playing field of the game.
     #
@@ -168,5 +332,172 @@ class SignClient:
     #  \returns An int. A return value of 0 signifies successfull execution of the command.
     #       
     def show_playing_field(self, field_data):
-        return self.make_pickle_call('showplayingfield', field_data)
+        schema = displayschema.SHOW_PLAYING_FIELD
+        return self.make_call(schema.name, schema.encode_params(field_data))
 
+
+## \brief A variant of SignClient that uses asyncio. It allows to talk to the displayserver from an event loop without
+#         blocking it.
+#
+#  All methods that talk to the server are coroutines. This includes the inherited show_...() methods and end_batch() which
+#  return the coroutine of the overridden method they call. All requests are tagged with a request ID. Therefore several
+#  tasks can share the same client and have their requests in flight at the same time.
+#
+class AsyncSignClient(SignClient):
+    ## \brief Constructor. 
+    #
+    #  \param [host] A string. It has to conain the host name or the "dotted decimal" ip address of the machine which
+    #         hosts the displayserver.
+    #
+    #  \param [port] An it. It has to hold the port on which the displayserver is listening.
+    #    
+    def __init__(self, host, port):
+        SignClient.__init__(self, host, port)
+        self._reader = None
+        self._writer = None
+
+    ## \brief This coroutine connects to the displayserver.
+    #
+    #  \returns An int. A return value of 0 signifies a successfull connect.
+    #        
+    async def connect(self):
+        result = ERR_OK
+        try:
+            if not self._is_connected:
+                self._reader, self._writer = await asyncio.open_connection(self._host, self._port)
+                self._compression = tlvobject.TlvCompression()
+                await tlvasync.TlvAsyncStream.negotiate_client(self._reader, self._writer, self._compression)
+                self._pipeline = tlvasync.TlvAsyncPipeline(self._reader, self._writer, self._compression)
+                self._is_connected = True
+        except asyncio.CancelledError:
+            raise
+        except:
+            result = ERR_ERROR
+            if self._writer != None:
+                self._writer.close()
+                self._reader = None
+                self._writer = None
+                self._pipeline = None
+                self._is_connected = False 
+        
+        return result           
+
+    ## \brief This coroutine disconnects the client from the displayserver.
+    #
+    #  \returns Nothing.
+    #            
+    async def disconnect(self):
+        try:
+            if self._is_connected:
+                self._writer.close()
+                await self._writer.wait_closed()
+        finally:
+            self._reader = None
+            self._writer = None
+            self._pipeline = None
+            self._is_connected = False
+
+    ## \brief This coroutine allows to send a command to the server. Between begin_batch() and end_batch() the command is
+    #         not sent but collected for the batch.
+    #
+    #  \param [command] A string. It has to hold the command that is to be sent to the server.
+    #        
+    #  \param [parameters] A list of tlvobject.TlvEntry objects. These objects specify the parameters of the command.
+    #        
+    #  \returns An int. A return value of 0 signifies successfull execution of the command.
+    #            
+    async def make_call(self, command, parameters = []):
+        if self._batch != None:
+            self._batch.append((command, parameters))
+            return ERR_OK
+        
+        result = ERR_OK
+        parm_sequence = [displayschema.command_entry(command)] 
+        parm_sequence = parm_sequence + parameters
+         
+        try:
+            param = tlvobject.TlvEntry().to_sequence(parm_sequence)
+            result = await self._pipeline.call(param)
+        except asyncio.CancelledError:
+            raise
+        except:
+            result = ERR_ERROR
+        
+        return result
+
+    ## \brief This coroutine sends several commands to the server in a single message. See SignClient.make_batch_call().
+    #
+    #  \param [calls] A list of tuples (command, parameters). command is a string and parameters is a list of
+    #         tlvobject.TlvEntry objects.
+    #        
+    #  \returns A list of ints. It contains the result of each command in the order given by calls.
+    #            
+    async def make_batch_call(self, calls):
+        result = [ERR_ERROR] * len(calls)
+        batch_sequence = [tlvobject.TlvEntry().to_string('batch')]
+        
+        for command, parameters in calls:
+            batch_sequence.append(tlvobject.TlvEntry().to_sequence([displayschema.command_entry(command)] + parameters))
+         
+        try:
+            param = tlvobject.TlvEntry().to_sequence(batch_sequence)
+            answer = list(await self._pipeline.call(param))
+            
+            if len(answer) == len(calls):
+                result = answer
+        except asyncio.CancelledError:
+            raise
+        except:
+            result = [ERR_ERROR] * len(calls)
+        
+        return result
+
+    ## \brief This coroutine sends a command to the server without waiting for the answer.
+    #
+    #  \param [command] A string. It has to hold the command that is to be sent to the server.
+    #        
+    #  \param [parameters] A list of tlvobject.TlvEntry objects. These objects specify the parameters of the command.
+    #        
+    #  \returns An int. The request ID of the call or None if sending the command failed.
+    #            
+    async def begin_call(self, command, parameters = []):
+        result = None
+        parm_sequence = [displayschema.command_entry(command)] 
+        parm_sequence = parm_sequence + parameters
+         
+        try:
+            param = tlvobject.TlvEntry().to_sequence(parm_sequence)
+            result = await self._pipeline.submit(param)
+        except asyncio.CancelledError:
+            raise
+        except:
+            result = None
+        
+        return result
+
+    ## \brief This coroutine returns the result of a command that has been sent via begin_call().
+    #
+    #  \param [request_id] An int. The request ID returned by begin_call().
+    #        
+    #  \returns An int. A return value of 0 signifies successfull execution of the command.
+    #            
+    async def end_call(self, request_id):
+        result = ERR_OK
+         
+        try:
+            result = await self._pipeline.collect(request_id)
+        except asyncio.CancelledError:
+            raise
+        except:
+            result = ERR_ERROR
+        
+        return result
+
+    ## \brief This coroutine sends the stop command to the server and subsequently disconnects the client.
+    #
+    #  \returns An int. A return value of 0 signifies successfull execution of the command.
+    #                
+    async def make_stop(self):
+        result = await self.make_call(displayschema.STOP.name)
+        await self.disconnect()
+        return result
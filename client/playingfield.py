@@ -68,6 +68,11 @@ class PlayingField:
         self._sign_client = displayclient.SignClient(self._repo.config['host'], self._repo.config['port'])
         ## \brief An object of type questions.Question. It holds the question which is currently displayed by the displayserver.
         self._current_question = None
+        ## \brief A boolean. Is set to true while the countdown of the current question is paused.
+        self._countdown_paused = False
+        ## \brief A callable without parameters. Sends the commands which make the displayserver show what it currently
+        #         shows. Used to restore the display after the connection has been lost.
+        self._redisplay = self._sign_client.show_intro
         
         field_column = {20:None, 40:None, 60:None, 80:None, 100:None}
         
@@ -115,6 +120,14 @@ class PlayingField:
     def current_question(self):
         return self._current_question
 
+    ## \brief Returns whether the countdown of the current question is paused.
+    #
+    #  \returns A boolean.
+    #                
+    @property
+    def countdown_paused(self):
+        return self._countdown_paused
+
     ## \brief This method allows to deserialize the current state of the playing field from a file.
     #
     #  \param [file_name] A string. Has to contain the name of the file which contains a serialized state.
@@ -141,7 +154,7 @@ class PlayingField:
            #     answered by noone.
             
             self._field = restored_playing_field
-            self._current_question = None
+            self._leave_question(self.show)
         except:
             result = ERR_ERROR
         
@@ -216,12 +229,26 @@ class PlayingField:
         
         return result
 
+    ## \brief Resets the value of self._current_question to None and forgets whether its countdown is paused, e.g.
+    #         because the question has been answered or another message is displayed.
+    #
+    #  \param [redisplay] A callable without parameters. It instructs the displayserver to display again what replaces the
+    #         question. It is used by restore_display().
+    #
+    #  \returns Nothing.
+    #                                        
+    def _leave_question(self, redisplay):
+        self._current_question = None
+        # A paused countdown belongs to the question
+        self._countdown_paused = False
+        self._redisplay = redisplay
+
     ## \brief Instructs the displayserver to display the intro message and resets the value of self._current_question to None.
     #
     #  \returns An int. A return value of 0 indicates a successfull execution.
     #                                        
     def show_intro(self):
-        self._current_question = None
+        self._leave_question(self._sign_client.show_intro)
         return self._sign_client.show_intro()
 
     ## \brief Instructs the displayserver to display the "Thank you" message and resets the value of self._current_question to None.
@@ -229,7 +256,7 @@ class PlayingField:
     #  \returns An int. A return value of 0 indicates a successfull execution.
     #                                        
     def show_thanks(self):
-        self._current_question = None
+        self._leave_question(self._sign_client.show_thanks)
         return self._sign_client.show_thanks()
 
     ## \brief Instructs the displayserver to display final result message and resets the value of self._current_question to None.
@@ -237,7 +264,7 @@ class PlayingField:
     #  \returns An int. A return value of 0 indicates a successfull execution.
     #                                            
     def show_result(self):
-        self._current_question = None
+        self._leave_question(lambda: self._sign_client.show_result(self.calc_result()))
         res = self.calc_result()
         return self._sign_client.show_result(res)
 
@@ -246,7 +273,7 @@ class PlayingField:
     #  \returns An int. A return value of 0 indicates a successfull execution.
     #                                                
     def show(self):
-        self._current_question = None
+        self._leave_question(lambda: self._sign_client.show_playing_field(self._field))
         return self._sign_client.show_playing_field(self._field)
 
     ## \brief Records that a team has answered a question correctly. If the question has already been answered this method
@@ -263,7 +290,7 @@ class PlayingField:
     def answer_question(self, category, value, who_answered):
         if (self._field[category][value]['answeredby'] == None) and (who_answered not in self._field[category][value]['wronganswersby']):
             self._field[category][value]['answeredby'] = who_answered            
-            self._current_question = None
+            self._leave_question(self.show)
 
     ## \brief Resets the state of a question to its default value (no correct and no wrong answers).
     #
@@ -276,7 +303,7 @@ class PlayingField:
     def clear_question(self, category, value):
         self._field[category][value]['answeredby'] = None
         self._field[category][value]['wronganswersby'] = set()
-        self._current_question = None
+        self._leave_question(self.show)
 
     ## \brief Records that a team has given a wrong answer to a question. If the question has already been answered this method
     #         does nothing.
@@ -399,22 +426,90 @@ class PlayingField:
         
         self._current_question = question
         self._current_question.reset()
+        self._countdown_paused = False
+        self._redisplay = self.show_current_question
         
-        return self._sign_client.show_question(question.text, time)        
+        # The displayserver counts down the time on its own
+        if question.show_time:
+            result = self._sign_client.start_countdown(question.text, time)
+        else:
+            result = self._sign_client.show_question(question.text, time)
+        
+        return result
 
-    ## \brief This method decrements the number of seconds that remain to answer the current question and updates the display to
-    #         reflect the changed timer value.
+    ## \brief This method instructs the displayserver to show the current question with the time that is left. If the
+    #         countdown is paused it is paused on the displayserver as well.
     #
     #  \returns An int. A value of 0 indicates that displaying the question was successfull.
-    #                            
-    def decrement_question_time(self):
+    #                        
+    def show_current_question(self):
+        question = self._current_question
+        
+        if question.show_time:
+            result = self._sign_client.start_countdown(question.text, question.current_time)
+            
+            if (result == ERR_OK) and self._countdown_paused:
+                result = self._sign_client.pause_countdown()
+        else:
+            result = self._sign_client.show_question(question.text, -1)
+        
+        return result
+
+    ## \brief This method instructs the displayserver to show again what it has been showing, e.g. after the connection
+    #         has been reestablished. All necessary commands are sent in a single batch.
+    #
+    #  \returns An int. A value of 0 indicates that all commands have been successfull.
+    #                        
+    def restore_display(self):
         result = ERR_OK
+        self._sign_client.begin_batch()
+        
+        try:
+            self._redisplay()
+        finally:
+            codes = self._sign_client.end_batch()
         
+        for i in codes:
+            if i != ERR_OK:
+                result = ERR_ERROR
+        
+        return result
+
+    ## \brief This method decrements the number of seconds that remain to answer the current question. The displayserver
+    #         counts down the displayed time on its own. Therefore nothing is sent to the displayserver.
+    #
+    #  \returns An int. A value of 0 indicates success.
+    #                            
+    def decrement_question_time(self):
         # Check if there is a valid current question, that its timer value is positive and that a time value should be displayed
-        if (self._current_question != None) and (self._current_question.current_time > 0) and (self._current_question.show_time):
+        if (self._current_question != None) and (self._current_question.current_time > 0) and (self._current_question.show_time) and (not self._countdown_paused):
             self._current_question.current_time -= 1
-    
-            result = self._sign_client.show_question(self._current_question.text, self._current_question.current_time)
+        
+        return ERR_OK
+
+    ## \brief This method instructs the displayserver to pause the countdown of the current question.
+    #
+    #  \returns An int. A value of 0 indicates that pausing the countdown was successfull. Only then the countdown is
+    #           regarded as paused.
+    #                            
+    def pause_countdown(self):
+        result = self._sign_client.pause_countdown()
+        
+        if result == ERR_OK:
+            self._countdown_paused = True
+        
+        return result
+
+    ## \brief This method instructs the displayserver to resume the countdown of the current question.
+    #
+    #  \returns An int. A value of 0 indicates that resuming the countdown was successfull. Only then the countdown is
+    #           regarded as running again.
+    #                            
+    def resume_countdown(self):
+        result = self._sign_client.resume_countdown()
+        
+        if result == ERR_OK:
+            self._countdown_paused = False
         
         return result
 
@@ -0,0 +1,397 @@
+################################################################################
+# Copyright 2016 Martin Grap
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+## @package displayschema Contains the definitions of the messages that are exchanged by the client and the displayserver
+#
+# \file displayschema.py
+# \brief This file contains the definitions of the messages that are exchanged by the client and the displayserver of
+#        "Das grosse Quiz". The client uses them to encode commands and the server uses them to check and decode them.
+#
+import struct
+from tlvobject import TlvEntry, TlvException, TlvStream, TlvDecoder, HEADER_STRUCT, TAG_STRING, TAG_SEQUENCE, TAG_MAP
+
+## \brief The values of the questions in each category of the playing field
+QUESTION_VALUES = [20, 40, 60, 80, 100]
+
+
+## \brief A class that describes the type of a single parameter of a message.
+#
+class FieldType:
+    ## \brief Constructor.
+    #
+    #  \param [name] A string. Describes the type in error messages.
+    #
+    #  \param [encoder] A callable that receives a python3 value and returns a TlvEntry object.
+    #
+    #  \param [decoder] A callable that receives a value as returned by tlvobject.TlvDecoder and returns the value that
+    #         is handed to the server. It has to raise an exception if the value is malformed.
+    #
+    def __init__(self, name, encoder, decoder):
+        self.name = name
+        self.encoder = encoder
+        self.decoder = decoder
+
+
+## \brief A class that describes a message, i.e. a command and its parameters.
+#
+#  A message is sent as a TLV sequence which holds the command name as a TLV string followed by the parameters. The
+#  TLV object for the command name is created once and shared by all messages of the same type.
+#
+class MessageSchema:
+    ## \brief Constructor.
+    #
+    #  \param [name] A string. The name of the command.
+    #
+    #  \param [fields] A list of tuples (field_name, field_type). field_name is a string and field_type a FieldType object.
+    #
+    #  \param [draws] A boolean. Has to be True if the command draws into the background of the server.
+    #
+    def __init__(self, name, fields, draws):
+        ## \brief A string. The name of the command.
+        self.name = name
+        ## \brief A list of strings. The names of the parameters.
+        self.field_names = [i[0] for i in fields]
+        ## \brief A boolean. True if the command draws into the background of the server.
+        self.draws = draws
+        ## \brief A TlvEntry object. Holds the encoded command name.
+        self._name_entry = TlvEntry().to_string(name)
+        ## \brief A list of callables. The encoders of the parameters in the order of the fields.
+        self._encoders = [i[1].encoder for i in fields]
+        ## \brief A list of callables. The decoders of the parameters in the order of the fields.
+        self._decoders = [i[1].decoder for i in fields]
+        ## \brief An integer. Number of elements of an encoded message including the command name.
+        self._num_elements = len(fields) + 1
+
+    ## \brief This property returns the TLV string that holds the command name.
+    #
+    #  \returns A TlvEntry object. It must not be modified.
+    #
+    @property
+    def name_entry(self):
+        return self._name_entry
+
+    ## \brief This method encodes the parameters of a message.
+    #
+    #  \param [args] The parameters of the message in the order of the fields.
+    #
+    #  \returns A list of TlvEntry objects. It does not contain the command name. A TlvException is raised if the
+    #           number of parameters is wrong.
+    #
+    def encode_params(self, *args):
+        if len(args) != len(self._encoders):
+            raise TlvException('Wrong number of parameters for ' + self.name)
+
+        return [encoder(arg) for encoder, arg in zip(self._encoders, args)]
+
+    ## \brief This method encodes a whole message.
+    #
+    #  \param [args] The parameters of the message in the order of the fields.
+    #
+    #  \returns A TlvEntry object. A TLV sequence that holds the command name and the parameters.
+    #
+    def encode(self, *args):
+        return TlvEntry().to_sequence([self._name_entry] + self.encode_params(*args))
+
+    ## \brief This method checks and decodes a message that has been decoded by tlvobject.TlvDecoder.
+    #
+    #  \param [params] A list. Its first element is the command name, the others are the parameters.
+    #
+    #  \returns A list that holds the decoded parameters in the order of the fields. A TlvException is raised if the
+    #           number of parameters is wrong or a parameter is malformed.
+    #
+    def decode(self, params):
+        if len(params) != self._num_elements:
+            raise TlvException('Wrong number of parameters for ' + self.name)
+
+        try:
+            return [decoder(arg) for decoder, arg in zip(self._decoders, params[1:])]
+        except TlvException:
+            raise
+        except:
+            raise TlvException('Malformed parameter for ' + self.name)
+
+
+## \brief This function checks that a value is of a given type.
+#
+#  \param [value] The value to check.
+#
+#  \param [expected_type] A type.
+#
+#  \returns value. A TlvException is raised if value is not of type expected_type.
+#
+def check_type(value, expected_type):
+    if (not isinstance(value, expected_type)) or isinstance(value, bool):
+        raise TlvException('Wrong parameter type')
+
+    return value
+
+
+## \brief This function encodes the result of the game.
+#
+#  \param [result_dict] A dictionary. It maps the team name (a string) to the number of points this team has earned.
+#
+#  \returns A TlvEntry object. A TLV map from team name to a varint.
+#
+def encode_result(result_dict):
+    return TlvEntry().to_map([(TlvEntry().to_string(k), TlvEntry().to_varint(v)) for k, v in result_dict.items()])
+
+
+## \brief This function checks the result of the game sent by the client.
+#
+#  \param [result_dict] A dictionary as created by encode_result().
+#
+#  \returns result_dict. A TlvException is raised if result_dict is malformed.
+#
+def decode_result(result_dict):
+    check_type(result_dict, dict)
+
+    for i in result_dict:
+        check_type(i, str)
+        check_type(result_dict[i], int)
+
+    return result_dict
+
+
+## \brief This function encodes the playing field data structure in a compact form. The outer dictionary becomes a TLV
+#         map from category name to a sequence of five cells which are ordered as QUESTION_VALUES. Each cell is a sequence
+#         which holds the 'answeredby' value (a string or NULL) and the 'wronganswersby' set. The contents bytes of the
+#         map are sent as a TLV byte array. The generic decoder of the server does not look into a byte array, so that
+#         decode_playing_field() can parse the map in a single pass.
+#
+#  \param [field_data] A dictionary. It maps the category names and question values (20, 40, 60, ...) to a result dictionary.
+#
+#  \returns A TlvEntry object.
+#
+def encode_playing_field(field_data):
+    categories = []
+
+    for i in field_data:
+        cells = []
+
+        for j in QUESTION_VALUES:
+            answered_by = TlvEntry().to_value(field_data[i][j]['answeredby'])
+            wrong_answers_by = TlvEntry().to_value(field_data[i][j]['wronganswersby'])
+            cells.append(TlvEntry().to_sequence([answered_by, wrong_answers_by]))
+
+        categories.append((TlvEntry().to_string(i), TlvEntry().to_sequence(cells)))
+
+    return TlvEntry().to_byte_array(TlvEntry().to_map(categories).value)
+
+
+## \brief Maximum number of categories held by CATEGORY_CACHE
+CATEGORY_CACHE_MAX = 1024
+## \brief A dictionary. Maps the encoded cells of a category to a tuple of cells as returned by decode_cells(). During
+#         a game a category only takes a few different states, so that it is only decoded when it has changed.
+CATEGORY_CACHE = {}
+
+
+## \brief This function transforms the compact representation of the playing field created by encode_playing_field()
+#         back into the dictionary used by the server.
+#
+#  \param [encoded_field] A memoryview or a byte array. The contents bytes of the TLV map. A dictionary as sent by
+#         older clients, which send the TLV map itself, is accepted as well.
+#
+#  \returns A dictionary of dictionaries as described in Processor.show_playing_field() of the server. A TlvException
+#           is raised if encoded_field is malformed.
+#
+def decode_playing_field(encoded_field):
+    result = None
+
+    if isinstance(encoded_field, dict):
+        encoded_map = encoded_field
+    else:
+        encoded_map = bytes(check_type(encoded_field, (bytes, memoryview)))
+        result = decode_field_bytes(encoded_map)
+
+    if result == None:
+        if not isinstance(encoded_map, dict):
+            encoded_map = TlvDecoder.decode(TAG_MAP, encoded_map)
+
+        result = decode_field_map(encoded_map)
+
+    return result
+
+
+## \brief This function decodes the contents bytes of the TLV map created by encode_playing_field() in a single pass.
+#
+#  Only the headers of the category names and of the sequences of cells are read. The cells of a category are looked
+#  up in CATEGORY_CACHE by their encoded bytes and are only decoded if they have not been seen before.
+#
+#  \param [encoded_map] A byte array. The contents bytes of the TLV map.
+#
+#  \returns A dictionary as described in decode_playing_field() or None if encoded_map does not have the expected
+#           shape, e.g. because it uses long headers. In that case the map has to be decoded by the generic decoder.
+#           A TlvException is raised if a cell is malformed.
+#
+def decode_field_bytes(encoded_map):
+    result = {}
+    cache = CATEGORY_CACHE
+    unpack = HEADER_STRUCT.unpack_from
+    header_len = TlvStream.HEADER_LEN
+    pos = 0
+    end = len(encoded_map)
+
+    try:
+        while pos < end:
+            key_tag, key_len = unpack(encoded_map, pos)
+            key_start = pos + header_len
+            key_end = key_start + key_len
+            value_tag, value_len = unpack(encoded_map, key_end)
+            pos = key_end + header_len
+            value_end = pos + value_len
+
+            if (key_tag != TAG_STRING) or (value_tag != TAG_SEQUENCE) or (value_end > end):
+                result = None
+                break
+
+            encoded_cells = encoded_map[pos:value_end]
+            cells = cache.get(encoded_cells)
+
+            if cells == None:
+                cells = decode_cells(TlvDecoder.decode(TAG_SEQUENCE, encoded_cells))
+
+                if len(cache) >= CATEGORY_CACHE_MAX:
+                    cache.clear()
+
+                cache[encoded_cells] = cells
+
+            category = {}
+
+            for j, cell in zip(QUESTION_VALUES, cells):
+                category[j] = {'answeredby':cell[0], 'wronganswersby':set(cell[1])}
+
+            result[encoded_map[key_start:key_end].decode('utf-8')] = category
+            pos = value_end
+    except (struct.error, UnicodeDecodeError):
+        # Truncated header or invalid category name. The generic decoder reports the error.
+        result = None
+
+    return result
+
+
+## \brief This function checks a playing field that has been decoded by the generic decoder.
+#
+#  \param [encoded_map] A dictionary. It maps each category name to a sequence of five cells.
+#
+#  \returns A dictionary as described in decode_playing_field(). A TlvException is raised if encoded_map is malformed.
+#
+def decode_field_map(encoded_map):
+    result = {}
+
+    for i in check_type(encoded_map, dict):
+        if not isinstance(i, str):
+            raise TlvException('Malformed playing field')
+
+        result[i] = {}
+
+        for j, cell in zip(QUESTION_VALUES, decode_cells(encoded_map[i])):
+            result[i][j] = {'answeredby':cell[0], 'wronganswersby':set(cell[1])}
+
+    return result
+
+
+## \brief This function checks the cells of a category as created by encode_playing_field().
+#
+#  \param [cells] A list of cells as described in decode_cell(). It has to contain one cell for each of the
+#         QUESTION_VALUES.
+#
+#  \returns A tuple of cells as returned by decode_cell(). A TlvException is raised if cells is malformed.
+#
+def decode_cells(cells):
+    if (not isinstance(cells, list)) or (len(cells) != len(QUESTION_VALUES)):
+        raise TlvException('Malformed playing field')
+
+    return tuple(decode_cell(i) for i in cells)
+
+
+## \brief This function checks a single cell of the playing field as created by encode_playing_field().
+#
+#  \param [cell] A list [answered_by, wrong_answers_by]. answered_by is a string or None and wrong_answers_by a set
+#         or a list of strings.
+#
+#  \returns A tuple (answered_by, wrong_answers_by). wrong_answers_by is a frozenset. A TlvException is raised if
+#           cell is malformed.
+#
+def decode_cell(cell):
+    if (not isinstance(cell, list)) or (len(cell) != 2):
+        raise TlvException('Malformed playing field')
+
+    if (cell[0] != None) and (not isinstance(cell[0], str)):
+        raise TlvException('Malformed playing field')
+
+    if not isinstance(cell[1], (set, list)):
+        raise TlvException('Malformed playing field')
+
+    for i in cell[1]:
+        if not isinstance(i, str):
+            raise TlvException('Malformed playing field')
+
+    return (cell[0], frozenset(cell[1]))
+
+
+## \brief Type of a parameter that holds a string
+STRING = FieldType('string', lambda x: TlvEntry().to_string(x), lambda x: check_type(x, str))
+## \brief Type of a parameter that holds a signed integer which is sent as varint. Integers sent by older clients
+#         are accepted as well.
+INT = FieldType('int', lambda x: TlvEntry().to_varint(x), lambda x: check_type(x, int))
+## \brief Type of a parameter that holds the result of the game
+RESULT = FieldType('result', encode_result, decode_result)
+## \brief Type of a parameter that holds the playing field
+PLAYING_FIELD = FieldType('playing field', encode_playing_field, decode_playing_field)
+
+## \brief Stops the server
+STOP = MessageSchema('stop', [], False)
+## \brief Displays a question and the time that is left for answering it. A negative time is not displayed.
+SHOW_QUESTION = MessageSchema('showquestion', [('question', STRING), ('time', INT)], True)
+## \brief Displays the intro message
+SHOW_INTRO = MessageSchema('showintro', [], True)
+## \brief Displays the "Thank you" message
+SHOW_THANKS = MessageSchema('danksagung', [], True)
+## \brief Displays the final result of the game
+SHOW_RESULT = MessageSchema('showresult', [('result', RESULT)], True)
+## \brief Displays the playing field
+SHOW_PLAYING_FIELD = MessageSchema('showplayingfield', [('playing_field', PLAYING_FIELD)], True)
+
+## \brief Displays a question and lets the server count down the time that is left for answering it. The time is
+#         given in seconds from the moment the server receives the command.
+START_COUNTDOWN = MessageSchema('startcountdown', [('question', STRING), ('time', INT)], True)
+## \brief Pauses the countdown of the question that is shown
+PAUSE_COUNTDOWN = MessageSchema('pausecountdown', [], False)
+## \brief Resumes a paused countdown
+RESUME_COUNTDOWN = MessageSchema('resumecountdown', [], False)
+## \brief Stops the countdown. The time that is left remains on the screen.
+STOP_COUNTDOWN = MessageSchema('stopcountdown', [], False)
+
+## \brief Maps the name of each command to its MessageSchema
+MESSAGES = {i.name: i for i in [STOP, SHOW_QUESTION, SHOW_INTRO, SHOW_THANKS, SHOW_RESULT, SHOW_PLAYING_FIELD,
+                                START_COUNTDOWN, PAUSE_COUNTDOWN, RESUME_COUNTDOWN, STOP_COUNTDOWN]}
+
+
+## \brief This function returns the TLV string that holds a command name.
+#
+#  \param [command] A string. The name of the command.
+#
+#  \returns A TlvEntry object. For known commands the precomputed object of the MessageSchema is returned.
+#
+def command_entry(command):
+    schema = MESSAGES.get(command)
+
+    if schema != None:
+        result = schema.name_entry
+    else:
+        result = TlvEntry().to_string(command)
+
+    return result
@@ -0,0 +1,305 @@
+################################################################################
+# Copyright 2016 Martin Grap
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+## @package tlvasync Contains classes that send and receive TLV encoded data structures via asyncio streams
+#
+# \file tlvasync.py
+# \brief This file contains classes that send and receive TLV encoded data structures via asyncio streams. The
+#        framing is the same as the one used by tlvobject.TlvStream.
+#
+import asyncio
+import tlvobject
+from tlvobject import TlvEntry, TlvResult, TlvException, TlvCompression, TlvStream
+
+
+## \brief A class that binds together a collection of static coroutines that deal with sending and receiving TLV
+#         encoded objects via asyncio.StreamReader and asyncio.StreamWriter objects.
+#
+class TlvAsyncStream:
+    ## \brief This coroutine performs a transaction with the server
+    #
+    #  \param [reader] Is an asyncio.StreamReader object.
+    #
+    #  \param [writer] Is an asyncio.StreamWriter object.
+    #
+    #  \param [tlv_param] A TlvEntry object that specifies the parameter to use in the call
+    #
+    #  \param [compression] Is a TlvCompression object or None. It holds the compression settings of the connection.
+    #
+    #  \returns A sequence of objects that depends on the values returned by the server.
+    #
+    @staticmethod
+    async def transact_client(reader, writer, tlv_param, compression = None):
+        if await TlvAsyncStream.write_tlv(writer, tlv_param, compression) != tlvobject.ERR_OK:
+            raise TlvException('Sending data failed')
+
+        res = await TlvAsyncStream.read_tlv(reader, compression)
+
+        if res.err_code != tlvobject.ERR_OK:
+            raise TlvException('Receiving data failed')
+
+        return res.data.tlv_convert()
+
+    ## \brief This coroutine performs a transaction with a client. It behaves like TlvStream.transact_server.
+    #
+    #  \param [reader] Is an asyncio.StreamReader object.
+    #
+    #  \param [writer] Is an asyncio.StreamWriter object.
+    #
+    #  \param [processor] Is a callable thing that has a process method that receives a TlvEntry object
+    #         and returns a TlvEntry object.
+    #
+    #  \param [compression] Is a TlvCompression object or None. It holds the compression settings of the connection.
+    #         If it is None the server refuses to compress its answers.
+    #
+    #  \returns An integer specifying an error code. A TlvException is raised if no request could be read.
+    #
+    @staticmethod
+    async def transact_server(reader, writer, processor, compression = None):
+        result = tlvobject.ERR_OK
+        res = await TlvAsyncStream.read_tlv(reader, compression)
+
+        if res.err_code != tlvobject.ERR_OK:
+            raise TlvException('Error receiving data from client')
+
+        try:
+            tlv_for_client = TlvStream.answer_request(res.data, processor, compression)
+            result = await TlvAsyncStream.write_tlv(writer, tlv_for_client, compression)
+        except asyncio.CancelledError:
+            raise
+        except:
+            result = tlvobject.ERR_ERROR
+
+        return result
+
+    ## \brief This coroutine agrees with the server on the compression codec that is used on a connection. It behaves
+    #         like TlvStream.negotiate_client.
+    #
+    #  \param [reader] Is an asyncio.StreamReader object.
+    #
+    #  \param [writer] Is an asyncio.StreamWriter object.
+    #
+    #  \param [compression] Is a TlvCompression object. Its codec is set to the codec chosen by the server.
+    #
+    #  \returns A string or None. The name of the chosen codec or None if no compression is used.
+    #
+    @staticmethod
+    async def negotiate_client(reader, writer, compression):
+        offer = TlvEntry().to_sequence([TlvEntry().to_string(i) for i in TlvCompression.available_codecs()])
+        offer.tag = tlvobject.TAG_NEGOTIATE
+        compression.codec = None
+
+        if await TlvAsyncStream.write_tlv(writer, offer) != tlvobject.ERR_OK:
+            raise TlvException('Sending data failed')
+
+        res = await TlvAsyncStream.read_tlv(reader)
+
+        if res.err_code != tlvobject.ERR_OK:
+            raise TlvException('Receiving data failed')
+
+        if res.data.tag == tlvobject.TAG_NEGOTIATE:
+            res.data.tag = tlvobject.TAG_SEQUENCE
+            chosen = res.data.tlv_convert()
+
+            if len(chosen) > 0:
+                compression.codec = TlvCompression.codec_id(chosen[0])
+
+        return compression.codec_name
+
+    ## \brief This coroutine reads a single TlvEntry object from a stream. Classic as well as long headers are accepted.
+    #
+    #  \param [reader] Is an asyncio.StreamReader object.
+    #
+    #  \param [compression] Is a TlvCompression object or None. Compressed objects are always decompressed. If
+    #         this parameter is not None the decompression is recorded in its statistics.
+    #
+    #  \returns A TlvResult object. In case of success the data member contains the TlvEntry object read from
+    #           the stream. If the object has more than READ_LEN_MAX contents bytes the error code ERR_DATA_LEN is
+    #           returned and the contents bytes are not read.
+    #
+    @staticmethod
+    async def read_tlv(reader, compression = None):
+        result = TlvResult(tlvobject.ERR_OK, TlvEntry())
+
+        try:
+            header = await reader.readexactly(TlvStream.HEADER_LEN)
+
+            if header[0] & tlvobject.TAG_FLAG_LONG:
+                header += await reader.readexactly(TlvStream.LONG_HEADER_LEN - TlvStream.HEADER_LEN)
+                tag, data_len = tlvobject.LONG_HEADER_STRUCT.unpack(header)
+                tag = tag & ~tlvobject.TAG_FLAG_LONG
+            else:
+                tag, data_len = tlvobject.HEADER_STRUCT.unpack(header)
+
+            if data_len > tlvobject.READ_LEN_MAX:
+                result.err_code = tlvobject.ERR_DATA_LEN
+            else:
+                result.data.tag = tag
+                result.data.value = await reader.readexactly(data_len)
+        except asyncio.CancelledError:
+            raise
+        except:
+            result.err_code = tlvobject.ERR_SOCK_READ
+
+        if (result.err_code == tlvobject.ERR_OK) and (result.data.tag & tlvobject.TAG_FLAG_COMPRESSED):
+            if compression == None:
+                compression = TlvCompression()
+
+            result.data.tag = result.data.tag & tlvobject.TAG_MASK
+
+            try:
+                result.data.value = compression.decompress(result.data.value)
+            except:
+                result.err_code = tlvobject.ERR_DATA_LEN
+
+        return result
+
+    ## \brief This coroutine writes a single TlvEntry object to a stream. It does not return until the data has been
+    #         handed over to the transport and the write buffer has been drained below its high water mark.
+    #
+    #  As the encoded object is passed to the transport in a single call objects written by different tasks are never
+    #  interleaved.
+    #
+    #  \param [writer] Is an asyncio.StreamWriter object.
+    #
+    #  \param [tlv_object] Is a TlvEntry object. This object is encoded and sent through the stream.
+    #
+    #  \param [compression] Is a TlvCompression object or None. If it is not None and a codec has been negotiated the
+    #         object is compressed if it is large enough and compression actually reduces its size.
+    #
+    #  \returns An integer. This integer represents an error code. A value of ERR_OK signifies successfull completion
+    #           of the send operation.
+    #
+    @staticmethod
+    async def write_tlv(writer, tlv_object, compression = None):
+        result = tlvobject.ERR_OK
+
+        if tlv_object.content_length() <= tlvobject.LONG_LEN_MAX:
+            try:
+                writer.write(TlvStream.encode_frame(tlv_object, compression))
+                await writer.drain()
+            except asyncio.CancelledError:
+                raise
+            except:
+                result = tlvobject.ERR_SOCK_WRITE
+        else:
+            result = tlvobject.ERR_DATA_LEN
+
+        return result
+
+
+## \brief A class that allows several tasks to have requests in flight on the same connection. It is the asyncio
+#         counterpart of tlvobject.TlvPipeline.
+#
+#  Each request is tagged with a request ID. Whichever task waits for an answer reads the next answer from the stream
+#  and stores it until the task that has sent the corresponding request collects it.
+#
+class TlvAsyncPipeline:
+    ## \brief Constructor.
+    #
+    #  \param [reader] Is an asyncio.StreamReader object.
+    #
+    #  \param [writer] Is an asyncio.StreamWriter object.
+    #
+    #  \param [compression] Is a TlvCompression object or None. It holds the compression settings of the connection.
+    #
+    def __init__(self, reader, writer, compression = None):
+        ## \brief An asyncio.StreamReader object. Used to receive the answers of the server.
+        self._reader = reader
+        ## \brief An asyncio.StreamWriter object. Used to send requests to the server.
+        self._writer = writer
+        ## \brief A TlvCompression object or None. Holds the compression settings of the connection.
+        self._compression = compression
+        ## \brief An integer. The request ID used for the next request.
+        self._next_id = 1
+        ## \brief A set of integers. Contains the IDs of all requests that have not been collected yet.
+        self._in_flight = set()
+        ## \brief A dictionary. Maps the IDs of requests that have been answered but not collected to the answer.
+        self._answers = {}
+        ## \brief An asyncio.Lock. Makes sure that only one task at a time reads from the stream.
+        self._read_lock = asyncio.Lock()
+
+    ## \brief This property returns the number of requests that have not been collected yet.
+    #
+    #  \returns An integer.
+    #
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    ## \brief This coroutine sends a request to the server without waiting for the answer.
+    #
+    #  \param [tlv_param] A TlvEntry object that specifies the parameter to use in the call.
+    #
+    #  \returns An integer. The request ID which has to be used to collect the answer.
+    #
+    async def submit(self, tlv_param):
+        request_id = self._next_id
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        # Register the request before yielding to other tasks as the answer may be read by one of them
+        self._in_flight.add(request_id)
+
+        if await TlvAsyncStream.write_tlv(self._writer, TlvEntry().to_correlated(request_id, tlv_param), self._compression) != tlvobject.ERR_OK:
+            self._in_flight.discard(request_id)
+            raise TlvException('Sending data failed')
+
+        return request_id
+
+    ## \brief This coroutine receives a single answer from the server and stores it until it is collected.
+    #
+    #  \returns Nothing.
+    #
+    async def _receive(self):
+        res = await TlvAsyncStream.read_tlv(self._reader, self._compression)
+
+        if res.err_code != tlvobject.ERR_OK:
+            raise TlvException('Receiving data failed')
+
+        answer_id, answer = res.data.split_correlated()
+
+        if (answer_id not in self._in_flight) or (answer_id in self._answers):
+            raise TlvException('Unexpected request ID')
+
+        self._answers[answer_id] = answer.tlv_convert()
+
+    ## \brief This coroutine returns the answer to a request. It does not return until the answer has been received.
+    #
+    #  \param [request_id] An integer. The request ID returned by submit().
+    #
+    #  \returns A sequence of objects that depends on the values returned by the server.
+    #
+    async def collect(self, request_id):
+        if request_id not in self._in_flight:
+            raise TlvException('Unknown request ID')
+
+        while request_id not in self._answers:
+            async with self._read_lock:
+                # Another task may have received the answer while this task was waiting for the lock
+                if request_id not in self._answers:
+                    await self._receive()
+
+        self._in_flight.remove(request_id)
+
+        return self._answers.pop(request_id)
+
+    ## \brief This coroutine sends a request and returns the answer of the server.
+    #
+    #  \param [tlv_param] A TlvEntry object that specifies the parameter to use in the call.
+    #
+    #  \returns A sequence of objects that depends on the values returned by the server.
+    #
+    async def call(self, tlv_param):
+        return await self.collect(await self.submit(tlv_param))
@@ -0,0 +1,1696 @@
+################################################################################
+# Copyright 2016 Martin Grap
+# 
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+## @package tlvobject Contains classes that implement handing of Tag Length Value encoded data structures
+#   
+# \file tlvobject.py
+# \brief This file contains classes that implement handing of Tag Length Value encoded data structures.
+#
+import socket
+import struct
+import collections.abc
+import time
+import zlib
+import os
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+## \brief Maximum number of bytes to read from a socket in one go
+BUF_SIZE = 4096
+## \brief Maximum length of the contents of a TLV object that is encoded with the classic three byte header
+LEN_MAX = 0xFFFF
+## \brief Maximum length of the contents of a TLV object that is encoded with the long five byte header
+LONG_LEN_MAX = 0xFFFFFFFF
+## \brief Maximum length of the contents of a TLV object that TlvStream.read_tlv reads into memory. Larger
+#         objects have to be read in chunks via TlvStream.read_tlv_header and TlvStream.read_chunks.
+READ_LEN_MAX = 16 * 1024 * 1024
+## \brief Maximum number of bytes returned by TlvStream.read_chunks in one go
+CHUNK_SIZE = 65536
+## \brief Default minimum number of contents bytes a TLV object must have before it is compressed
+COMPRESSION_THRESHOLD = 256
+## \brief Compression level used for zlib
+ZLIB_LEVEL = 6
+
+## \brief Layout of the classic header of an encoded TLV object: One tag byte followed by two length bytes in big endian order
+HEADER_STRUCT = struct.Struct('>BH')
+## \brief Layout of the long header of an encoded TLV object: One tag byte (with TAG_FLAG_LONG set) followed by four length
+#         bytes in big endian order
+LONG_HEADER_STRUCT = struct.Struct('>BI')
+## \brief Layout of the contents bytes of a TLV binary double
+DOUBLE_STRUCT = struct.Struct('>d')
+## \brief Precompiled struct used to decode the contents bytes of TAG_INT objects
+INT_STRUCT = struct.Struct('>i')
+## \brief Precompiled struct used to decode the contents bytes of TAG_RESULT_CODE objects
+RESULT_STRUCT = struct.Struct('>I')
+
+# Error codes
+ERR_OK = 0
+ERR_SOCK_CREATE = 1
+SOCK_ERR_BIND = 2
+SOCK_ERR_ACCEPT = 3
+ERR_REMOVE_PATH = 4
+ERR_SOCK_READ = 5
+ERR_SOCK_WRITE = 6
+ERR_SOCK_PATH_LEN = 7
+ERR_DATA_LEN = 8
+ERR_ERROR = 42
+
+## \brief A TLV integer is a 32 bit signed integer
+TAG_INT = 0
+## \brief A TLV string is a UTF-8 encoded string
+TAG_STRING = 1
+## \brief A TLV byte array contains arbitrary binary data as an array of bytes
+TAG_BYTE_ARRAY = 2
+## \brief A TLV sequence is a container for other TLV objects
+TAG_SEQUENCE = 3
+## \brief A TLV double is a floating point number which is encoded as a string. This format is only accepted for
+#         compatibility reasons. TlvEntry.to_double creates TAG_DOUBLE_BINARY objects.
+TAG_DOUBLE = 4
+## \brief A TLV NULL object is an empty object that has no contents bytes
+TAG_NULL = 5
+## \brief A TLV result code is a 32 bit unsigned integer
+TAG_RESULT_CODE = 6
+## \brief A TLV correlated object is a container for a TLV result code holding a request ID and another TLV object. It
+#         is used to match the answers of the server to the requests of a client.
+TAG_CORRELATED = 7
+## \brief A TLV binary double is a floating point number in IEEE-754 double precision format (8 bytes, big endian)
+TAG_DOUBLE_BINARY = 8
+## \brief A TLV map is a container for pairs of TLV objects. The key and the value of each pair are stored one after the other.
+TAG_MAP = 9
+## \brief A TLV set is a container for TLV objects which represent distinct values
+TAG_SET = 10
+## \brief A TLV negotiation object is a container for TLV strings which name compression codecs. The client offers the
+#         codecs it supports and the server answers with the codec it has chosen.
+TAG_NEGOTIATE = 11
+## \brief A TLV varint is a signed 64 bit integer. It is zigzag encoded, i.e. small absolute values are mapped to small
+#         unsigned values, and then stored in groups of seven bits, least significant group first. The highest bit of
+#         each byte is set if another byte follows. Values between -64 and 63 take a single byte.
+TAG_VARINT = 12
+
+## \brief If this bit is set in the first header byte the tag is followed by four instead of two length bytes. It is
+#         only used for objects that have more than LEN_MAX contents bytes. Therefore peers which do not know about
+#         long headers can still talk to us as long as they do not exchange objects of this size.
+TAG_FLAG_LONG = 0x80
+## \brief If this bit is set in the first header byte the contents bytes are compressed. The first contents byte
+#         then identifies the codec (see COMPRESSION_ZLIB and COMPRESSION_LZ4) and is followed by the compressed form of
+#         the original contents bytes. Only objects sent via TlvStream.write_tlv to a peer which has agreed to
+#         use compression are compressed.
+TAG_FLAG_COMPRESSED = 0x40
+## \brief Mask that extracts the tag from the first header byte
+TAG_MASK = 0x3F
+
+## \brief Smallest value that can be represented by a TLV integer
+INT_MIN = -(1 << 31)
+## \brief Largest value that can be represented by a TLV integer
+INT_MAX = (1 << 31) - 1
+## \brief Smallest value that can be represented by a TLV varint
+VARINT_MIN = -(1 << 63)
+## \brief Largest value that can be represented by a TLV varint
+VARINT_MAX = (1 << 63) - 1
+## \brief Maximum number of contents bytes of a TLV varint
+VARINT_LEN_MAX = 10
+
+## \brief Codec ID of zlib compression
+COMPRESSION_ZLIB = 1
+## \brief Codec ID of LZ4 frame compression. This codec is only available if the lz4 package is installed.
+COMPRESSION_LZ4 = 2
+
+
+## \brief An excpetion class that is used for constructing exception objects in this module. 
+#
+class TlvException(Exception):
+    ## \brief An excpetion class that is used for constructing exception objects in this module. 
+    #
+    #  \param [error_message] Is a string. It has to contain an error message that is to be conveyed to 
+    #         receiver of the corresponding exception.
+    #
+    def __init__(self, error_message):
+        Exception.__init__(self, 'tlvobject: ' + error_message)
+
+
+## \brief A class that implements the concept of a TLV (Tag Length Value) encoded data object.
+#
+#  The encoded form of a TLV object starts with a single byte (the tag) that specifies the type of the
+#  data that it contains. The tag is followed by two length bytes which specify the length of the following
+#  contents bytes. Objects of this type are used to talk to the C++ side of the TLV infrastructure.
+#
+class TlvEntry:
+    # Many TlvEntry objects are created while encoding and parsing. Slots make them smaller and faster to create.
+    __slots__ = ('tag', 'value')
+
+    ## \brief Constructor. 
+    #
+    #  The default tag is TAG_NULL and therefore there are no contens bytes.
+    #
+    def __init__(self):
+        ## \brief Holds the tag of the value currently represented by this TlvEntry instance.
+        self.tag = TAG_NULL
+        ## \brief Holds the contents bytes of the value currently represented by this TlvEntry instance.        
+        self.value = bytes()
+
+    ## \brief This method returns the number of contents bytes of this TlvEntry instance.
+    #
+    #  \returns An integer.
+    #
+    def content_length(self):
+        return len(self.value)
+
+    ## \brief This method transforms a signed integer into a array of four bytes that represent the 
+    #         the integer in two's complement form. Big endian byte ordering is used.
+    #
+    #  \param [val] Is an integer. It contains the value that is to be transformed
+    #
+    #  \returns A byte array that represents the vlaue specified in parameter val. A TlvException is raised if val
+    #           does not fit into 32 bits.
+    #
+    @staticmethod        
+    def int_to_bytes(val):
+        if (val < INT_MIN) or (val > INT_MAX):
+            raise TlvException('Value out of range')
+        
+        if val < 0:
+            val = -val
+            val = val ^ 0xFFFFFFFF
+            val = val + 1
+        
+        return val.to_bytes(4, byteorder='big')
+
+    ## \brief This method sets this TlvEntry instance up to represent a signed integer.
+    #
+    #  \param [int_val] Is an integer. It contains the value that is to be represented.
+    #
+    #  \returns self.
+    #    
+    def to_int(self, int_val):
+        self.tag = TAG_INT
+        self.value = TlvEntry.int_to_bytes(int_val)
+        return self
+
+    ## \brief This method transforms a signed integer into its varint encoding. See TAG_VARINT.
+    #
+    #  \param [val] Is an integer. It contains the value that is to be transformed
+    #
+    #  \returns A byte array of one to VARINT_LEN_MAX bytes. A TlvException is raised if val does not fit into 64 bits.
+    #
+    @staticmethod        
+    def varint_to_bytes(val):
+        if (val < VARINT_MIN) or (val > VARINT_MAX):
+            raise TlvException('Value out of range')
+        
+        # Zigzag encoding: 0, -1, 1, -2, 2, ... is mapped to 0, 1, 2, 3, 4, ...
+        val = (val << 1) ^ (val >> 63)
+        result = bytearray()
+        
+        while val > 0x7F:
+            result.append((val & 0x7F) | 0x80)
+            val = val >> 7
+        
+        result.append(val)
+        
+        return bytes(result)
+
+    ## \brief This method sets this TlvEntry instance up to represent a signed integer in the compact varint format.
+    #
+    #  \param [int_val] Is an integer. It contains the value that is to be represented.
+    #
+    #  \returns self.
+    #    
+    def to_varint(self, int_val):
+        self.tag = TAG_VARINT
+        self.value = TlvEntry.varint_to_bytes(int_val)
+        return self
+
+    ## \brief This method sets this TlvEntry instance up to represent an unsigned integer.
+    #
+    #  \param [result_val] Is an integer. It contains the value that is to be represented.
+    #
+    #  \returns self.
+    #    
+    def to_result(self, result_val):
+        self.tag = TAG_RESULT_CODE
+        result_val = result_val & 0xFFFFFFFF
+        self.value = result_val.to_bytes(4, byteorder='big')
+        return self
+
+    ## \brief This method sets this TlvEntry instance up to represent a string.
+    #
+    #  \param [str_val] Is a string. It contains the value that is to be represented.
+    #
+    #  \returns self.
+    #        
+    def to_string(self, str_val):
+        self.tag = TAG_STRING
+        self.value = str_val.encode()
+        return self
+
+    ## \brief This method sets this TlvEntry instance up to represent a NULL object.
+    #
+    #  \returns self.
+    #            
+    def to_null(self):
+        self.tag = TAG_NULL
+        self.value = b''
+        return self
+
+    ## \brief This method sets this TlvEntry instance up to represent a sequence of TlvEntry objects.
+    #
+    #  \param [obj_sequence] Is a sequence of TlvEntry objects. It contains the values that are to be represented.
+    #
+    #  \returns self.
+    #            
+    def to_sequence(self, obj_sequence):
+        self.tag = TAG_SEQUENCE
+        self.value = TlvStream.to_bytes(obj_sequence)
+        return self
+
+    ## \brief This method sets this TlvEntry instance up to represent a TLV object that is tagged with a request ID.
+    #
+    #  \param [request_id] Is an integer. It contains the request ID. Only the lower 32 bits are used.
+    #
+    #  \param [tlv_object] Is a TlvEntry object. It contains the object that is tagged.
+    #
+    #  \returns self.
+    #            
+    def to_correlated(self, request_id, tlv_object):
+        self.to_sequence([TlvEntry().to_result(request_id), tlv_object])
+        self.tag = TAG_CORRELATED
+        return self
+
+    ## \brief This method splits a TlvEntry instance that represents a correlated object into its request ID and
+    #         the object that was tagged with it.
+    #
+    #  \returns A tuple (request_id, tlv_object). request_id is an integer and tlv_object is a TlvEntry object.
+    #            
+    def split_correlated(self):
+        res = TlvStream.parse_bytes(self.value)
+        
+        if (self.tag != TAG_CORRELATED) or (res.err_code != ERR_OK) or (len(res.data) != 2) or (res.data[0].tag != TAG_RESULT_CODE):
+            raise TlvException('Format Error')
+        
+        return (res.data[0].tlv_convert(), res.data[1])
+
+    ## \brief This method sets this TlvEntry instance up to represent a floating point double value. The value is
+    #         encoded in the binary TAG_DOUBLE_BINARY format.
+    #
+    #  \param [double_val] Is a floating point number. It contains the value that is to be represented.
+    #
+    #  \returns self.
+    #                
+    def to_double(self, double_val):
+        self.tag = TAG_DOUBLE_BINARY
+        self.value = DOUBLE_STRUCT.pack(double_val)
+        return self
+
+    ## \brief This method sets this TlvEntry instance up to represent a byte array.
+    #
+    #  \param [byte_vector] Is a byte array. It contains the value that is to be represented.
+    #
+    #  \returns self.
+    #                    
+    def to_byte_array(self, byte_vector):
+        self.tag = TAG_BYTE_ARRAY
+        self.value = byte_vector
+        return self
+
+    ## \brief This method sets this TlvEntry instance up to represent a map.
+    #
+    #  \param [pairs] Is a sequence of tuples (key, value). key and value are TlvEntry objects.
+    #
+    #  \returns self.
+    #                    
+    def to_map(self, pairs):
+        children = []
+        
+        for key, value in pairs:
+            children.append(key)
+            children.append(value)
+        
+        self.to_sequence(children)
+        self.tag = TAG_MAP
+        return self
+
+    ## \brief This method sets this TlvEntry instance up to represent a set.
+    #
+    #  \param [obj_sequence] Is a sequence of TlvEntry objects. It contains the elements of the set.
+    #
+    #  \returns self.
+    #                    
+    def to_set(self, obj_sequence):
+        self.to_sequence(obj_sequence)
+        self.tag = TAG_SET
+        return self
+
+    ## \brief This method sets this TlvEntry instance up to represent a regular python3 value. Containers are
+    #         converted recursively.
+    #
+    #  \param [python_val] Is an integer, a string, a byte array, a floating point number, None, a list, a tuple,
+    #         a dictionary or a set. The elements of containers have to be of one of these types. Integers are
+    #         represented as varints.
+    #
+    #  \returns self. A TlvException is raised if python_val has an unsupported type.
+    #                    
+    def to_value(self, python_val):
+        if python_val == None:
+            self.to_null()
+        elif isinstance(python_val, int):
+            self.to_varint(python_val)
+        elif isinstance(python_val, str):
+            self.to_string(python_val)
+        elif isinstance(python_val, float):
+            self.to_double(python_val)
+        elif isinstance(python_val, (bytes, bytearray, memoryview)):
+            self.to_byte_array(python_val)
+        elif isinstance(python_val, dict):
+            self.to_map([(TlvEntry().to_value(k), TlvEntry().to_value(v)) for k, v in python_val.items()])
+        elif isinstance(python_val, (set, frozenset)):
+            self.to_set([TlvEntry().to_value(i) for i in python_val])
+        elif isinstance(python_val, (list, tuple, TlvSequence)):
+            self.to_sequence([TlvEntry().to_value(i) for i in python_val])
+        else:
+            raise TlvException('Unsupported type')
+        
+        return self
+
+    ## \brief This method converts this TlvEntry instance into a regular python3 value. The elements of a sequence
+    #         are decoded lazily, i.e. when they are accessed. All other tags are decoded via TlvDecoder.
+    #
+    #  \returns Either a signed integer, an unsigned integer, a string, a byte array, a floating point number, 
+    #           the None value, a dictionary, a set or a TlvSequence holding values of the aforementioned types. The specific type returned
+    #           depends on the value of self.tag. If an unknown tag value is encountered a hash with the keys "key" and
+    #           "value" is returned.
+    #                            
+    def tlv_convert(self):
+        if self.tag == TAG_SEQUENCE:
+            # The children are only decoded when they are accessed
+            result = TlvSequence(self.value)
+        else:
+            result = TlvDecoder.decode(self.tag, self.value)
+        
+        return result
+
+    ## \brief This method converts this TlvEntry instance into a regular python3 value in a single pass. In contrast to
+    #         tlv_convert() sequences are decoded eagerly into lists.
+    #
+    #  \returns A python3 value as described in TlvDecoder.decode().
+    #                            
+    def decode(self):
+        return TlvDecoder.decode(self.tag, self.value)
+    
+
+## \brief A class that represents a decoded TLV sequence. It behaves like a read only list.
+#
+#  A TlvSequence refers to the contents bytes of the sequence through a memoryview. The elements are only
+#  decoded when they are accessed for the first time and byte arrays are returned as memoryviews of the
+#  original contents bytes, i.e. no payload bytes are copied. If the sequence has been read using a TlvBufferPool
+#  it is only valid until the next TLV object is read using the same pool.
+#
+class TlvSequence(collections.abc.Sequence):
+    ## \brief Constructor. 
+    #
+    #  \param [contents_bytes] A byte array or memoryview. It contains the encoded elements of the sequence.
+    #
+    def __init__(self, contents_bytes):
+        ## \brief A memoryview. Refers to the encoded elements of the sequence.
+        self._view = memoryview(contents_bytes)
+        ## \brief A list of TlvEntry objects or None. Is None as long as the element headers have not been parsed.
+        self._entries = None
+        ## \brief A dictionary that maps the index of each element which has already been decoded to its value.
+        self._values = {}
+
+    ## \brief This method parses the headers of all elements without decoding them.
+    #
+    #  \returns A list of TlvEntry objects. The contents bytes of each entry are a memoryview of self._view.
+    #
+    def _parse(self):
+        if self._entries == None:
+            res = TlvStream.parse_bytes(self._view)
+            
+            if res.err_code != ERR_OK:
+                raise TlvException('Unable to parse')
+            
+            self._entries = res.data
+        
+        return self._entries
+
+    ## \brief This method returns the number of elements in this sequence.
+    #
+    #  \returns An integer.
+    #
+    def __len__(self):
+        return len(self._parse())
+
+    ## \brief This method returns the decoded value of one or more elements.
+    #
+    #  \param [index] An integer or a slice.
+    #
+    #  \returns The decoded element or a list of decoded elements if index is a slice.
+    #
+    def __getitem__(self, index):
+        entries = self._parse()
+        
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(entries)))]
+        
+        if index < 0:
+            index += len(entries)
+        
+        if (index < 0) or (index >= len(entries)):
+            raise IndexError('TlvSequence index out of range')
+        
+        if index not in self._values:
+            # Beware: Recursion happens here ;-)!
+            self._values[index] = entries[index].tlv_convert()
+        
+        return self._values[index]
+
+    ## \brief This method compares this sequence with another sequence element by element.
+    #
+    #  \param [other] An object.
+    #
+    #  \returns A boolean.
+    #
+    def __eq__(self, other):
+        if not isinstance(other, collections.abc.Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        
+        return list(self) == list(other)
+
+    ## \brief This method returns a textual representation of this sequence. All elements are decoded.
+    #
+    #  \returns A string.
+    #
+    def __repr__(self):
+        return repr(list(self))
+
+
+## \brief A class that decodes TLV objects directly into python3 values in a single pass over the encoded bytes.
+#
+#  In contrast to TlvStream.parse_bytes no intermediate TlvEntry objects are created. The headers are read directly
+#  from the buffer and the contents bytes are handed to a decoding function that is looked up in TlvDecoder.TABLE by
+#  tag. Sequences are decoded into lists. Byte arrays that are contained in sequences, maps or sets are returned as
+#  memoryviews of the buffer that has been decoded.
+#
+class TlvDecoder:
+    ## \brief The tags of objects that contain other TLV objects
+    CONTAINER_TAGS = frozenset([TAG_SEQUENCE, TAG_MAP, TAG_SET])
+
+    ## \brief This method decodes the contents bytes of a single TLV object.
+    #
+    #  \param [tag] An integer. The tag of the object.
+    #
+    #  \param [contents_bytes] A byte array or memoryview. The contents bytes of the object.
+    #
+    #  \returns Either a signed integer, an unsigned integer, a string, a memoryview, a floating point number, the None
+    #           value, a dictionary, a set or a list holding values of the aforementioned types. If an unknown tag value
+    #           is encountered a hash with the keys "tag" and "value" is returned. A TlvException is raised if the
+    #           contents bytes are malformed.
+    #
+    @staticmethod
+    def decode(tag, contents_bytes):
+        if tag in TlvDecoder.CONTAINER_TAGS:
+            # Elements are decoded from slices of a memoryview so that their contents bytes are not copied
+            contents_bytes = memoryview(contents_bytes)
+        
+        return TlvDecoder.TABLE.get(tag, TlvDecoder.decode_unknown)(tag, contents_bytes, 0, len(contents_bytes))
+
+    ## \brief This method decodes a byte array that contains a number of encoded TLV objects.
+    #
+    #  \param [encoded_bytes] A byte array or memoryview.
+    #
+    #  \returns A list of python3 values as described in decode(). A TlvException is raised if the encoded bytes are
+    #           malformed.
+    #
+    @staticmethod
+    def decode_all(encoded_bytes):
+        buffer = memoryview(encoded_bytes)
+        return TlvDecoder.decode_range(TAG_SEQUENCE, buffer, 0, len(buffer))
+
+    ## \brief This method decodes the encoded TLV objects which are stored in a part of a buffer. The signature of this
+    #         method and of all the following decode_...() methods is the same. This allows to use them in TlvDecoder.TABLE.
+    #
+    #  \param [tag] An integer. The tag of the object the contents bytes of which are decoded.
+    #
+    #  \param [buffer] A memoryview. Objects that do not contain other objects may also be decoded from a byte array.
+    #
+    #  \param [start] An integer. The position of the first contents byte in buffer.
+    #
+    #  \param [end] An integer. The position directly after the last contents byte in buffer.
+    #
+    #  \returns A list of python3 values.
+    #
+    @staticmethod
+    def decode_range(tag, buffer, start, end):
+        result = []
+        table = TlvDecoder.TABLE
+        
+        while start < end:
+            if (end - start) < TlvStream.HEADER_LEN:
+                raise TlvException('Format Error')
+            
+            if buffer[start] & TAG_FLAG_LONG:
+                if (end - start) < TlvStream.LONG_HEADER_LEN:
+                    raise TlvException('Format Error')
+                
+                entry_tag, entry_len = LONG_HEADER_STRUCT.unpack_from(buffer, start)
+                entry_tag = entry_tag & TAG_MASK
+                start += TlvStream.LONG_HEADER_LEN
+            else:
+                entry_tag, entry_len = HEADER_STRUCT.unpack_from(buffer, start)
+                start += TlvStream.HEADER_LEN
+            
+            entry_end = start + entry_len
+            
+            if entry_end > end:
+                raise TlvException('Format Error')
+            
+            result.append(table.get(entry_tag, TlvDecoder.decode_unknown)(entry_tag, buffer, start, entry_end))
+            start = entry_end
+        
+        return result
+
+    ## \brief This method decodes a signed integer. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_int(tag, buffer, start, end):
+        if (end - start) != INT_STRUCT.size:
+            raise TlvException('Format Error')
+        
+        return INT_STRUCT.unpack_from(buffer, start)[0]
+
+    ## \brief This method decodes a varint. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_varint(tag, buffer, start, end):
+        if ((end - start) < 1) or ((end - start) > VARINT_LEN_MAX) or (buffer[end - 1] & 0x80):
+            raise TlvException('Format Error')
+        
+        val = 0
+        shift = 0
+        
+        for i in range(start, end):
+            byte = buffer[i]
+            
+            # Only the last byte may lack the continuation bit
+            if (i < (end - 1)) and not (byte & 0x80):
+                raise TlvException('Format Error')
+            
+            val = val | ((byte & 0x7F) << shift)
+            shift += 7
+        
+        if val >> 64:
+            raise TlvException('Format Error')
+        
+        # Undo zigzag encoding
+        return (val >> 1) ^ -(val & 1)
+
+    ## \brief This method decodes an unsigned integer. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_result(tag, buffer, start, end):
+        if (end - start) != RESULT_STRUCT.size:
+            raise TlvException('Format Error')
+        
+        return RESULT_STRUCT.unpack_from(buffer, start)[0]
+
+    ## \brief This method decodes a string. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_string(tag, buffer, start, end):
+        # Decoding bytes is considerably faster than decoding a memoryview
+        return bytes(buffer[start:end]).decode('utf-8')
+
+    ## \brief This method decodes a byte array. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_byte_array(tag, buffer, start, end):
+        return buffer[start:end]
+
+    ## \brief This method decodes a NULL object. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_null(tag, buffer, start, end):
+        return None
+
+    ## \brief This method decodes a double in the binary format. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_double(tag, buffer, start, end):
+        if (end - start) != DOUBLE_STRUCT.size:
+            raise TlvException('Format Error')
+        
+        return DOUBLE_STRUCT.unpack_from(buffer, start)[0]
+
+    ## \brief This method decodes a double in the legacy text format. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_legacy_double(tag, buffer, start, end):
+        # Never use eval() here. The contents bytes come from the network.
+        try:
+            return float(bytes(buffer[start:end]).decode('utf-8'))
+        except ValueError:
+            raise TlvException('Format Error')
+
+    ## \brief This method decodes a map. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_map(tag, buffer, start, end):
+        items = TlvDecoder.decode_range(tag, buffer, start, end)
+        
+        if (len(items) % 2) != 0:
+            raise TlvException('Format Error')
+        
+        try:
+            return dict(zip(items[0::2], items[1::2]))
+        except TypeError:
+            # Key is not hashable
+            raise TlvException('Format Error')
+
+    ## \brief This method decodes a set. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_set(tag, buffer, start, end):
+        try:
+            return set(TlvDecoder.decode_range(tag, buffer, start, end))
+        except TypeError:
+            raise TlvException('Format Error')
+
+    ## \brief This method handles objects with an unknown tag. See decode_range() for the parameters.
+    #
+    @staticmethod
+    def decode_unknown(tag, buffer, start, end):
+        return {'tag':tag, 'value':buffer[start:end]}
+
+
+## \brief Maps each tag to the method of TlvDecoder that decodes its contents bytes
+TlvDecoder.TABLE = {
+    TAG_INT: TlvDecoder.decode_int,
+    TAG_STRING: TlvDecoder.decode_string,
+    TAG_BYTE_ARRAY: TlvDecoder.decode_byte_array,
+    TAG_SEQUENCE: TlvDecoder.decode_range,
+    TAG_DOUBLE: TlvDecoder.decode_legacy_double,
+    TAG_NULL: TlvDecoder.decode_null,
+    TAG_RESULT_CODE: TlvDecoder.decode_result,
+    TAG_DOUBLE_BINARY: TlvDecoder.decode_double,
+    TAG_MAP: TlvDecoder.decode_map,
+    TAG_SET: TlvDecoder.decode_set,
+    TAG_VARINT: TlvDecoder.decode_varint
+}
+
+
+## \brief A class that is intended to represent a generic return value.
+#
+class TlvResult:
+    __slots__ = ('err_code', 'data')
+
+    ## \brief Constructor. 
+    #
+    #  \param [err_code] Is an integer. It represents an error code. A value of ERR_OK signals successfull
+    #         completion of the operation.
+    #
+    #  \param [data] The type of this parameter is generic. It contains the data returned by the
+    #         operation.
+    #
+    def __init__(self, err_code, data):
+        self.err_code = err_code
+        self.data = data
+
+
+## \brief A class that holds the receive buffers of a single connection. Reusing these buffers for each frame
+#         read from the connection avoids allocating new memory for every incoming TLV object.
+#
+#  Beware: The contents bytes of a TlvEntry that has been read using a TlvBufferPool are a memoryview which refers
+#  to the pool's buffer. They are only valid until the next TLV object is read using the same pool.
+#
+class TlvBufferPool:
+    ## \brief Constructor. 
+    #
+    #  \param [initial_size] Is an integer. It specifies the initial size of the buffer that is used to receive
+    #         the contents bytes.
+    #
+    def __init__(self, initial_size = LEN_MAX):
+        ## \brief A bytearray. Holds the contents bytes of the TLV object read last.
+        self._buffer = bytearray(initial_size)
+        ## \brief A bytearray. Holds the header of the TLV object read last.
+        self._header = bytearray(TlvStream.LONG_HEADER_LEN)
+
+    ## \brief This method returns a buffer into which the header of a TLV object can be read.
+    #
+    #  \returns A memoryview of length TlvStream.LONG_HEADER_LEN.
+    #    
+    def header(self):
+        return memoryview(self._header)
+
+    ## \brief This method returns a buffer into which the contents bytes of a TLV object can be read.
+    #
+    #  \param [size] Is an integer. It specifies the number of bytes needed.
+    #
+    #  \returns A memoryview that has exactly the length specified by parameter size.
+    #    
+    def acquire(self, size):
+        # Views returned earlier may still exist, so a new buffer has to be allocated instead of resizing the old one
+        if size > len(self._buffer):
+            self._buffer = bytearray(size)
+        
+        return memoryview(self._buffer)[:size]
+
+
+## \brief A class that holds the compression settings and statistics of a single connection.
+#
+#  The codec used for sending is agreed upon via TlvStream.negotiate_client and TlvStream.negotiate_server. Received
+#  objects are decompressed using the codec named in their contents bytes. The statistics allow to weigh the bytes
+#  saved against the CPU time spent.
+#
+class TlvCompression:
+    ## \brief Constructor. 
+    #
+    #  \param [threshold] Is an integer. Objects with fewer contents bytes are not compressed.
+    #
+    def __init__(self, threshold = COMPRESSION_THRESHOLD):
+        ## \brief An integer or None. The ID of the codec used for sending. None means that no compression is used.
+        self.codec = None
+        ## \brief An integer. Objects with fewer contents bytes are not compressed.
+        self.threshold = threshold
+        ## \brief An integer. Number of objects that have been compressed.
+        self.frames_compressed = 0
+        ## \brief An integer. Number of contents bytes of the compressed objects before compression.
+        self.bytes_in = 0
+        ## \brief An integer. Number of contents bytes of the compressed objects after compression.
+        self.bytes_out = 0
+        ## \brief A float. CPU time in seconds spent for compressing objects, including attempts that did not pay off.
+        self.compress_time = 0.0
+        ## \brief An integer. Number of objects that have been decompressed.
+        self.frames_decompressed = 0
+        ## \brief A float. CPU time in seconds spent for decompressing objects.
+        self.decompress_time = 0.0
+
+    ## \brief This method returns the names of the codecs which are available in this process in the order of preference.
+    #
+    #  \returns A list of strings.
+    #
+    @staticmethod
+    def available_codecs():
+        result = []
+        
+        if lz4 != None:
+            result.append('lz4')
+        
+        result.append('zlib')
+        
+        return result
+
+    ## \brief This method maps a codec name to its ID.
+    #
+    #  \param [codec_name] A string. The name of the codec.
+    #
+    #  \returns An integer or None if the codec is not known.
+    #
+    @staticmethod
+    def codec_id(codec_name):
+        return {'zlib':COMPRESSION_ZLIB, 'lz4':COMPRESSION_LZ4}.get(codec_name)
+
+    ## \brief This property returns the name of the codec used for sending.
+    #
+    #  \returns A string or None if no compression is used.
+    #
+    @property
+    def codec_name(self):
+        return {COMPRESSION_ZLIB:'zlib', COMPRESSION_LZ4:'lz4'}.get(self.codec)
+
+    ## \brief This method compresses the contents bytes of a TLV object if a codec has been negotiated, the object is
+    #         large enough and compression reduces its size.
+    #
+    #  \param [tlv_object] Is a TlvEntry object.
+    #
+    #  \returns A byte array or None. The byte array holds the codec ID followed by the compressed contents bytes. None
+    #           is returned if the object is sent uncompressed.
+    #
+    def compress(self, tlv_object):
+        result = None
+        
+        if (self.codec != None) and (tlv_object.content_length() >= self.threshold):
+            contents_bytes = tlv_object.value
+            start = time.thread_time()
+            
+            if self.codec == COMPRESSION_LZ4:
+                compressed = lz4.frame.compress(contents_bytes)
+            else:
+                compressed = zlib.compress(contents_bytes, ZLIB_LEVEL)
+            
+            self.compress_time += time.thread_time() - start
+            
+            if (len(compressed) + 1) < len(contents_bytes):
+                result = bytes([self.codec]) + compressed
+                self.frames_compressed += 1
+                self.bytes_in += len(contents_bytes)
+                self.bytes_out += len(result)
+        
+        return result
+
+    ## \brief This method decompresses the contents bytes of a compressed TLV object.
+    #
+    #  \param [data] A byte array. The codec ID followed by the compressed contents bytes.
+    #
+    #  \returns A byte array. The original contents bytes. An exception is raised if the codec is unknown, the data
+    #           is corrupt or the contents bytes would exceed READ_LEN_MAX.
+    #
+    def decompress(self, data):
+        start = time.thread_time()
+        
+        if len(data) < 1:
+            raise TlvException('Format Error')
+        
+        if data[0] == COMPRESSION_ZLIB:
+            decompressor = zlib.decompressobj()
+            
+            try:
+                result = decompressor.decompress(data[1:], READ_LEN_MAX)
+            except zlib.error:
+                raise TlvException('Format Error')
+            
+            if (decompressor.unconsumed_tail) or (not decompressor.eof):
+                raise TlvException('Format Error')
+        elif (data[0] == COMPRESSION_LZ4) and (lz4 != None):
+            # At most one byte more than allowed is inflated, so that a decompression bomb is noticed early
+            decompressor = lz4.frame.LZ4FrameDecompressor()
+            
+            try:
+                result = decompressor.decompress(data[1:], max_length = READ_LEN_MAX + 1)
+            except RuntimeError:
+                raise TlvException('Format Error')
+            
+            if (len(result) > READ_LEN_MAX) or (not decompressor.eof) or (decompressor.unused_data):
+                raise TlvException('Format Error')
+        else:
+            raise TlvException('Unknown codec')
+        
+        self.decompress_time += time.thread_time() - start
+        self.frames_decompressed += 1
+        
+        return result
+
+    ## \brief This method returns a textual summary of the statistics.
+    #
+    #  \returns A string.
+    #
+    def report(self):
+        saved = self.bytes_in - self.bytes_out
+        ratio = 0.0
+        
+        if self.bytes_in > 0:
+            ratio = (100.0 * saved) / self.bytes_in
+        
+        return 'Compression ({}): {} objects compressed, {} bytes saved ({:.1f}%), {:.1f} ms CPU for compression, {} objects decompressed in {:.1f} ms CPU'.format(
+            self.codec_name, self.frames_compressed, saved, ratio, self.compress_time * 1000, self.frames_decompressed, self.decompress_time * 1000)
+
+
+## \brief A class that allows a client to have several requests in flight on the same connection.
+#
+#  Each request is tagged with a request ID. The answers of the server carry the same ID and are matched to the
+#  requests when they are collected. Answers that arrive before they are collected are kept until they are needed.
+#
+class TlvPipeline:
+    ## \brief Constructor. 
+    #
+    #  \param [sock] Is a socket object. It is used to talk to the server.
+    #
+    #  \param [compression] Is a TlvCompression object or None. It holds the compression settings of the connection.
+    #
+    def __init__(self, sock, compression = None):
+        ## \brief A socket object. Used to talk to the server.
+        self._sock = sock
+        ## \brief A TlvCompression object or None. Holds the compression settings of the connection.
+        self._compression = compression
+        ## \brief An integer. The request ID used for the next request.
+        self._next_id = 1
+        ## \brief A list of integers. Contains the IDs of all requests that have not been collected yet.
+        self._in_flight = []
+        ## \brief A dictionary. Maps the IDs of requests that have been answered but not collected to the answer.
+        self._answers = {}
+
+    ## \brief This property returns the number of requests that have not been collected yet.
+    #
+    #  \returns An integer.
+    #    
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    ## \brief This method sends a request to the server without waiting for the answer.
+    #
+    #  \param [tlv_param] A TlvEntry object that specifies the parameter to use in the call.
+    #
+    #  \returns An integer. The request ID which has to be used to collect the answer.
+    #    
+    def submit(self, tlv_param):
+        request_id = self._next_id
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        
+        if TlvStream.write_tlv(self._sock, TlvEntry().to_correlated(request_id, tlv_param), self._compression) != ERR_OK:
+            raise TlvException('Sending data failed')
+        
+        self._in_flight.append(request_id)
+        
+        return request_id
+
+    ## \brief This method receives a single answer from the server and stores it until it is collected.
+    #
+    #  \returns Nothing.
+    #    
+    def _receive(self):
+        res = TlvStream.read_tlv(self._sock, None, self._compression)
+        
+        if res.err_code != ERR_OK:
+            raise TlvException('Receiving data failed')
+        
+        answer_id, answer = res.data.split_correlated()
+        
+        if (answer_id not in self._in_flight) or (answer_id in self._answers):
+            raise TlvException('Unexpected request ID')
+        
+        self._answers[answer_id] = answer.tlv_convert()
+
+    ## \brief This method returns the answer to a request. It does not return until the answer has been received.
+    #
+    #  \param [request_id] An integer. The request ID returned by submit().
+    #
+    #  \returns A sequence of objects that depends on the values returned by the server.
+    #    
+    def collect(self, request_id):
+        if request_id not in self._in_flight:
+            raise TlvException('Unknown request ID')
+        
+        while request_id not in self._answers:
+            self._receive()
+        
+        self._in_flight.remove(request_id)
+        
+        return self._answers.pop(request_id)
+
+    ## \brief This method waits until the answers to all requests that are in flight have been received. The answers
+    #         can be collected afterwards.
+    #
+    #  \returns Nothing.
+    #    
+    def wait_all(self):
+        while len(self._answers) < len(self._in_flight):
+            self._receive()
+
+
+## \brief A class that splits the bytes received on a non-blocking connection into TLV objects.
+#
+#  Data is handed over in the portions in which it arrives. Complete objects can be taken out as soon as all of their
+#  bytes have been received, so a partially received object never blocks the caller. The framing is the same as the one
+#  used by TlvStream.read_tlv.
+#
+#  The bytes are received directly into a preallocated buffer via buffer() and commit(), e.g. by socket.recv_into().
+#  The contents bytes of each object are then copied exactly once out of this buffer.
+#
+class TlvFrameReader:
+    ## \brief Constructor. 
+    #
+    #  \param [compression] Is a TlvCompression object or None. Compressed objects are always decompressed. If
+    #         this parameter is not None the decompression is recorded in its statistics.
+    #
+    #  \param [size] An integer. The initial size of the receive buffer in bytes. It grows if an object does not fit
+    #         into it.
+    #
+    def __init__(self, compression = None, size = CHUNK_SIZE):
+        ## \brief A bytearray. Holds the bytes which have been received but not yet taken out as TLV objects.
+        self._buffer = bytearray(size)
+        ## \brief An integer. Position of the first byte in self._buffer which has not been taken out yet.
+        self._start = 0
+        ## \brief An integer. Position behind the last byte in self._buffer which has been received.
+        self._end = 0
+        ## \brief A TlvCompression object. Used to decompress compressed objects.
+        self._compression = compression
+        
+        if self._compression == None:
+            self._compression = TlvCompression()
+
+    ## \brief This property returns the number of bytes which have been received but not yet taken out.
+    #
+    #  \returns An integer.
+    #    
+    @property
+    def pending(self):
+        return self._end - self._start
+
+    ## \brief This method returns the free part of the receive buffer into which the next bytes can be received.
+    #
+    #  The bytes which have not been taken out yet are moved to the start of the buffer only if there is not enough room
+    #  behind them. The buffer is replaced by a larger one if they do not fit at all.
+    #
+    #  \param [size] An integer. The minimum number of bytes which have to fit into the returned buffer.
+    #
+    #  \returns A writable memoryview. The received bytes have to be written to its start and then be made known
+    #           via commit().
+    #    
+    def buffer(self, size):
+        if (len(self._buffer) - self._end) < size:
+            pending = self._end - self._start
+            
+            if (len(self._buffer) - pending) < size:
+                buffer = bytearray(max(2 * len(self._buffer), pending + size))
+                buffer[:pending] = memoryview(self._buffer)[self._start:self._end]
+                self._buffer = buffer
+            else:
+                self._buffer[:pending] = self._buffer[self._start:self._end]
+            
+            self._start = 0
+            self._end = pending
+        
+        return memoryview(self._buffer)[self._end:]
+
+    ## \brief This method makes bytes known which have been written into the view returned by buffer().
+    #
+    #  \param [count] An integer. The number of bytes which have been written.
+    #
+    #  \returns Nothing.
+    #    
+    def commit(self, count):
+        self._end += count
+
+    ## \brief This method appends received bytes.
+    #
+    #  \param [data] A byte array. The bytes received from the connection.
+    #
+    #  \returns Nothing.
+    #    
+    def feed(self, data):
+        self.buffer(len(data))[:len(data)] = data
+        self.commit(len(data))
+
+    ## \brief This method takes all complete TLV objects out of the received bytes.
+    #
+    #  \returns A list of TlvEntry objects. It is empty if no object has been received completely. A TlvException is
+    #           raised if an object has more than READ_LEN_MAX contents bytes or can not be decompressed. In this case
+    #           the connection can not be used any more.
+    #    
+    def frames(self):
+        result = []
+        position = self._start
+        view = memoryview(self._buffer)
+        
+        while (self._end - position) >= TlvStream.HEADER_LEN:
+            header_len = TlvStream.HEADER_LEN
+            
+            if (self._buffer[position] & TAG_FLAG_LONG) == 0:
+                tag, data_len = HEADER_STRUCT.unpack_from(self._buffer, position)
+            elif (self._end - position) >= TlvStream.LONG_HEADER_LEN:
+                header_len = TlvStream.LONG_HEADER_LEN
+                tag, data_len = LONG_HEADER_STRUCT.unpack_from(self._buffer, position)
+                tag = tag & ~TAG_FLAG_LONG
+            else:
+                break
+            
+            if data_len > READ_LEN_MAX:
+                raise TlvException('Object too large')
+            
+            if (self._end - position) < (header_len + data_len):
+                break
+            
+            entry = TlvEntry()
+            entry.tag = tag
+            data = view[position + header_len:position + header_len + data_len]
+            position += header_len + data_len
+            
+            # Compressed objects are decompressed directly from the buffer, all others are copied once
+            if entry.tag & TAG_FLAG_COMPRESSED:
+                entry.tag = entry.tag & TAG_MASK
+                entry.value = self._compression.decompress(data)
+            else:
+                entry.value = bytes(data)
+            
+            result.append(entry)
+        
+        # No bytes have to be moved if everything has been taken out, which is the normal case
+        if position == self._end:
+            position = 0
+            self._end = 0
+        
+        self._start = position
+        
+        return result
+
+
+## \brief A class that binds together a collection of static methods that deal with sending
+#         and receiving TLV encoded objects via UNIX domain sockets.
+#
+class TlvStream:
+    ## \brief Number of bytes in the classic header of an encoded TLV object
+    HEADER_LEN = HEADER_STRUCT.size
+    ## \brief Number of bytes in the long header of an encoded TLV object
+    LONG_HEADER_LEN = LONG_HEADER_STRUCT.size
+
+    ## \brief Constructor. 
+    #
+    def __init__(self):
+        pass
+
+    ## \brief This method performs a transaction with the server
+    #
+    #  \param [sock] Is a socket object
+    #
+    #  \param [tlv_param] A TlvEntry object that specifies the parameter to use in the call
+    #
+    #  \param [pool] Is a TlvBufferPool object or None. If it is not None the answer of the server is read into the
+    #         buffers of this pool.
+    #
+    #  \param [compression] Is a TlvCompression object or None. It holds the compression settings of the connection.
+    #
+    #  \returns A sequence of objects that depends on the values returned by the server.
+    #
+    @staticmethod
+    def transact_client(sock, tlv_param, pool = None, compression = None):
+        if TlvStream.write_tlv(sock, tlv_param, compression) != ERR_OK:
+            raise TlvException('Sending data failed')
+        
+        res = TlvStream.read_tlv(sock, pool, compression)
+        
+        if res.err_code != ERR_OK:
+            raise TlvException('Receiving data failed')
+        
+        return res.data.tlv_convert()
+
+    ## \brief This method performs a transaction with a client
+    #
+    #  \param [sock] A socket object. This object is used to talk to the client,
+    #
+    #  \param [processor] Is a callable thing that has a process method that receives a TlvEntry object
+    #         and returns a TlvEntry object. If the client has tagged its request with a request ID the processor
+    #         receives the untagged object and the answer is tagged with the same request ID.
+    #
+    #  \param [pool] Is a TlvBufferPool object or None. If it is not None the data sent by the client is read into
+    #         the buffers of this pool. The pool should be kept for the lifetime of the connection.
+    #
+    #  \param [compression] Is a TlvCompression object or None. It holds the compression settings of the connection.
+    #         If it is None the server refuses to compress its answers.
+    #
+    #  \returns An integer specifying an error code
+    #
+    @staticmethod
+    def transact_server(sock, processor, pool = None, compression = None):
+        result = ERR_OK
+        res = TlvStream.read_tlv(sock, pool, compression)
+
+        if res.err_code != ERR_OK:
+            raise TlvException('Error receiving data from client')
+        
+        try:
+            tlv_for_client = TlvStream.answer_request(res.data, processor, compression)
+            result = TlvStream.write_tlv(sock, tlv_for_client, compression)            
+        except:
+            result = ERR_ERROR
+    
+        return result        
+
+    ## \brief This method computes the answer to a request that has been received from a client. Negotiation objects
+    #         are handled here, all other requests are handed to the processor.
+    #
+    #  \param [request] A TlvEntry object. The request sent by the client.
+    #
+    #  \param [processor] Is a callable thing that has a process method that receives a TlvEntry object
+    #         and returns a TlvEntry object. If the client has tagged its request with a request ID the processor
+    #         receives the untagged object and the answer is tagged with the same request ID.
+    #
+    #  \param [compression] Is a TlvCompression object or None. It holds the compression settings of the connection.
+    #         If it is None the server refuses to compress its answers.
+    #
+    #  \returns A TlvEntry object that has to be sent to the client. If the request can not be handled it contains
+    #           ERR_ERROR, tagged with the request ID if the client has sent one. A request is therefore always answered.
+    #
+    @staticmethod
+    def answer_request(request, processor, compression = None):
+        try:
+            if request.tag == TAG_NEGOTIATE:
+                result = TlvStream.negotiate_server(request, compression)
+            elif request.tag == TAG_CORRELATED:
+                # The answer is tagged with the request ID sent by the client
+                request_id, tlv_from_client = request.split_correlated()
+                result = TlvEntry().to_correlated(request_id, processor.process(tlv_from_client))
+            else:
+                result = processor.process(request)
+        except:
+            # A client which waits for the answer would be blocked forever if nothing was sent
+            result = TlvStream.error_answer(request)
+        
+        return result
+
+    ## \brief This method returns the answer to a request that could not be handled.
+    #
+    #  \param [request] A TlvEntry object. The request sent by the client.
+    #
+    #  \returns A TlvEntry object that contains ERR_ERROR. It is tagged with the request ID of a correlated request
+    #           if the ID can be read, even if the rest of the request is malformed.
+    #
+    @staticmethod
+    def error_answer(request):
+        result = TlvEntry().to_int(ERR_ERROR)
+        
+        try:
+            if request.tag == TAG_CORRELATED:
+                # The objects in front of a malformed one are returned as well
+                res = TlvStream.parse_bytes(request.value)
+                
+                if (len(res.data) > 0) and (res.data[0].tag == TAG_RESULT_CODE):
+                    result = TlvEntry().to_correlated(res.data[0].tlv_convert(), result)
+        except:
+            # The request ID can not be read
+            result = TlvEntry().to_int(ERR_ERROR)
+        
+        return result
+
+    ## \brief This method agrees with the server on the compression codec that is used on a connection. The client
+    #         offers all codecs that are available and the server chooses one of them. A server that does not know about
+    #         compression answers with an error code. In this case compression remains switched off.
+    #
+    #  \param [sock] Is a socket object
+    #
+    #  \param [compression] Is a TlvCompression object. Its codec is set to the codec chosen by the server.
+    #
+    #  \returns A string or None. The name of the chosen codec or None if no compression is used.
+    #
+    @staticmethod
+    def negotiate_client(sock, compression):
+        offer = TlvEntry().to_sequence([TlvEntry().to_string(i) for i in TlvCompression.available_codecs()])
+        offer.tag = TAG_NEGOTIATE
+        compression.codec = None
+        
+        if TlvStream.write_tlv(sock, offer) != ERR_OK:
+            raise TlvException('Sending data failed')
+        
+        res = TlvStream.read_tlv(sock)
+        
+        if res.err_code != ERR_OK:
+            raise TlvException('Receiving data failed')
+        
+        if res.data.tag == TAG_NEGOTIATE:
+            res.data.tag = TAG_SEQUENCE
+            chosen = res.data.tlv_convert()
+            
+            if len(chosen) > 0:
+                compression.codec = TlvCompression.codec_id(chosen[0])
+        
+        return compression.codec_name
+
+    ## \brief This method handles the negotiation object sent by a client. The first offered codec which is also available
+    #         on the server is chosen.
+    #
+    #  \param [offer] Is a TlvEntry object with the tag TAG_NEGOTIATE. It contains the codecs offered by the client.
+    #
+    #  \param [compression] Is a TlvCompression object or None. If it is None compression is refused. Else its codec is
+    #         set to the chosen codec.
+    #
+    #  \returns A TlvEntry object with the tag TAG_NEGOTIATE that contains the name of the chosen codec or no element if
+    #           compression is refused. Compression is also refused if the offer is malformed.
+    #
+    @staticmethod
+    def negotiate_server(offer, compression):
+        chosen = []
+        offer.tag = TAG_SEQUENCE
+        
+        if compression != None:
+            compression.codec = None
+            
+            try:
+                # The elements are decoded lazily, therefore all of them are decoded here
+                offered = list(offer.tlv_convert())
+            except:
+                # The offer has been sent by an unknown peer
+                offered = []
+            
+            for i in offered:
+                if isinstance(i, str) and (i in TlvCompression.available_codecs()):
+                    compression.codec = TlvCompression.codec_id(i)
+                    chosen.append(TlvEntry().to_string(i))
+                    break
+        
+        result = TlvEntry().to_sequence(chosen)
+        result.tag = TAG_NEGOTIATE
+        
+        return result
+
+    ## \brief This method allows to read a specfic number of bytes from a socket. It does not return until
+    #         the desired number of bytes has been read.
+    #
+    #  The bytes are received directly into the target buffer via recv_into(). Therefore reading a TLV object
+    #  does not involve any copying of data already received.
+    #
+    #  \param [sock] Is a socket object. This socket is used for reading data.
+    #
+    #  \param [bytes_to_read] Is an integer. It specifies the number of bytes to read from the socket.
+    #  
+    #  \param [buffer] Is a writable memoryview of length bytes_to_read or None. If it is None a new buffer is
+    #         allocated.
+    #  
+    #  \returns A TlvResult object. In case of success the data member contains the bytes read in the form of a 
+    #           memoryview.
+    #    
+    @staticmethod
+    def _read_defined(sock, bytes_to_read, buffer = None):
+        if buffer == None:
+            buffer = memoryview(bytearray(bytes_to_read))
+        
+        result = TlvResult(ERR_OK, buffer)
+        read_position = 0
+        
+        try:
+            while (read_position < bytes_to_read) and (result.err_code == ERR_OK):
+                bytes_read = sock.recv_into(buffer[read_position:], bytes_to_read - read_position)
+
+                if bytes_read == 0:
+                    result.err_code = ERR_SOCK_READ
+                else:
+                    read_position += bytes_read
+        except:
+            result.err_code = ERR_SOCK_READ
+        
+        return result
+
+    ## \brief This method allows to read the header of a TLV object from a socket. It does not return until the
+    #         header was read or an error was encountered. Classic as well as long headers are accepted.
+    #
+    #  \param [sock] Is a socket object. This socket is used for reading data.
+    #
+    #  \param [pool] Is a TlvBufferPool object or None. If it is not None the header is read into the buffer of
+    #         this pool.
+    #
+    #  \returns A TlvResult object. In case of success the data member contains a tuple (tag, data_len) where
+    #           tag is the tag of the object and data_len the number of contents bytes that follow the header. If
+    #           the contents bytes are compressed TAG_FLAG_COMPRESSED is set in tag.
+    #    
+    @staticmethod    
+    def read_tlv_header(sock, pool = None):
+        result = TlvResult(ERR_OK, None)
+        
+        if pool != None:
+            header_buffer = pool.header()
+        else:
+            header_buffer = memoryview(bytearray(TlvStream.LONG_HEADER_LEN))
+        
+        header_res = TlvStream._read_defined(sock, TlvStream.HEADER_LEN, header_buffer[:TlvStream.HEADER_LEN])
+
+        if header_res.err_code != ERR_OK:
+            result.err_code = header_res.err_code
+        elif (header_buffer[0] & TAG_FLAG_LONG) == 0:
+            result.data = HEADER_STRUCT.unpack_from(header_buffer)
+        else:
+            # Read the two remaining length bytes of a long header
+            header_res = TlvStream._read_defined(sock, TlvStream.LONG_HEADER_LEN - TlvStream.HEADER_LEN, header_buffer[TlvStream.HEADER_LEN:])
+            
+            if header_res.err_code != ERR_OK:
+                result.err_code = header_res.err_code
+            else:
+                tag, data_len = LONG_HEADER_STRUCT.unpack_from(header_buffer)
+                result.data = (tag & ~TAG_FLAG_LONG, data_len)
+        
+        return result
+
+    ## \brief This method allows to read the contents bytes of a TLV object in chunks after its header has been read
+    #         via read_tlv_header. This makes it possible to process objects which are too large to be held in memory.
+    #
+    #  \param [sock] Is a socket object. This socket is used for reading data.
+    #
+    #  \param [data_len] Is an integer. It specifies the number of contents bytes as returned by read_tlv_header.
+    #
+    #  \param [pool] Is a TlvBufferPool object or None. If it is not None the chunks are read into the buffer of
+    #         this pool.
+    #
+    #  \returns A generator that yields memoryviews of at most CHUNK_SIZE bytes. Each memoryview is only valid until
+    #            the next chunk is requested. A TlvException is raised if reading from the socket fails.
+    #    
+    @staticmethod    
+    def read_chunks(sock, data_len, pool = None):
+        if pool == None:
+            pool = TlvBufferPool(min(data_len, CHUNK_SIZE))
+        
+        while data_len > 0:
+            chunk_len = min(data_len, CHUNK_SIZE)
+            data_res = TlvStream._read_defined(sock, chunk_len, pool.acquire(chunk_len))
+            
+            if data_res.err_code != ERR_OK:
+                raise TlvException('Error receiving data')
+            
+            data_len -= chunk_len
+            yield data_res.data
+
+    ## \brief This method allows to read a single TlvEntry object from a socket. It does not return until a TLV
+    #         object was read or an error was encountered.
+    #
+    #  \param [sock] Is a socket object. This socket is used for reading data.
+    #
+    #  \param [pool] Is a TlvBufferPool object or None. If it is None the contents bytes are returned as a newly
+    #         allocated bytes object. Else they are returned as a memoryview into the buffer of the pool which
+    #         is only valid until the next read that uses the same pool.
+    #
+    #  \param [compression] Is a TlvCompression object or None. Compressed objects are always decompressed. If
+    #         this parameter is not None the decompression is recorded in its statistics.
+    #
+    #  \returns A TlvResult object. In case of success the data member contains the TlvEntry object read from 
+    #           the socket. If the object has more than READ_LEN_MAX contents bytes the error code ERR_DATA_LEN is
+    #           returned and the contents bytes are not read.
+    #    
+    @staticmethod    
+    def read_tlv(sock, pool = None, compression = None):
+        result = TlvResult(ERR_OK, TlvEntry())        
+        header_res = TlvStream.read_tlv_header(sock, pool)
+
+        if header_res.err_code != ERR_OK:
+            result.err_code = header_res.err_code
+        elif header_res.data[1] > READ_LEN_MAX:
+            result.err_code = ERR_DATA_LEN
+        else:            
+            result.data.tag, data_len = header_res.data
+            data_buffer = None
+            
+            if pool != None:
+                data_buffer = pool.acquire(data_len)
+            
+            data_res = TlvStream._read_defined(sock, data_len, data_buffer)            
+            
+            if data_res.err_code != ERR_OK:
+                result.err_code = data_res.err_code                
+            elif result.data.tag & TAG_FLAG_COMPRESSED:
+                if compression == None:
+                    compression = TlvCompression()
+                
+                result.data.tag = result.data.tag & TAG_MASK
+                
+                try:
+                    result.data.value = compression.decompress(data_res.data)
+                except:
+                    result.err_code = ERR_DATA_LEN
+            elif pool != None:
+                result.data.value = data_res.data
+            else:
+                result.data.value = data_res.data.tobytes()
+        
+        return result                        
+
+    ## \brief This method returns the length of the header that is used to encode a TLV object.
+    #
+    #  \param [data_len] Is a integer. It designates the number of contents bytes.
+    #
+    #  \returns An integer. HEADER_LEN if data_len does not exceed LEN_MAX else LONG_HEADER_LEN.
+    #    
+    @staticmethod    
+    def header_len(data_len):
+        if data_len <= LEN_MAX:
+            return TlvStream.HEADER_LEN
+        else:
+            return TlvStream.LONG_HEADER_LEN
+
+    ## \brief This method allows to construct the encoded header of a TLV object. The header consists of
+    #         the single byte representing the tag followed by the two bytes which specify the length of the
+    #         contents bytes. The length bytes use big endian byte order. If data_len exceeds LEN_MAX a long header
+    #         is constructed instead. In this case TAG_FLAG_LONG is set in the first byte and four length bytes
+    #         follow.
+    #
+    #  \param [tag] Is a integer. It designates the tag.
+    #
+    #  \param [data_len] Is a integer. It designates the number of contents bytes.
+    #
+    #  \returns A three or five element byte array that represents the encoded TLV header.
+    #    
+    @staticmethod    
+    def make_header(tag, data_len):
+        if data_len <= LEN_MAX:
+            return HEADER_STRUCT.pack(tag, data_len)
+        else:
+            return LONG_HEADER_STRUCT.pack(tag | TAG_FLAG_LONG, data_len)
+
+    ## \brief This method parses a byte array into a sequence of TlvEntry objects.
+    #
+    #  \param [encoded_bytes] Is a byte array. It contains a number of encoded TLV objects.
+    #
+    #  \returns A TlvResult object. In case of success the data member holds a sequence of TlvEntry objects
+    #           that were parsed from the value given in parameter encoded_bytes.
+    #    
+    @staticmethod    
+    def parse_bytes(encoded_bytes):
+        result = TlvResult(ERR_OK, [])
+        end_position = len(encoded_bytes)
+        read_position = 0
+        
+        while (result.err_code == ERR_OK) and (read_position < end_position):
+            if (end_position - read_position) < TlvStream.HEADER_LEN:
+                result.err_code = ERR_DATA_LEN
+            elif (encoded_bytes[read_position] & TAG_FLAG_LONG) and ((end_position - read_position) < TlvStream.LONG_HEADER_LEN):
+                result.err_code = ERR_DATA_LEN
+            else:
+                entry = TlvEntry()
+                # Parse tag and length bytes
+                if encoded_bytes[read_position] & TAG_FLAG_LONG:
+                    entry.tag, entry_len = LONG_HEADER_STRUCT.unpack_from(encoded_bytes, read_position)
+                    entry.tag = entry.tag & TAG_MASK
+                    read_position += TlvStream.LONG_HEADER_LEN
+                else:
+                    entry.tag, entry_len = HEADER_STRUCT.unpack_from(encoded_bytes, read_position)
+                    read_position += TlvStream.HEADER_LEN
+                
+                # Parse contents bytes
+                if (end_position - read_position) >= entry_len:
+                    entry.value = encoded_bytes[read_position:read_position + entry_len]
+                    read_position += entry_len
+                    result.data.append(entry)
+                else:
+                    result.err_code = ERR_DATA_LEN
+        
+        return result
+
+    ## \brief This method encodes a sequence of TlvEntry objects into a byte array.
+    #
+    #  \param [tlv_objects] Is a sequence of TlvEntry objects.
+    #
+    #  \returns A byte array that consists of the concatenated encodings of the TlvEntry objects specified by
+    #           parameter tlv_objects. All headers and contents bytes are joined at once, i.e. the result is the only
+    #           copy that is made.
+    #    
+    @staticmethod    
+    def to_bytes(tlv_objects):
+        parts = []
+        
+        for i in tlv_objects:
+            parts.append(TlvStream.make_header(i.tag, len(i.value)))
+            parts.append(i.value)
+        
+        return b''.join(parts)
+
+    ## \brief This method transforms a sequence of TlvEntry objects into a corresponding sequence of python3 values.
+    #
+    #  \param [tlv_obj_sequence] Is a sequence of TlvEntry objects.
+    #
+    #  \returns A sequence of generic python3 values. The types of the sequence components depend on the tags of the
+    #           TlvEntry objects specified by parameter tlv_obj_sequence.
+    #    
+    @staticmethod
+    def convert_all(tlv_obj_sequence):
+        return list(map(lambda x: x.tlv_convert(), tlv_obj_sequence))
+
+    ## \brief This method encodes a single TlvEntry object in the form in which it is sent over a connection.
+    #
+    #  \param [tlv_object] Is a TlvEntry object.
+    #
+    #  \param [compression] Is a TlvCompression object or None. If it is not None and a codec has been negotiated the
+    #         object is compressed if it is large enough and compression actually reduces its size.
+    #
+    #  \returns A byte array that holds the encoded object.
+    #    
+    @staticmethod    
+    def encode_frame(tlv_object, compression = None):
+        compressed = None
+        
+        if compression != None:
+            compressed = compression.compress(tlv_object)
+        
+        if compressed != None:
+            result = TlvStream.make_header(tlv_object.tag | TAG_FLAG_COMPRESSED, len(compressed)) + compressed
+        else:
+            result = TlvStream.to_bytes([tlv_object])
+        
+        return result
+
+    ## \brief This method allows to write a single TlvEntry object to a socket. It does not return until the TLV
+    #         object was sent or an error was encountered.
+    #
+    #  \param [sock] Is a socket object. This socket is used for sending data.
+    #
+    #  \param [tlv_object] Is a TlvEntry object. This object is encoded and sent through the socket.
+    #
+    #  \param [compression] Is a TlvCompression object or None. If it is not None and a codec has been negotiated the
+    #         object is compressed if it is large enough and compression actually reduces its size.
+    #
+    #  \returns An integer. This integer represents an error code. A value of ERR_OK signifies successfull completion
+    #           of the send operation.
+    #    
+    @staticmethod    
+    def write_tlv(sock, tlv_object, compression = None):
+        result = ERR_OK
+        
+        if tlv_object.content_length() <= LONG_LEN_MAX:        
+            try:
+                sock.sendall(TlvStream.encode_frame(tlv_object, compression))
+            except:
+                result = ERR_SOCK_WRITE
+        else:
+            result = ERR_DATA_LEN
+        
+        return result
+
+    ## \brief This method allows to write a TLV object the contents bytes of which are provided in chunks. This makes it
+    #         possible to send objects which are too large to be held in memory. It does not return until the TLV
+    #         object was sent or an error was encountered.
+    #
+    #  \param [sock] Is a socket object. This socket is used for sending data.
+    #
+    #  \param [tag] Is an integer. It designates the tag.
+    #
+    #  \param [data_len] Is an integer. It designates the number of contents bytes.
+    #
+    #  \param [chunks] An iterable of byte arrays. The lengths of all chunks have to add up to data_len.
+    #
+    #  \returns An integer. This integer represents an error code. A value of ERR_OK signifies successfull completion
+    #           of the send operation. ERR_DATA_LEN is returned if the chunks do not match data_len. In this case the
+    #           connection can not be used any more.
+    #    
+    @staticmethod    
+    def write_chunks(sock, tag, data_len, chunks):
+        result = ERR_OK
+        
+        if data_len <= LONG_LEN_MAX:
+            try:
+                sock.sendall(TlvStream.make_header(tag, data_len))
+                
+                for i in chunks:
+                    if len(i) > data_len:
+                        result = ERR_DATA_LEN
+                        break
+                    
+                    sock.sendall(i)
+                    data_len -= len(i)
+                
+                if data_len != 0:
+                    result = ERR_DATA_LEN
+            except:
+                result = ERR_SOCK_WRITE
+        else:
+            result = ERR_DATA_LEN
+        
+        return result
+  
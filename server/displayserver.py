@@ -20,330 +20,2486 @@
 # \brief Service that lets a client display the playing field and some messages.
 #
 
-import select
+import os
+import sys
+import math
+import bisect
+import collections
+import selectors
 import socket
-import tlvobject
+import threading
+import asyncio
+import argparse
 import time
-import pickle
 import pygame
 
+# The modules which are shared by client and server reside in the "common" directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+import tlvobject
+import tlvasync
+import displayschema
+
 ERR_OK = 0
 ERR_ERROR = 42
 
 ## \brief TCP port on which the service is listening
 PORT = 4321
-## \brief X size of the window which is used to draw the playing field
+## \brief Default X size of the window which is used to draw the playing field. The font sizes are designed for it.
 PLAYING_FIELD_X = 1024
-## \brief X size of the window which is used to draw the playing field
+## \brief Default Y size of the window which is used to draw the playing field. The font sizes are designed for it.
 PLAYING_FIELD_Y = 768
+## \brief Maximum time in seconds between two checks of the pygame event queue
+EVENT_INTERVAL = 0.05
+## \brief Default for the memory budget of the cache for rendered text in bytes
+TEXT_CACHE_BUDGET = 4 * 1024 * 1024
+## \brief Default for the maximum number of frames per second. The screen is only updated after the background has changed.
+FRAME_RATE_MAX = 30
+## \brief Maximum number of bytes which are read from a client connection at once
+RECV_SIZE = 65536
+## \brief Default for the maximum number of requests which wait in the queue between network thread and render loop
+COMMAND_QUEUE_MAX = 64
+## \brief Commands which show a question with its time. A waiting command is superseded by a newer one of the same
+#         kind for the same question which directly follows it on the same connection. A newer startcountdown restarts
+#         the countdown anyway, so only the last one has any effect.
+COLLAPSIBLE_COMMANDS = [displayschema.SHOW_QUESTION.name, displayschema.START_COUNTDOWN.name]
 
-## \brief Size of the font (in pixels) which is used when displaying a question
-QUESTION_FONT_SIZE = (PLAYING_FIELD_X * 5) // 100
-## \brief Size of the font (in pixels) which is used when displaying the intro message
-INTRO_FONT_SIZE = (PLAYING_FIELD_X * 875) // 10000
-## \brief Size of the font (in pixels) which is used when displaying the final result
-RESULT_FONT_SIZE = INTRO_FONT_SIZE
-## \brief Size of the font (in pixels) which is used to render the values on the playing field
-PLAYFIELD_FONT_SIZE = (PLAYING_FIELD_X * 5625) // 100000
-## \brief Size of the font (in pixels) which is used when displaying the "Thank You" message
-THANKS_FONT_SIZE = (PLAYING_FIELD_X * 75) // 1000
+## \brief Number of samples which are kept for each command and span of the timing statistics
+TIMING_SAMPLES = 512
+## \brief Upper bounds of the buckets of the timing histograms in seconds. The last bucket has no upper bound.
+TIMING_BUCKETS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5]
+## \brief The spans into which the handling of a command is divided, in the order in which they happen
+TIMING_SPANS = ['wait', 'decode', 'render', 'process', 'flip', 'latency']
+## \brief Size of the font (in pixels) of the timing overlay
+HUD_FONT_SIZE = 16
+## \brief Time in seconds between two updates of the timing overlay
+HUD_INTERVAL = 1.0
 
-## \brief This class knows how to draw the playing field and how to render textual messages using
-#         the pygame library.
-#
-#  This class knows six commands.
-#  1. stop: Does not draw anything but changes self._stop_flag to true.
-#  2. showqestion: Draws a textual message representing a question.
-#  3. showintro: Draws an intro message into the background surface.
-#  4. danksagung: Displays a "Thank you" message.
-#  5. showresult: Displays the end result.
-#  6. showplayingfield: Displays the playing field from which the players can choose questions.
+## \brief Size of the font which is used when displaying a question. In 1/100000 of the reference width, see Layout.
+QUESTION_FONT_SCALE = 5000
+## \brief Size of the font which is used when displaying the intro message. In 1/100000 of the reference width.
+INTRO_FONT_SCALE = 8750
+## \brief Size of the font which is used when displaying the final result. In 1/100000 of the reference width.
+RESULT_FONT_SCALE = INTRO_FONT_SCALE
+## \brief Size of the font which is used to render the values on the playing field. In 1/100000 of the reference width.
+PLAYFIELD_FONT_SCALE = 5625
+## \brief Size of the font which is used when displaying the "Thank You" message. In 1/100000 of the reference width.
+THANKS_FONT_SCALE = 7500
+## \brief Scaling of all font sizes in percent of the sizes given by the *_FONT_SCALE constants
+FONT_PERCENT = 100
+## \brief Number of rows of the playing field. The first row holds the category names.
+PLAYFIELD_ROWS = 6
+## \brief Number of columns of the playing field
+PLAYFIELD_COLUMNS = 5
+
+## \brief This class creates pygame font objects and keeps them for later use. Creating a font object means loading
+#         and scaling the font file. This is expensive on a Raspberry Pi.
 #
-class Processor:
+class FontCache:
     ## \brief Constructor. 
     #
-    #  \param [background] Is an object of type pygame.Surface. It is expected that its size is equal
-    #         to (PLAYING_FIELD_X, PLAYING_FIELD_Y). All drawing this class does is relative to this Surface.
+    def __init__(self):
+        ## \brief A dictionary. Maps tuples (face, size) to pygame.font.Font objects.
+        self._fonts = {}
+        ## \brief An integer. Number of requests that have been served from the cache.
+        self.hits = 0
+        ## \brief An integer. Number of requests for which a font object had to be created.
+        self.misses = 0
+        ## \brief A float. Time in seconds spent for creating font objects.
+        self.load_time = 0.0
+
+    ## \brief This method returns a font object.
+    #
+    #  \param [size] An integer. The font size in pixels.
+    #
+    #  \param [face] A string or None. The file name of the font. None selects the default font of pygame.
     #
-    #  The default tag is TAG_NULL and therefore there are no contens bytes.
+    #  \returns A pygame.font.Font object.
     #    
-    def __init__(self, background):
-        ## \brief A boolean. Is set to true after the stop command has been received
-        self._stop_flag = False
-        ## \brief An object of type pygame.Surface. Represents the pygame window in which all drawing happens
-        self._background = background
+    def get(self, size, face = None):
+        key = (face, size)
+        font = self._fonts.get(key)
         
-    ## \brief This property returns the current value of the stop flag. 
+        if font == None:
+            self.misses += 1
+            start = time.perf_counter()
+            font = pygame.font.Font(face, size)
+            self.load_time += time.perf_counter() - start
+            self._fonts[key] = font
+        else:
+            self.hits += 1
+        
+        return font
+
+    ## \brief This method returns a textual summary of the statistics. The time saved is estimated from the average
+    #         time needed for creating a font object.
     #
-    #  \returns A boolean. If true is returned the stop command has been received.
+    #  \param [frames] An integer. The number of frames which have been drawn. It is used to calculate the time
+    #         saved per frame.
+    #
+    #  \returns A string.
     #    
-    @property
-    def stop(self):
-        return self._stop_flag    
+    def report(self, frames):
+        saved = 0.0
+        
+        if self.misses > 0:
+            saved = (self.hits * self.load_time) / self.misses
+        
+        return 'Font cache: {} fonts, {} hits, {} misses, {:.1f} ms loading, {:.1f} ms saved, {:.2f} ms saved per frame'.format(
+            len(self._fonts), self.hits, self.misses, self.load_time * 1000, saved * 1000, (saved * 1000) / max(frames, 1))
 
-    ## \brief This method parses the data received from the client, selects the handling method and executes it.
+## \brief This class renders text and keeps the resulting surfaces for later use. The least recently used surfaces are
+#         evicted when the memory used by the cached surfaces exceeds a budget.
+#
+#  Most texts shown by the server come from a small set of strings: The category names and the values on the playing
+#  field, the fixed messages and the digits of the countdown. Drawing them from the cache is a simple blit.
+#
+class TextCache:
+    ## \brief Constructor. 
     #
-    #  \param [tlv_param] An object of type tlvobject.TlvEntry. Contains the data sent by the client.
+    #  \param [fonts] Is a FontCache object. It provides the fonts used for rendering.
     #
-    #  \returns A tlvobject.TlvEntry object which contains an integer value. The integer value represents the
-    #           error code sent back to the client. A return value of 0 signifies success.
-    #        
-    def process(self, tlv_param):
-        result = tlvobject.TlvEntry().to_int(ERR_OK)
+    #  \param [budget] Is an integer. The maximum number of bytes used by the pixels of the cached surfaces.
+    #    
+    def __init__(self, fonts, budget = TEXT_CACHE_BUDGET):
+        ## \brief A FontCache object. Provides the fonts used for rendering.
+        self._fonts = fonts
+        ## \brief An integer. The maximum number of bytes used by the cached surfaces.
+        self.budget = budget
+        ## \brief An OrderedDict. Maps tuples (text, size, colour) to pygame.Surface objects. The most recently used
+        #         surface comes last.
+        self._surfaces = collections.OrderedDict()
+        ## \brief An integer. Number of bytes used by the cached surfaces.
+        self.used = 0
+        ## \brief An integer. Number of requests that have been served from the cache.
+        self.hits = 0
+        ## \brief An integer. Number of requests for which the text had to be rendered.
+        self.misses = 0
+        ## \brief An integer. Number of surfaces which have been evicted from the cache.
+        self.evictions = 0
+
+    ## \brief This method returns the number of bytes used by the pixels of a surface.
+    #
+    #  \param [surface] A pygame.Surface object.
+    #
+    #  \returns An integer.
+    #    
+    @staticmethod
+    def surface_size(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    ## \brief This method returns a surface that holds a rendered text. The surface must not be modified.
+    #
+    #  \param [text] A string. The text to render.
+    #
+    #  \param [size] An integer. The font size in pixels.
+    #
+    #  \param [colour] A tuple (r, g, b). The colour of the text.
+    #
+    #  \returns A pygame.Surface object.
+    #    
+    def render(self, text, size, colour):
+        key = (text, size, colour)
+        surface = self._surfaces.get(key)
         
-        try:                        
-            params = tlv_param.tlv_convert()
-            out_text = ''
-
-            if len(params) == 0:
-                result.to_int(ERR_ERROR)
-            elif params[0] == 'stop':                
-                self._stop_flag = True
-            elif params[0] == 'showquestion':
-                self.show_question(params[1], params[2])            
-            elif params[0] == 'showintro':            
-                self.show_intro()
-            elif params[0] == 'danksagung':            
-                self.show_thanks()
-            elif params[0] == 'showresult':
-                self.show_result(pickle.loads(params[1]))
-            elif params[0] == 'showplayingfield':
-                self.show_playing_field(pickle.loads(params[1]))
-            else:
-                result.to_int(ERR_ERROR)
+        if surface != None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+        else:
+            self.misses += 1
+            surface = self._fonts.get(size).render(text, 1, colour)
+            surface_size = TextCache.surface_size(surface)
             
-        except:
-            result.to_int(ERR_ERROR)
+            # Surfaces which exceed the budget on their own are not cached
+            if surface_size <= self.budget:
+                while (self.used + surface_size) > self.budget:
+                    evicted_key, evicted = self._surfaces.popitem(last = False)
+                    self.used -= TextCache.surface_size(evicted)
+                    self.evictions += 1
+                
+                self._surfaces[key] = surface
+                self.used += surface_size
         
-        return result
+        return surface
 
-    ## \brief The playing field consists of six rows and five columns. This method can be used to draw
-    #         each one of these 30 cells.
+    ## \brief This method returns a textual summary of the statistics.
     #
-    #  \param [logical_x] An integer. It contains the logical x coordinate (0-5) of the cell which is to be drawn.
-    #
-    #  \param [logical_y] An integer. It contains the logical y coordinate (0-4) of the cell which is to be drawn.
+    #  \returns A string.
+    #    
+    def report(self):
+        return 'Text cache: {} surfaces, {} of {} KiB used, {} hits, {} misses, {} evictions'.format(
+            len(self._surfaces), self.used // 1024, self.budget // 1024, self.hits, self.misses, self.evictions)
+
+## \brief This class keeps the most recent durations of one span of one command in a ring buffer and derives
+#         percentiles and a histogram from them.
+#
+class TimingHistogram:
+    ## \brief Constructor. 
     #
-    #  \param [label] A string. It has to contain the text that is shown in the cell's center.
+    #  \param [size] An integer. The number of samples that are kept.
+    #    
+    def __init__(self, size = TIMING_SAMPLES):
+        ## \brief A collections.deque of floats. The most recent durations in seconds. Older samples are dropped.
+        self._samples = collections.deque(maxlen = size)
+        ## \brief An integer. Number of samples that have been added, including the dropped ones.
+        self.count = 0
+
+    ## \brief This method adds a sample.
     #
-    #  \param [font_size] An integer. Specifies the font size in pixels which is used to draw the value in the cell.
+    #  \param [seconds] A float. The duration in seconds.
     #
-    #  \param [num_rows] An integer. It contains the number of rows of the playing field (normally 6).
+    #  \returns Nothing.
+    #    
+    def add(self, seconds):
+        self._samples.append(seconds)
+        self.count += 1
+
+    ## \brief This method calculates percentiles of the samples that are kept.
     #
-    #  \param [num_columns] An integer. It contains the number of columns of the playing field (normally 5).
+    #  \param [percents] A list of numbers between 0 and 100.
     #
-    #  \param [has_border] A boolean. Has to be true if the cell is to be drawn with a border. Row 0 contains the
-    #         column headers. These are normally drawn wthout a border.
+    #  \returns A list of floats. The percentiles in seconds in the order of percents. 0.0 if there are no samples.
+    #    
+    def percentiles(self, percents):
+        samples = sorted(self._samples)
+        result = [0.0] * len(percents)
+        
+        if len(samples) > 0:
+            result = [samples[min(len(samples) - 1, (len(samples) * i) // 100)] for i in percents]
+        
+        return result
+
+    ## \brief This method sorts the samples that are kept into the buckets defined by TIMING_BUCKETS.
     #
-    #  \returns Nothing.
-    #        
-    def draw_cell(self, logical_x, logical_y, label, font_size, num_rows, num_columns, has_border = False):
-        font = pygame.font.Font(None, font_size)
-        bg_rect = self._background.get_rect()
+    #  \returns A list of integers. The number of samples in each bucket. The last element counts the samples which
+    #           are larger than all bounds.
+    #    
+    def buckets(self):
+        result = [0] * (len(TIMING_BUCKETS) + 1)
+        
+        for i in self._samples:
+            result[bisect.bisect_left(TIMING_BUCKETS, i)] += 1
+        
+        return result
 
-        cell_width = bg_rect.width // num_columns
-        cell_height = bg_rect.height // num_rows
-        cell_x = logical_x * cell_width
-        cell_y = logical_y * cell_height
-        cell_center_x = cell_x + (cell_width // 2)
-        cell_center_y = cell_y + (cell_height // 2)
 
-        if label != '':
-            text = font.render(label, 1, (255, 255, 255))
-            textpos = text.get_rect()
-            textpos.centerx = cell_center_x
-            textpos.centery = cell_center_y
-            self._background.blit(text, textpos)
-                
-        if has_border:
-            pygame.draw.rect(self._background, (255, 255, 255), (cell_x, cell_y, cell_width, cell_height), 1)
+## \brief This class collects the durations of the spans into which the handling of each command is divided.
+#
+#  The spans are described by TIMING_SPANS:
+#  1. wait: Time the request has been waiting in the queue of the server.
+#  2. decode: Decoding the TLV object and checking the parameters.
+#  3. render: Executing the command, i.e. drawing into the background.
+#  4. process: The whole Processor.process() call.
+#  5. flip: Copying the changed parts of the background to the screen.
+#  6. latency: Time from the arrival of the request until the result is visible on the screen.
+#
+class TimingStats:
+    ## \brief Constructor. 
+    #
+    #  \param [size] An integer. The number of samples that are kept for each command and span.
+    #    
+    def __init__(self, size = TIMING_SAMPLES):
+        ## \brief An integer. The number of samples that are kept for each command and span.
+        self._size = size
+        ## \brief A dictionary. Maps tuples (command, span) to TimingHistogram objects.
+        self._histograms = {}
+        ## \brief A list of tuples (command, arrival). The commands that have changed the background since the last
+        #         frame. arrival is the time as returned by time.monotonic() at which the request has been received.
+        self._pending = []
+        ## \brief A float or None. The time as returned by time.monotonic() at which the request that is processed
+        #         next has been received. Is set by the server loop. If it is None the start of the processing is used.
+        self.arrival = None
 
-    ## \brief This method draws the whole playing field.
+    ## \brief This method adds the duration of a span.
     #
-    #  \param [playing_field] A dictionary of dictionaries. It contains the current state of the game.
+    #  \param [command] A string. The name of the command.
     #
-    #  The outmost dictionary has the category names as its keys. The values of each of these categories is another
-    #  dictionary that has the keys 20, 40, 60, 80, 100. The value of these keys is a third dictionary that has the
-    #  keys 'answeredby' and 'wronganswersby'. The vlaue for the 'answeredby' key is either None (when the question has
-    #  not been answered yet) or a string which specifies the name of the team that answered the question. The key
-    #  'wronganswersby' has a set() as its value which contains the names of the team(s) that have given a wrong answer
-    #  to the question.
+    #  \param [span] A string. One of TIMING_SPANS.
+    #
+    #  \param [seconds] A float. The duration in seconds.
     #
     #  \returns Nothing.
-    #                
-    def show_playing_field(self, playing_field):
-        # Background is black
-        self._background.fill((0, 0, 0))
-        col_headers = list(playing_field.keys())
-        col_headers.sort()
-                
-        current_col = 0
+    #    
+    def record(self, command, span, seconds):
+        key = (command, span)
         
-        for i in col_headers:
-            # Draw column headers with category names
-            self.draw_cell(current_col, 0, i, PLAYFIELD_FONT_SIZE, 6, 5, False)
-            current_row = 1
-
-            # Iterate over the questions in each catgory
-            for j in [20, 40, 60, 80, 100]:
-                l = ''
-                # If the question has not been answered yet print its value in the center of the cell
-                if playing_field[i][j]['answeredby'] == None:
-                    l = str(j)
-                self.draw_cell(current_col, current_row, l, PLAYFIELD_FONT_SIZE, 6, 5, True)                
-                current_row += 1
-                
-            current_col += 1
+        if key not in self._histograms:
+            self._histograms[key] = TimingHistogram(self._size)
+        
+        self._histograms[key].add(seconds)
 
-    ## \brief This method displays a message which gives information about the final result of the game.
+    ## \brief This method has to be called when Processor.process() has finished a command.
     #
-    #  \param [result_dict] A dictionary. It contains the the result of the game.
+    #  \param [command] A string. The name of the command.
     #
-    #  The dictionary result_dict maps a string key to an int value. Each key is the name of a team and its value
-    #  is the number of points earned by the corresponding team.
+    #  \param [start] A float. The time as returned by time.perf_counter() at which the processing has started.
+    #
+    #  \param [draws] A boolean. True if the command has changed the background. The flip and latency spans are
+    #         recorded with the next frame.
     #
     #  \returns Nothing.
-    #                
-    def show_result(self, result_dict):
-        lines = ['ENDSTAND', '']
-        help = []
-
-        # transform dictionary into a list of the form [(team1, points_team1), (team2, points_team2), ... ]
-        for i in result_dict:
-            help.append((i, result_dict[i]))
+    #    
+    def command_done(self, command, start, draws):
+        duration = time.perf_counter() - start
+        arrival = self.arrival
+        
+        if arrival == None:
+            arrival = time.monotonic() - duration
+        else:
+            self.record(command, 'wait', max(0.0, (time.monotonic() - duration) - arrival))
+        
+        self.record(command, 'process', duration)
+        
+        if draws:
+            self._pending.append((command, arrival))
 
-        # Sort the help list according to the number of points in descending order
-        help.sort(key=lambda x: x[1], reverse=True)
+    ## \brief This method has to be called when a frame has been copied to the screen.
+    #
+    #  \param [seconds] A float. The time spent for copying the frame.
+    #
+    #  \returns Nothing.
+    #    
+    def frame_done(self, seconds):
+        now = time.monotonic()
+        
+        for command, arrival in self._pending:
+            self.record(command, 'flip', seconds)
+            self.record(command, 'latency', now - arrival)
+        
+        self._pending = []
 
-        # Prepare text for each team
-        for i in help:
-            lines.append('Team {}: {}'.format(i[0], i[1]))
+    ## \brief This method returns the commands and spans for which durations have been recorded.
+    #
+    #  \returns A list of tuples (command, span, histogram) sorted by command and in the order of TIMING_SPANS.
+    #           histogram is a TimingHistogram object.
+    #    
+    def entries(self):
+        keys = sorted(self._histograms, key = lambda x: (x[0], TIMING_SPANS.index(x[1])))
+        
+        return [(i[0], i[1], self._histograms[i]) for i in keys]
 
-        # Print text        
-        self.print_centered(lines, RESULT_FONT_SIZE)        
+    ## \brief This method returns a short summary for the timing overlay.
+    #
+    #  \returns A list of strings. One line for each command.
+    #    
+    def summary(self):
+        result = ['command          render p50/p99   latency p50/p99 (ms)']
+        commands = sorted(set(i[0] for i in self._histograms))
+        
+        for i in commands:
+            render = [0.0, 0.0]
+            latency = [0.0, 0.0]
+            
+            if (i, 'render') in self._histograms:
+                render = self._histograms[(i, 'render')].percentiles([50, 99])
+            
+            if (i, 'latency') in self._histograms:
+                latency = self._histograms[(i, 'latency')].percentiles([50, 99])
+            
+            result.append('{:<16} {:>6.1f} {:>6.1f}     {:>6.1f} {:>6.1f}'.format(i, render[0] * 1000, render[1] * 1000, latency[0] * 1000, latency[1] * 1000))
+        
+        return result
 
-    ## \brief This method displays a message on the screen in such a way that it is horizontally and vertically centered.
+    ## \brief This method returns a textual dump of all statistics.
     #
-    #  \param [line] A list of strings. Each string is printed as a separate line.
+    #  \returns A string.
+    #    
+    def report(self):
+        bounds = ' '.join('<{:g}'.format(i * 1000) for i in TIMING_BUCKETS) + ' more'
+        lines = ['Timings in ms (last {} samples per span), histogram buckets: {}'.format(self._size, bounds)]
+        
+        for command, span, histogram in self.entries():
+            p50, p90, p99, p100 = histogram.percentiles([50, 90, 99, 100])
+            lines.append('  {:<16} {:<8} n={:<6} p50={:<8.2f} p90={:<8.2f} p99={:<8.2f} max={:<8.2f} [{}]'.format(
+                command, span, histogram.count, p50 * 1000, p90 * 1000, p99 * 1000, p100 * 1000, ' '.join(str(i) for i in histogram.buckets())))
+        
+        return '\n'.join(lines)
+
+
+## \brief This class holds the geometry of a scene that shows centered lines of text.
+#
+class TextLayout:
+    ## \brief Constructor. 
     #
-    #  \param [font_size] An integer. It specifies the font size in pixels which is used to display the message.
+    #  \param [area] A pygame.Rect object. The area in which the text is centered.
     #
-    #  \returns Nothing.
-    #                
-    def print_centered(self, lines, font_size):
-        # Calculate the height of a single line
-        line_sep = (font_size // 2) + (font_size // 3)
-        # Calculate the y-position of the first line
-        y_offset = -((len(lines) // 2) * line_sep)
+    #  \param [font_size] An integer. The size of the font in pixels.
+    #    
+    def __init__(self, area, font_size):
+        ## \brief An integer. The size of the font in pixels.
+        self.font_size = font_size
+        ## \brief An integer. The distance in pixels between the centers of two lines.
+        self.line_sep = (font_size // 2) + (font_size // 3)
+        ## \brief A tuple (x, y). The center of the area.
+        self.center = area.center
 
-        # Background is black
-        self._background.fill((0, 0, 0))        
-        font = pygame.font.Font(None, font_size)
+    ## \brief This method calculates the vertical positions of the lines of a message.
+    #
+    #  \param [num_lines] An integer. The number of lines.
+    #
+    #  \returns A list of integers. The y coordinates of the centers of the lines.
+    #    
+    def line_centers(self, num_lines):
+        first = self.center[1] - ((num_lines // 2) * self.line_sep)
+        
+        return [first + (i * self.line_sep) for i in range(num_lines)]
 
-        # Draw lines
-        for i in lines:
-            # Text is in white
-            text = font.render(i, 1, (255, 255, 255))
-            textpos = text.get_rect()
-            textpos.centerx = self._background.get_rect().centerx 
-            textpos.centery = self._background.get_rect().centery + y_offset
-            self._background.blit(text, textpos)
-            y_offset += line_sep
 
-    ## \brief This method displays a predefined intro message on the screen
+## \brief This class holds the geometry of the scene that shows a question and the time that is left for answering it.
+#
+class QuestionLayout(TextLayout):
+    ## \brief Constructor. 
     #
-    #  \returns Nothing.
-    #                        
-    def show_intro(self):
-        self.print_centered(['DAS', 'GROSSE', 'QUIZ'], INTRO_FONT_SIZE)
-
-    ## \brief This method displays a predefined "Thank you" message on the screen
+    #  \param [area] A pygame.Rect object. The area in which the question is centered.
     #
-    #  \returns Nothing.
-    #                        
-    def show_thanks(self):
-        self.print_centered(['Wir hoffen ihr hattet etwas Spaß', 'DANKE an alle, die mitgeholfen haben'], THANKS_FONT_SIZE)
+    #  \param [font_size] An integer. The size of the font of the question in pixels.
+    #    
+    def __init__(self, area, font_size):
+        TextLayout.__init__(self, area, font_size)
+        ## \brief An integer. The size of the font of the time in pixels.
+        self.time_font_size = (font_size * 3) // 2
+        ## \brief A tuple (x, y). The center of the time above the question.
+        self.time_center = (area.centerx, area.top + self.time_font_size)
 
-    ## \brief This method displays a question on the screen.
+
+## \brief This class holds the geometry of the playing field.
+#
+class PlayingFieldLayout:
+    ## \brief Constructor. 
     #
-    #  \param [question] A string. If the string contains '#' characters each of them is interpreted as a line break.
+    #  \param [area] A pygame.Rect object. The area covered by the playing field.
     #
-    #  \param [time] An integer. It specifies the time in seconds which is left for answering the question. A negative
-    #                value ha to be used to indicate that not time value should be displayed.
+    #  \param [font_size] An integer. The size of the font in pixels.
     #    
-    #  \returns Nothing.
-    #                                
-    def show_question(self, question, time):
-        font_size = QUESTION_FONT_SIZE
-        time_font_size = (font_size * 3) // 2
-        question = question.split('#')
-        self.print_centered(question, font_size)
+    #  \param [num_rows] An integer. The number of rows of the playing field.
+    #    
+    #  \param [num_columns] An integer. The number of columns of the playing field.
+    #    
+    def __init__(self, area, font_size, num_rows = PLAYFIELD_ROWS, num_columns = PLAYFIELD_COLUMNS):
+        cell_width = area.width // num_columns
+        cell_height = area.height // num_rows
+        ## \brief An integer. The size of the font in pixels.
+        self.font_size = font_size
+        ## \brief A list of lists of pygame.Rect objects. cells[x][y] is the area covered by the cell in column x and
+        #         row y. The objects must not be modified.
+        self.cells = [[pygame.Rect(area.left + (x * cell_width), area.top + (y * cell_height), cell_width, cell_height) for y in range(num_rows)] for x in range(num_columns)]
 
-        if time >= 0:        
-            font = pygame.font.Font(None, time_font_size)
-            text = font.render('{:03d}'.format(time), 1, (255, 255, 255))
-            textpos = text.get_rect()
-            textpos.centerx = self._background.get_rect().centerx 
-            textpos.centery = time_font_size
-            self._background.blit(text, textpos)
 
-## \brief The main function of this program.
+## \brief This class holds the geometry of all scenes for a given screen size. It is computed once when the screen is
+#         opened or resized.
+#
+#  The font sizes have been designed for a window of PLAYING_FIELD_X x PLAYING_FIELD_Y pixels. They are scaled with the
+#  reference width, which is the width of the screen or, if the screen is wider than 4:3, the width of a 4:3 area of the
+#  same height.
 #
-def main():
-    # Create server socket
-    serversocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)    
-    serversocket.bind(('', PORT))
-    serversocket.listen(5)
+class Layout:
+    ## \brief Constructor. 
+    #
+    #  \param [size] A tuple (width, height). The size of the background in pixels.
+    #
+    #  \param [font_percent] An integer. Scales all font sizes in percent.
+    #    
+    def __init__(self, size, font_percent = FONT_PERCENT):
+        area = pygame.Rect((0, 0), size)
+        scale = (min(area.width, (area.height * PLAYING_FIELD_X) // PLAYING_FIELD_Y) * font_percent) // 100
+        ## \brief A tuple (width, height). The size of the background in pixels.
+        self.size = area.size
+        ## \brief A QuestionLayout object. Used by Processor.show_question().
+        self.question = QuestionLayout(area, (scale * QUESTION_FONT_SCALE) // 100000)
+        ## \brief A TextLayout object. Used by Processor.show_intro().
+        self.intro = TextLayout(area, (scale * INTRO_FONT_SCALE) // 100000)
+        ## \brief A TextLayout object. Used by Processor.show_result().
+        self.result = TextLayout(area, (scale * RESULT_FONT_SCALE) // 100000)
+        ## \brief A TextLayout object. Used by Processor.show_thanks().
+        self.thanks = TextLayout(area, (scale * THANKS_FONT_SCALE) // 100000)
+        ## \brief A PlayingFieldLayout object. Used by Processor.show_playing_field().
+        self.playing_field = PlayingFieldLayout(area, (scale * PLAYFIELD_FONT_SCALE) // 100000)
 
-    # Initialize pygame stuff
-    pygame.init()
-    size = width, height = PLAYING_FIELD_X, PLAYING_FIELD_Y
-    black = 0, 0, 0    
-    screen = pygame.display.set_mode(size)
-    pygame.display.set_caption('Das große Quiz')
-    screen.fill(black)            
-    pygame.display.flip()
 
-    background = pygame.Surface(screen.get_size())
-    background = background.convert()    
-    
-    proc = Processor(background)    
-    force_stop = False
-
-    # Wait for client to connect    
-    (client_socket, address) = serversocket.accept()
-    # Main loop
-    while not (proc.stop or force_stop):
-        # Process pygame events
-        try:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    force_stop = True
-                    continue
+## \brief This class keeps track of the time that is left for answering a question. It is based on a monotonic clock,
+#         i.e. it does not drift and is not affected by changes of the system time.
+#
+class Countdown:
+    ## \brief Constructor. 
+    #
+    #  \param [clock] A callable without parameters which returns the current time in seconds as a float.
+    #    
+    def __init__(self, clock = time.monotonic):
+        ## \brief A callable. Returns the current time.
+        self._clock = clock
+        ## \brief A float or None. The point in time at which the countdown reaches zero. None if it is not running.
+        self._deadline = None
+        ## \brief A float or None. The time in seconds that was left when the countdown was paused. None if it is not
+        #         paused.
+        self._paused_left = None
 
-            # Test if a client has sent a message                    
-            sel_res = select.select([client_socket], [], [], 0)
+    ## \brief This property returns true if the countdown is running.
+    #
+    #  \returns A boolean.
+    #    
+    @property
+    def running(self):
+        return self._deadline != None
 
-            # Yes! Handle it.
-            if len(sel_res[0]) > 0:
-                tlvobject.TlvStream.transact_server(client_socket, proc)
+    ## \brief This method starts the countdown.
+    #
+    #  \param [seconds] An integer. The number of seconds until the countdown reaches zero.
+    #
+    #  \returns Nothing.
+    #    
+    def start(self, seconds):
+        self._deadline = self._clock() + seconds
+        self._paused_left = None
 
-            # Make processing result visible
-            screen.blit(background, (0, 0))
-            pygame.display.flip()
+    ## \brief This method pauses a running countdown.
+    #
+    #  \returns Nothing.
+    #    
+    def pause(self):
+        if self.running:
+            self._paused_left = max(0.0, self._deadline - self._clock())
+            self._deadline = None
 
-        except:
-            force_stop = True
-            print("Bummer!")
-
-    # Shutdown. The sleep is intended to make sure that the client closes the connection first. This
-    # prevents the server socket to enter the TIME_WAIT state. If that happens the port is blocked and the server
-    # can not be restarted until the server socket is finally disposed by the operating system.
-    time.sleep(0.3)
-    client_socket.shutdown(socket.SHUT_RDWR)
-    client_socket.close()
-    serversocket.shutdown(socket.SHUT_RDWR)
-    serversocket.close()
+    ## \brief This method resumes a paused countdown.
+    #
+    #  \returns Nothing.
+    #    
+    def resume(self):
+        if self._paused_left != None:
+            self._deadline = self._clock() + self._paused_left
+            self._paused_left = None
 
-if __name__ == "__main__":    
-    main()
+    ## \brief This method stops the countdown. It can not be resumed afterwards.
+    #
+    #  \returns Nothing.
+    #    
+    def stop(self):
+        self._deadline = None
+        self._paused_left = None
+
+    ## \brief This method returns the number of whole seconds that are left. The value is rounded up, i.e. it only
+    #         reaches zero when the deadline has passed.
+    #
+    #  \returns An integer or None if the countdown is neither running nor paused.
+    #    
+    def seconds_left(self):
+        result = None
+        
+        if self.running:
+            result = max(0, math.ceil(self._deadline - self._clock()))
+        elif self._paused_left != None:
+            result = math.ceil(self._paused_left)
+        
+        return result
+
+    ## \brief This method returns the time until seconds_left() changes its value next.
+    #
+    #  \returns A float or None if the value does not change any more.
+    #    
+    def delay(self):
+        result = None
+        
+        if self.running:
+            left = self._deadline - self._clock()
+            
+            if left > 0.0:
+                result = left - (math.ceil(left) - 1)
+        
+        return result
+
+
+## \brief This class connects a command to the method that executes it and keeps statistics about its executions.
+#
+class CommandHandler:
+    ## \brief Constructor. 
+    #
+    #  \param [schema] A displayschema.MessageSchema object. Declares the name and the parameters of the command and
+    #         whether it draws into the background.
+    #
+    #  \param [action] A callable. It receives the parameters as decoded by the schema and executes the command.
+    #    
+    def __init__(self, schema, action):
+        ## \brief A displayschema.MessageSchema object. Describes the command.
+        self.schema = schema
+        ## \brief A callable. Executes the command.
+        self.action = action
+        ## \brief An integer. Number of times the command has been received.
+        self.calls = 0
+        ## \brief An integer. Number of times the command has been malformed or has failed.
+        self.errors = 0
+        ## \brief An integer. Number of times the command has been answered without being executed because a later
+        #         command replaced it. These are not counted as calls.
+        self.superseded = 0
+        ## \brief A TimingHistogram object. The time spent executing the command.
+        self.latency = TimingHistogram()
+
+    ## \brief This method checks and decodes the parameters of the command and prepares its execution.
+    #
+    #  \param [params] A sequence. Its first element is the name of the command, the others are its parameters.
+    #
+    #  \returns A tuple (draws, action, handler) as described in Processor.parse_command(). A tlvobject.TlvException
+    #           is raised if parameters are missing or malformed.
+    #    
+    def prepare(self, params):
+        try:
+            args = self.schema.decode(params)
+        except tlvobject.TlvException:
+            self.calls += 1
+            self.errors += 1
+            raise
+        
+        return (self.schema.draws, lambda: self.action(*args), self)
+
+    ## \brief This method executes a prepared command and records its outcome.
+    #
+    #  \param [action] A callable without parameters as returned by prepare().
+    #
+    #  \returns Nothing. The exception raised by action is passed on.
+    #    
+    def run(self, action):
+        self.calls += 1
+        start = time.perf_counter()
+        
+        try:
+            action()
+        except:
+            self.errors += 1
+            raise
+        
+        self.latency.add(time.perf_counter() - start)
+
+
+## \brief This class maps the names of the commands to CommandHandler objects. New commands are added by registering
+#         a handler, the dispatcher in Processor.parse_command() does not need to know them.
+#
+class CommandRegistry:
+    ## \brief Constructor. 
+    #
+    def __init__(self):
+        ## \brief A dictionary. Maps the name of each command to its CommandHandler object.
+        self._handlers = {}
+        ## \brief An integer. Number of commands which have been received but are not registered.
+        self.unknown = 0
+
+    ## \brief This method registers a command.
+    #
+    #  \param [schema] A displayschema.MessageSchema object. Describes the command.
+    #
+    #  \param [action] A callable. It receives the parameters as decoded by the schema and executes the command.
+    #
+    #  \returns A CommandHandler object. A ValueError is raised if a command with the same name has been registered
+    #           before.
+    #    
+    def register(self, schema, action):
+        if schema.name in self._handlers:
+            raise ValueError('Command {} is already registered'.format(schema.name))
+        
+        handler = CommandHandler(schema, action)
+        self._handlers[schema.name] = handler
+        
+        return handler
+
+    ## \brief This method returns the handler of a command.
+    #
+    #  \param [name] The name of the command. Usually a string.
+    #
+    #  \returns A CommandHandler object or None if the command is not registered. In this case it is counted as unknown.
+    #    
+    def lookup(self, name):
+        result = None
+        
+        if isinstance(name, str):
+            result = self._handlers.get(name)
+        
+        if result == None:
+            self.unknown += 1
+        
+        return result
+
+    ## \brief This method returns the handlers of all registered commands.
+    #
+    #  \returns A list of CommandHandler objects sorted by the name of the command.
+    #    
+    def handlers(self):
+        return [self._handlers[i] for i in sorted(self._handlers)]
+
+    ## \brief This method returns a textual summary of the statistics of all commands which have been received.
+    #
+    #  \returns A string.
+    #    
+    def report(self):
+        lines = ['Commands: {} unknown'.format(self.unknown)]
+        
+        for i in self.handlers():
+            if (i.calls > 0) or (i.superseded > 0):
+                p50, p90, p99 = i.latency.percentiles([50, 90, 99])
+                lines.append('  {:<16} calls={:<6} errors={:<6} superseded={:<6} p50={:.2f} ms p90={:.2f} ms p99={:.2f} ms'.format(
+                    i.schema.name, i.calls, i.errors, i.superseded, p50 * 1000, p90 * 1000, p99 * 1000))
+        
+        return '\n'.join(lines)
+
+
+## \brief This class knows how to draw the playing field and how to render textual messages using
+#         the pygame library.
+#
+#  This class knows eleven commands.
+#  1. stop: Does not draw anything but changes self._stop_flag to true.
+#  2. showqestion: Draws a textual message representing a question.
+#  3. showintro: Draws an intro message into the background surface.
+#  4. danksagung: Displays a "Thank you" message.
+#  5. showresult: Displays the end result.
+#  6. showplayingfield: Displays the playing field from which the players can choose questions.
+#  7. startcountdown: Draws a question and counts down the time that is left for answering it.
+#  8. pausecountdown: Pauses the countdown.
+#  9. resumecountdown: Resumes the countdown.
+#  10. stopcountdown: Stops the countdown.
+#  11. batch: Executes a sequence of the commands above which is sent in a single message.
+#
+#  Further commands can be added via register_command().
+#
+class Processor:
+    ## \brief Constructor. 
+    #
+    #  \param [background] Is an object of type pygame.Surface. It has the size of the screen. All drawing this class
+    #         does is relative to this Surface.
+    #
+    #  \param [fonts] Is a FontCache object or None. If it is None a new cache is created.
+    #
+    #  \param [texts] Is a TextCache object or None. If it is None a new cache that uses the font cache is created.
+    #
+    #  \param [timings] Is a TimingStats object or None. If it is None a new object is created.
+    #
+    #  \param [font_percent] An integer. Scales all font sizes in percent.
+    #    
+    def __init__(self, background, fonts = None, texts = None, timings = None, font_percent = FONT_PERCENT):
+        ## \brief A boolean. Is set to true after the stop command has been received
+        self._stop_flag = False
+        ## \brief A boolean. Is set to true when the whole background has to be copied to the screen
+        self._full_redraw = False
+        ## \brief A list of pygame.Rect objects. Contains the parts of the background that have changed and have not
+        #         been copied to the screen yet.
+        self._dirty_rects = []
+        ## \brief A tuple (col_headers, labels) or None. Describes the playing field that is currently shown on the
+        #         background. col_headers is the sorted list of category names and labels a dictionary that maps the
+        #         logical coordinates (x, y) of each question cell to its label. None if the background shows something else.
+        self._board = None
+        ## \brief A Countdown object. Counts down the time that is left for answering the question that is shown.
+        self._countdown = Countdown()
+        ## \brief A pygame.Rect object or None. The area in which the time of the question that is shown has been
+        #         drawn. None if no time is shown.
+        self._time_rect = None
+        ## \brief An integer or None. The number of seconds that is shown by the countdown. None if no time is shown.
+        self._shown_time = None
+        ## \brief An object of type pygame.Surface. Represents the pygame window in which all drawing happens
+        self._background = background
+        ## \brief An integer. Scales all font sizes in percent.
+        self._font_percent = font_percent
+        ## \brief A Layout object. Holds the geometry of all scenes for the size of the background.
+        self._layout = Layout(background.get_size(), font_percent)
+        ## \brief A callable without parameters or None. Draws the scene that is shown again, e.g. after the size of
+        #         the screen has changed.
+        self._scene = None
+        ## \brief A FontCache object. Provides all fonts used for drawing.
+        self._fonts = fonts
+        
+        if self._fonts == None:
+            self._fonts = FontCache()
+        
+        ## \brief A TextCache object. Renders all texts.
+        self._texts = texts
+        
+        if self._texts == None:
+            self._texts = TextCache(self._fonts)
+        
+        ## \brief A TimingStats object. Collects the durations of the spans of all commands.
+        self._timings = timings
+        
+        if self._timings == None:
+            self._timings = TimingStats()
+        ## \brief A CommandRegistry object. Maps the name of each command to the handler that executes it. The
+        #         parameters of the command as decoded by its displayschema.MessageSchema are passed to the handler.
+        self._commands = CommandRegistry()
+        self.register_command(displayschema.STOP, self.request_stop)
+        self.register_command(displayschema.SHOW_QUESTION, self.show_question)
+        self.register_command(displayschema.SHOW_INTRO, self.show_intro)
+        self.register_command(displayschema.SHOW_THANKS, self.show_thanks)
+        self.register_command(displayschema.SHOW_RESULT, self.show_result)
+        self.register_command(displayschema.SHOW_PLAYING_FIELD, self.show_playing_field)
+        self.register_command(displayschema.START_COUNTDOWN, self.start_countdown)
+        self.register_command(displayschema.PAUSE_COUNTDOWN, self._countdown.pause)
+        self.register_command(displayschema.RESUME_COUNTDOWN, self._countdown.resume)
+        self.register_command(displayschema.STOP_COUNTDOWN, self._countdown.stop)
+        
+    ## \brief This method adds a command, e.g. a new type of scene. A drawing command has to draw the whole scene
+    #         into the background and mark the background as dirty.
+    #
+    #  \param [schema] A displayschema.MessageSchema object. Declares the name and the parameters of the command and
+    #         whether it draws into the background.
+    #
+    #  \param [action] A callable. It receives the parameters as decoded by the schema and executes the command.
+    #
+    #  \returns A CommandHandler object. It collects the statistics of the command.
+    #        
+    def register_command(self, schema, action):
+        return self._commands.register(schema, action)
+
+    ## \brief This property returns the registry of all commands this object knows.
+    #
+    #  \returns A CommandRegistry object.
+    #    
+    @property
+    def commands(self):
+        return self._commands
+
+    ## \brief This property returns the current value of the stop flag. 
+    #
+    #  \returns A boolean. If true is returned the stop command has been received.
+    #    
+    @property
+    def stop(self):
+        return self._stop_flag    
+
+    ## \brief This property returns the timing statistics of the commands.
+    #
+    #  \returns A TimingStats object.
+    #    
+    @property
+    def timings(self):
+        return self._timings
+
+    ## \brief This property returns the geometry of all scenes.
+    #
+    #  \returns A Layout object.
+    #    
+    @property
+    def layout(self):
+        return self._layout
+
+    ## \brief This method replaces the background, e.g. because the size of the screen has changed. The layout is
+    #         recomputed and the scene that has been shown is drawn again.
+    #
+    #  \param [background] Is an object of type pygame.Surface. It has the new size of the screen.
+    #
+    #  \returns Nothing.
+    #    
+    def resize(self, background):
+        self._background = background
+        self._layout = Layout(background.get_size(), self._font_percent)
+        self._board = None
+        self._time_rect = None
+        self._background.fill((0, 0, 0))
+        self.mark_dirty()
+        
+        if self._scene != None:
+            self._scene()
+
+    ## \brief This property returns the surface on which all drawing happens.
+    #
+    #  \returns An object of type pygame.Surface.
+    #    
+    @property
+    def background(self):
+        return self._background
+
+    ## \brief This property returns the cache which provides the fonts used for drawing.
+    #
+    #  \returns A FontCache object.
+    #    
+    @property
+    def fonts(self):
+        return self._fonts
+
+    ## \brief This property returns the cache which renders all texts.
+    #
+    #  \returns A TextCache object.
+    #    
+    @property
+    def texts(self):
+        return self._texts
+
+    ## \brief This property returns true if the background has changed since take_dirty_rects() has been called.
+    #
+    #  \returns A boolean.
+    #    
+    @property
+    def dirty(self):
+        return self._full_redraw or (len(self._dirty_rects) > 0)
+
+    ## \brief This method records that a part of the background has changed.
+    #
+    #  \param [rect] A pygame.Rect object or None. None means that the whole background has changed.
+    #
+    #  \returns Nothing.
+    #    
+    def mark_dirty(self, rect = None):
+        if rect == None:
+            self._full_redraw = True
+        else:
+            self._dirty_rects.append(rect)
+
+    ## \brief This method returns the parts of the background that have changed and resets them. It has to be called
+    #         when the background is copied to the screen.
+    #
+    #  \returns A list of pygame.Rect objects or None if the whole background has to be copied.
+    #    
+    def take_dirty_rects(self):
+        result = self._dirty_rects
+        
+        if self._full_redraw:
+            result = None
+        
+        self._full_redraw = False
+        self._dirty_rects = []
+        
+        return result
+
+    ## \brief This method requests that the background is copied to the screen again, e.g. because the window has
+    #         been uncovered.
+    #
+    #  \returns Nothing.
+    #    
+    def invalidate(self):
+        self.mark_dirty()
+
+    ## \brief This method executes a command that has been prepared by parse_command().
+    #
+    #  \param [command] A tuple (draws, action, handler) as returned by parse_command().
+    #
+    #  \returns Nothing.
+    #    
+    def execute(self, command):
+        scene = self._scene
+        
+        if command[0]:
+            # A new scene replaces the question. Therefore its countdown ends.
+            self._countdown.stop()
+            self._scene = None
+        
+        try:
+            command[2].run(command[1])
+        except:
+            if command[0]:
+                # The background may have been changed partially. It can not be updated incrementally any more.
+                self._board = None
+                self._scene = scene
+                self.mark_dirty()
+            
+            raise
+        
+        # A command can provide its own way of drawing the scene again
+        if command[0] and (self._scene == None):
+            self._scene = command[1]
+
+    ## \brief This method parses the data received from the client, selects the handling method and executes it.
+    #
+    #  \param [tlv_param] An object of type tlvobject.TlvEntry. Contains the data sent by the client.
+    #
+    #  \returns A tlvobject.TlvEntry object which contains an integer value. The integer value represents the
+    #           error code sent back to the client. A return value of 0 signifies success.
+    #        
+    def process(self, tlv_param):
+        result = tlvobject.TlvEntry().to_int(ERR_OK)
+        start = time.perf_counter()
+        name = None
+        draws = False
+        
+        try:                        
+            # The whole command is decoded in a single pass into lists and native values
+            params = tlv_param.decode()
+
+            if (len(params) > 0) and (params[0] == 'batch'):
+                name = params[0]
+                result = self.process_batch(params[1:])
+                draws = self.dirty
+            else:
+                command = self.parse_command(params)
+                
+                if command == None:
+                    result.to_int(ERR_ERROR)
+                else:
+                    name = params[0]
+                    draws = command[0]
+                    decoded = time.perf_counter()
+                    self._timings.record(name, 'decode', decoded - start)
+                    self.execute(command)
+                    self._timings.record(name, 'render', time.perf_counter() - decoded)
+            
+        except:
+            result.to_int(ERR_ERROR)
+        
+        if name != None:
+            self._timings.command_done(name, start, draws)
+        
+        return result
+
+    ## \brief This method executes the commands contained in a batch message. The batch is executed atomically: If any of
+    #         its commands is malformed none of them is executed. As each drawing command replaces the whole contents of the
+    #         background only the last drawing command of the batch is actually executed, i.e. the screen is drawn once.
+    #
+    #  \param [commands] A sequence of sequences. Each inner sequence contains a command and its parameters in the form
+    #         that is accepted by parse_command().
+    #
+    #  \returns A tlvobject.TlvEntry object which contains a sequence of integer values. Each integer value represents
+    #           the error code of the corresponding command. A value of 0 signifies success.
+    #        
+    def process_batch(self, commands):
+        parsed = []
+        codes = []
+        last_drawing = -1
+        
+        for i in commands:
+            command = None
+            
+            try:
+                if isinstance(i, list) and ((len(i) == 0) or (i[0] != 'batch')):
+                    command = self.parse_command(i)
+            except:
+                command = None
+            
+            if command == None:
+                parsed = None
+                break
+            
+            if command[0]:
+                last_drawing = len(parsed)
+            
+            parsed.append(command)
+        
+        if parsed == None:
+            codes = [ERR_ERROR] * len(commands)
+        else:
+            for index, command in enumerate(parsed):
+                code = ERR_OK
+                
+                # Drawing commands which are followed by another drawing command are superseded
+                if (not command[0]) or (index == last_drawing):
+                    try:
+                        self.execute(command)
+                    except:
+                        code = ERR_ERROR
+                else:
+                    command[2].superseded += 1
+                
+                codes.append(code)
+        
+        return tlvobject.TlvEntry().to_sequence([tlvobject.TlvEntry().to_int(i) for i in codes])
+
+    ## \brief This method checks the name and the parameters of a command and prepares its execution. The parameters are
+    #         checked and decoded according to the displayschema.MessageSchema of the command.
+    #
+    #  \param [params] A sequence. Its first element is the name of the command, the others are its parameters.
+    #
+    #  \returns A tuple (draws, action, handler) or None if the command is unknown. draws is a boolean which is True if
+    #           the command draws into the background. action is a callable without parameters that executes the
+    #           command and handler is the CommandHandler object of the command. A tlvobject.TlvException is raised if
+    #           parameters are missing or malformed.
+    #        
+    def parse_command(self, params):
+        result = None
+        handler = None
+        
+        if len(params) > 0:
+            handler = self._commands.lookup(params[0])
+        
+        if handler != None:
+            result = handler.prepare(params)
+        
+        return result
+
+    ## \brief This method sets the stop flag.
+    #
+    #  \returns Nothing.
+    #        
+    def request_stop(self):
+        self._stop_flag = True
+
+    ## \brief The playing field consists of six rows and five columns. This method can be used to draw
+    #         each one of these 30 cells. The geometry is taken from the layout of the playing field.
+    #
+    #  \param [logical_x] An integer. It contains the logical x coordinate (0-4) of the cell which is to be drawn.
+    #
+    #  \param [logical_y] An integer. It contains the logical y coordinate (0-5) of the cell which is to be drawn.
+    #
+    #  \param [label] A string. It has to contain the text that is shown in the cell's center.
+    #
+    #  \param [has_border] A boolean. Has to be true if the cell is to be drawn with a border. Row 0 contains the
+    #         column headers. These are normally drawn wthout a border.
+    #
+    #  \returns Nothing.
+    #        
+    def draw_cell(self, logical_x, logical_y, label, has_border = False):
+        layout = self._layout.playing_field
+        cell = layout.cells[logical_x][logical_y]
+
+        if label != '':
+            text = self._texts.render(label, layout.font_size, (255, 255, 255))
+            textpos = text.get_rect()
+            textpos.center = cell.center
+            self._background.blit(text, textpos)
+                
+        if has_border:
+            pygame.draw.rect(self._background, (255, 255, 255), cell, 1)
+
+    ## \brief This method draws the whole playing field.
+    #
+    #  \param [playing_field] A dictionary of dictionaries. It contains the current state of the game.
+    #
+    #  The outmost dictionary has the category names as its keys. The values of each of these categories is another
+    #  dictionary that has the keys 20, 40, 60, 80, 100. The value of these keys is a third dictionary that has the
+    #  keys 'answeredby' and 'wronganswersby'. The vlaue for the 'answeredby' key is either None (when the question has
+    #  not been answered yet) or a string which specifies the name of the team that answered the question. The key
+    #  'wronganswersby' has a set() as its value which contains the names of the team(s) that have given a wrong answer
+    #  to the question.
+    #
+    #  If the background already shows a playing field with the same categories only the cells that have changed are
+    #  redrawn and marked as dirty.
+    #
+    #  \returns Nothing.
+    #                
+    def show_playing_field(self, playing_field):
+        col_headers = list(playing_field.keys())
+        col_headers.sort()
+        labels = {}
+                
+        current_col = 0
+        
+        for i in col_headers:
+            current_row = 1
+
+            # Iterate over the questions in each catgory
+            for j in displayschema.QUESTION_VALUES:
+                l = ''
+                # If the question has not been answered yet print its value in the center of the cell
+                if playing_field[i][j]['answeredby'] == None:
+                    l = str(j)
+                labels[(current_col, current_row)] = l
+                current_row += 1
+                
+            current_col += 1
+        
+        if (self._board != None) and (self._board[0] == col_headers):
+            # Only redraw the cells that have changed
+            for (x, y), l in labels.items():
+                if self._board[1][(x, y)] != l:
+                    cell = self._layout.playing_field.cells[x][y]
+                    self._background.fill((0, 0, 0), cell)
+                    self.draw_cell(x, y, l, True)
+                    self.mark_dirty(cell)
+        else:
+            # Background is black
+            self._background.fill((0, 0, 0))
+            
+            for x, i in enumerate(col_headers):
+                # Draw column headers with category names
+                self.draw_cell(x, 0, i, False)
+            
+            for (x, y), l in labels.items():
+                self.draw_cell(x, y, l, True)
+            
+            self.mark_dirty()
+        
+        self._board = (col_headers, labels)
+        self._time_rect = None
+        self._shown_time = None
+
+    ## \brief This method displays a message which gives information about the final result of the game.
+    #
+    #  \param [result_dict] A dictionary. It contains the the result of the game.
+    #
+    #  The dictionary result_dict maps a string key to an int value. Each key is the name of a team and its value
+    #  is the number of points earned by the corresponding team.
+    #
+    #  \returns Nothing.
+    #                
+    def show_result(self, result_dict):
+        lines = ['ENDSTAND', '']
+        help = []
+
+        # transform dictionary into a list of the form [(team1, points_team1), (team2, points_team2), ... ]
+        for i in result_dict:
+            help.append((i, result_dict[i]))
+
+        # Sort the help list according to the number of points in descending order
+        help.sort(key=lambda x: x[1], reverse=True)
+
+        # Prepare text for each team
+        for i in help:
+            lines.append('Team {}: {}'.format(i[0], i[1]))
+
+        # Print text        
+        self.print_centered(lines, self._layout.result)        
+
+    ## \brief This method displays a message on the screen in such a way that it is horizontally and vertically centered.
+    #
+    #  \param [line] A list of strings. Each string is printed as a separate line.
+    #
+    #  \param [layout] A TextLayout object. It specifies the font size and the position of the message.
+    #
+    #  \returns Nothing.
+    #                
+    def print_centered(self, lines, layout):
+        # Background is black
+        self._background.fill((0, 0, 0))        
+        self._board = None
+        self._time_rect = None
+        self._shown_time = None
+        self.mark_dirty()
+
+        # Draw lines
+        for i, y in zip(lines, layout.line_centers(len(lines))):
+            # Text is in white
+            text = self._texts.render(i, layout.font_size, (255, 255, 255))
+            textpos = text.get_rect()
+            textpos.center = (layout.center[0], y)
+            self._background.blit(text, textpos)
+
+    ## \brief This method displays a predefined intro message on the screen
+    #
+    #  \returns Nothing.
+    #                        
+    def show_intro(self):
+        self.print_centered(['DAS', 'GROSSE', 'QUIZ'], self._layout.intro)
+
+    ## \brief This method displays a predefined "Thank you" message on the screen
+    #
+    #  \returns Nothing.
+    #                        
+    def show_thanks(self):
+        self.print_centered(['Wir hoffen ihr hattet etwas Spaß', 'DANKE an alle, die mitgeholfen haben'], self._layout.thanks)
+
+    ## \brief This method displays a question on the screen.
+    #
+    #  \param [question] A string. If the string contains '#' characters each of them is interpreted as a line break.
+    #
+    #  \param [time] An integer. It specifies the time in seconds which is left for answering the question. A negative
+    #                value ha to be used to indicate that not time value should be displayed.
+    #    
+    #  \returns Nothing.
+    #                                
+    def show_question(self, question, time):
+        question = question.split('#')
+        self.print_centered(question, self._layout.question)
+
+        if time >= 0:        
+            self.draw_time(time)
+
+    ## \brief This method displays a question on the screen and starts counting down the time that is left for
+    #         answering it. The time on the screen is updated by tick().
+    #
+    #  \param [question] A string. If the string contains '#' characters each of them is interpreted as a line break.
+    #
+    #  \param [time] An integer. It specifies the time in seconds which is left for answering the question. If it is
+    #                negative no time is displayed and no countdown is started.
+    #    
+    #  \returns Nothing.
+    #                                
+    def start_countdown(self, question, time):
+        self.show_question(question, time)
+        
+        if time > 0:
+            self._countdown.start(time)
+            # Drawing the scene again must not restart the countdown
+            self._scene = lambda: self.redraw_countdown(question)
+
+    ## \brief This method draws a question whose countdown has been started by start_countdown() again, e.g. after the
+    #         size of the screen has changed. The countdown itself is left alone, i.e. a running countdown keeps running
+    #         and a paused one stays paused.
+    #
+    #  \param [question] A string. If the string contains '#' characters each of them is interpreted as a line break.
+    #    
+    #  \returns Nothing.
+    #                                
+    def redraw_countdown(self, question):
+        left = self._countdown.seconds_left()
+        
+        if left == None:
+            # The countdown has been stopped. The time at which it stopped remains visible.
+            left = self._shown_time
+        
+        self.show_question(question, left)
+
+    ## \brief This method replaces the time that is shown above the question. Only the area covered by the old and
+    #         the new time is marked as dirty.
+    #
+    #  \param [time] An integer. The number of seconds to show.
+    #    
+    #  \returns Nothing.
+    #                                
+    def draw_time(self, time):
+        layout = self._layout.question
+        text = self._texts.render('{:03d}'.format(time), layout.time_font_size, (255, 255, 255))
+        textpos = text.get_rect()
+        textpos.center = layout.time_center
+        dirty = textpos
+        
+        if self._time_rect != None:
+            self._background.fill((0, 0, 0), self._time_rect)
+            dirty = textpos.union(self._time_rect)
+        
+        self._background.blit(text, textpos)
+        self._time_rect = textpos
+        self._shown_time = time
+        self.mark_dirty(dirty)
+
+    ## \brief This method updates the time shown on the screen if a countdown is running. It has to be called
+    #         regularly by the server loop.
+    #
+    #  \returns Nothing.
+    #                                
+    def tick(self):
+        if self._countdown.running:
+            left = self._countdown.seconds_left()
+            
+            if left != self._shown_time:
+                self.draw_time(left)
+            
+            if left == 0:
+                self._countdown.stop()
+
+    ## \brief This method returns the time until the next call of tick() will change the screen.
+    #
+    #  \returns A float or None if no countdown is running.
+    #                                
+    def countdown_delay(self):
+        return self._countdown.delay()
+
+## \brief This class limits the number of frames that are drawn per second.
+#
+class FrameLimiter:
+    ## \brief Constructor. 
+    #
+    #  \param [max_fps] An integer. The maximum number of frames per second. A value of 0 means that the number of
+    #         frames is not limited.
+    #    
+    def __init__(self, max_fps):
+        ## \brief A float. Minimum time in seconds between two frames.
+        self._interval = 0.0
+        ## \brief A float. The time of the last frame as returned by time.monotonic().
+        self._last_frame = None
+        ## \brief An integer. Number of frames drawn so far.
+        self.frames = 0
+        
+        if max_fps > 0:
+            self._interval = 1.0 / max_fps
+
+    ## \brief This method returns the time that has to pass before the next frame may be drawn.
+    #
+    #  \returns A float. A number of seconds. 0.0 if a frame may be drawn now.
+    #    
+    def delay(self):
+        result = 0.0
+        
+        if self._last_frame != None:
+            result = max(0.0, (self._last_frame + self._interval) - time.monotonic())
+        
+        return result
+
+    ## \brief This method has to be called after a frame has been drawn.
+    #
+    #  \returns Nothing.
+    #    
+    def frame_done(self):
+        self._last_frame = time.monotonic()
+        self.frames += 1
+
+## \brief This class draws an overlay which shows the timing statistics of the commands. The overlay is drawn onto
+#         the screen, not into the background, and is toggled with the F3 key.
+#
+class Hud:
+    ## \brief Constructor. 
+    #
+    #  \param [fonts] Is a FontCache object. It provides the font of the overlay.
+    #
+    #  \param [timings] Is a TimingStats object. Its summary is shown.
+    #
+    #  \param [visible] A boolean. True if the overlay is shown from the start.
+    #    
+    def __init__(self, fonts, timings, visible = False):
+        ## \brief A FontCache object. Provides the font of the overlay.
+        self._fonts = fonts
+        ## \brief A TimingStats object. Its summary is shown.
+        self._timings = timings
+        ## \brief A boolean. True if the overlay is shown.
+        self._visible = visible
+        ## \brief A pygame.Surface or None. The rendered overlay. None if it has not been rendered yet.
+        self._surface = None
+        ## \brief A pygame.Rect object or None. The area of the screen covered by the overlay.
+        self._rect = None
+        ## \brief A float or None. The time as returned by time.monotonic() at which the overlay has been rendered.
+        self._last_update = None
+
+    ## \brief This property returns true if the overlay is shown.
+    #
+    #  \returns A boolean.
+    #    
+    @property
+    def visible(self):
+        return self._visible
+
+    ## \brief This method shows or hides the overlay.
+    #
+    #  \returns A pygame.Rect object or None. The area of the screen that has to be covered by the background again.
+    #           None means the whole screen.
+    #    
+    def toggle(self):
+        result = self._rect
+        self._visible = not self._visible
+        self._surface = None
+        self._rect = None
+        self._last_update = None
+        
+        return result
+
+    ## \brief This method returns true if the overlay is shown and its contents are out of date.
+    #
+    #  \returns A boolean.
+    #    
+    def due(self):
+        return self._visible and ((self._last_update == None) or ((time.monotonic() - self._last_update) >= HUD_INTERVAL))
+
+    ## \brief This method renders the current statistics.
+    #
+    #  \returns A pygame.Rect object or None. The area that was covered by the old overlay. It has to be covered by
+    #           the background again. None means the whole screen.
+    #    
+    def refresh(self):
+        result = self._rect
+        font = self._fonts.get(HUD_FONT_SIZE)
+        lines = [font.render(i, True, (0, 255, 0), (0, 0, 0)) for i in self._timings.summary()]
+        width = max(i.get_width() for i in lines)
+        self._surface = pygame.Surface((width, font.get_linesize() * len(lines)))
+        
+        for index, i in enumerate(lines):
+            self._surface.blit(i, (0, index * font.get_linesize()))
+        
+        self._rect = self._surface.get_rect(topleft = (4, 4))
+        self._last_update = time.monotonic()
+        
+        return result
+
+    ## \brief This method draws the overlay onto the screen.
+    #
+    #  \param [screen] Is an object of type pygame.Surface. It represents the pygame window.
+    #
+    #  \returns A pygame.Rect object or None. The area covered by the overlay. None if it is not shown.
+    #    
+    def draw(self, screen):
+        if self._visible and (self._surface != None):
+            screen.blit(self._surface, self._rect)
+        
+        return self._rect
+
+
+## \brief This function processes all pending pygame events.
+#
+#  \param [proc] A Processor object. It is invalidated if the window has to be redrawn.
+#
+#  \param [hud] A Hud object or None. It is toggled by the F3 key.
+#
+#  \returns A boolean. True if the window has been closed.
+#
+def handle_events(proc, hud = None):
+    result = False
+    
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            result = True
+        elif event.type == pygame.VIDEOEXPOSE:
+            proc.invalidate()
+        elif (event.type == pygame.KEYDOWN) and (event.key == pygame.K_F3) and (hud != None):
+            proc.mark_dirty(hud.toggle())
+        elif event.type == pygame.VIDEORESIZE:
+            # The display surface has already been resized by pygame
+            proc.resize(create_background(pygame.display.get_surface()))
+    
+    return result
+
+## \brief This function copies the background to the screen if it has changed and the frame limit allows it.
+#
+#  \param [screen] Is an object of type pygame.Surface. It represents the pygame window.
+#
+#  \param [proc] A Processor object.
+#
+#  \param [limiter] A FrameLimiter object.
+#
+#  \param [hud] A Hud object or None. The overlay is drawn on top of the background.
+#
+#  \returns Nothing.
+#
+def update_screen(screen, proc, limiter, hud = None):
+    if (hud != None) and hud.due():
+        proc.mark_dirty(hud.refresh())
+    
+    if proc.dirty and (limiter.delay() == 0.0):
+        start = time.perf_counter()
+        rects = proc.take_dirty_rects()
+        
+        if rects == None:
+            screen.blit(proc.background, (0, 0))
+            
+            if hud != None:
+                hud.draw(screen)
+            
+            pygame.display.flip()
+        else:
+            # Only the parts of the background that have changed are copied and pushed to the display
+            for i in rects:
+                screen.blit(proc.background, i, i)
+            
+            # The overlay may have been partially covered
+            if (hud != None) and hud.visible:
+                rects.append(hud.draw(screen))
+            
+            pygame.display.update(rects)
+        
+        limiter.frame_done()
+        proc.timings.frame_done(time.perf_counter() - start)
+
+## \brief This class implements a server loop based on asyncio. Any number of clients can be connected at the same
+#         time. Their commands are executed in the order in which they arrive. The screen is only updated when a command
+#         has been executed.
+#
+class AsyncServer:
+    ## \brief Constructor. 
+    #
+    #  \param [screen] Is an object of type pygame.Surface. It represents the pygame window.
+    #
+    #  \param [proc] Is a Processor object. It executes the commands of all connections.
+    #
+    #  \param [max_fps] An integer. The maximum number of frames per second or 0 for no limit.
+    #
+    #  \param [hud] A boolean. If it is true the timing overlay is shown from the start.
+    #    
+    def __init__(self, screen, proc, max_fps = FRAME_RATE_MAX, hud = False):
+        ## \brief An object of type pygame.Surface. Represents the pygame window.
+        self._screen = screen
+        ## \brief A Processor object. It is shared by all connections.
+        self._proc = proc
+        ## \brief A FrameLimiter object. Limits the number of screen updates.
+        self._limiter = FrameLimiter(max_fps)
+        ## \brief A Hud object. Shows the timing statistics when it is toggled with F3.
+        self._hud = Hud(proc.fonts, proc.timings, hud)
+        ## \brief An asyncio.Event. It is set when the background has changed.
+        self._redraw = asyncio.Event()
+        ## \brief A boolean. Is set to true when the pygame window has been closed.
+        self._force_stop = False
+        ## \brief A set of asyncio.StreamWriter objects. Contains the writers of all connected clients.
+        self._connections = set()
+
+    ## \brief This property returns true when the server is to be stopped.
+    #
+    #  \returns A boolean.
+    #    
+    @property
+    def stop(self):
+        return self._proc.stop or self._force_stop
+
+    ## \brief This coroutine handles the commands sent by a single client until the client disconnects or the server
+    #         is stopped.
+    #
+    #  \param [reader] Is an asyncio.StreamReader object.
+    #
+    #  \param [writer] Is an asyncio.StreamWriter object.
+    #
+    #  \returns Nothing.
+    #    
+    async def serve_client(self, reader, writer):
+        # Compression settings negotiated with this client
+        compression = tlvobject.TlvCompression()
+        self._connections.add(writer)
+        
+        try:
+            while not self.stop:
+                await tlvasync.TlvAsyncStream.transact_server(reader, writer, self._proc, compression)
+                
+                if self._proc.dirty:
+                    self._redraw.set()
+        except tlvobject.TlvException:
+            # The client has closed the connection
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+            print(compression.report())
+
+    ## \brief This coroutine processes the pygame events and updates the screen after commands have been executed.
+    #         It returns when the server is to be stopped.
+    #
+    #  \returns Nothing.
+    #    
+    async def render(self):
+        while not self.stop:
+            if handle_events(self._proc, self._hud):
+                self._force_stop = True
+
+            if not self._proc.dirty:
+                timeout = EVENT_INTERVAL
+                
+                if self._proc.countdown_delay() != None:
+                    timeout = min(timeout, self._proc.countdown_delay())
+                
+                try:
+                    await asyncio.wait_for(self._redraw.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Wait until the frame limit allows the next update
+                await asyncio.sleep(min(self._limiter.delay(), EVENT_INTERVAL))
+
+            self._redraw.clear()
+            self._proc.tick()
+            # Make processing result visible
+            update_screen(self._screen, self._proc, self._limiter, self._hud)
+
+    ## \brief This coroutine runs the server until the stop command has been received or the pygame window has been
+    #         closed.
+    #
+    #  \param [port] An integer. The TCP port on which the server is listening.
+    #
+    #  \returns Nothing.
+    #    
+    async def run(self, port):
+        server = await asyncio.start_server(self.serve_client, None, port)
+        
+        try:
+            await self.render()
+        finally:
+            server.close()
+            # Give the clients the chance to close their connections first. See main().
+            await asyncio.sleep(0.3)
+            
+            for i in list(self._connections):
+                i.close()
+            
+            await server.wait_closed()
+            print(self._proc.fonts.report(self._limiter.frames))
+            print(self._proc.texts.report())
+            print(self._proc.commands.report())
+            print(self._proc.timings.report())
+
+## \brief This class represents the connection to a single client of the NetworkThread. Its socket is non-blocking.
+#         Requests are read by the network thread while the answers are sent by the render loop.
+#
+class ClientConnection:
+    ## \brief Constructor. 
+    #
+    #  \param [sock] Is a socket object. It is used to talk to the client.
+    #
+    def __init__(self, sock):
+        ## \brief A socket object. Used to talk to the client.
+        self._sock = sock
+        ## \brief A TlvCompression object. Holds the compression settings negotiated with this client.
+        self._compression = tlvobject.TlvCompression()
+        ## \brief A TlvFrameReader object. Splits the received bytes into requests.
+        self._reader = tlvobject.TlvFrameReader(self._compression, 2 * RECV_SIZE)
+        ## \brief A bytearray. Holds the encoded answers which have not been sent yet.
+        self._outgoing = bytearray()
+        ## \brief A threading.Lock object. Protects self._outgoing and self._closed which are used by both threads.
+        self._lock = threading.Lock()
+        ## \brief A boolean. Is set to true when the connection has been closed.
+        self._closed = False
+        
+        self._sock.setblocking(False)
+
+    ## \brief This property returns the socket of the connection.
+    #
+    #  \returns A socket object.
+    #    
+    @property
+    def sock(self):
+        return self._sock
+
+    ## \brief This property returns the compression settings of the connection.
+    #
+    #  \returns A TlvCompression object.
+    #    
+    @property
+    def compression(self):
+        return self._compression
+
+    ## \brief This property returns true if the connection has been closed.
+    #
+    #  \returns A boolean.
+    #    
+    @property
+    def closed(self):
+        return self._closed
+
+    ## \brief This property returns true if there are answers which could not be sent yet.
+    #
+    #  \returns A boolean.
+    #    
+    @property
+    def wants_write(self):
+        with self._lock:
+            return len(self._outgoing) > 0
+
+    ## \brief This method reads the data which has arrived on the connection. It must only be called when the socket
+    #         is readable.
+    #
+    #  \returns A list of TlvEntry objects. Contains the requests that have been received completely. A TlvException
+    #           is raised if the client has closed the connection or has sent malformed data.
+    #    
+    def receive(self):
+        try:
+            count = self._sock.recv_into(self._reader.buffer(RECV_SIZE))
+        except BlockingIOError:
+            count = None
+        except OSError:
+            count = 0
+        
+        if count == 0:
+            raise tlvobject.TlvException('Connection closed')
+        
+        if count != None:
+            self._reader.commit(count)
+        
+        return self._reader.frames()
+
+    ## \brief This method queues an answer for the client and sends as much of it as possible without blocking.
+    #
+    #  \param [tlv_object] A TlvEntry object. The answer to send.
+    #
+    #  \returns Nothing. A TlvException is raised if the answer can not be sent.
+    #    
+    def send(self, tlv_object):
+        if tlv_object.content_length() > tlvobject.LONG_LEN_MAX:
+            raise tlvobject.TlvException('Answer too large')
+        
+        frame = tlvobject.TlvStream.encode_frame(tlv_object, self._compression)
+        
+        with self._lock:
+            if self._closed:
+                raise tlvobject.TlvException('Connection closed')
+            
+            self._outgoing += frame
+            self._flush()
+
+    ## \brief This method sends as much of the queued answers as possible without blocking.
+    #
+    #  \returns Nothing. A TlvException is raised if sending fails.
+    #    
+    def flush(self):
+        with self._lock:
+            if not self._closed:
+                self._flush()
+
+    ## \brief This method sends as much of the queued answers as possible without blocking. The caller has to hold
+    #         self._lock.
+    #
+    #  \returns Nothing. A TlvException is raised if sending fails.
+    #    
+    def _flush(self):
+        try:
+            bytes_sent = self._sock.send(self._outgoing)
+            del self._outgoing[:bytes_sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            raise tlvobject.TlvException('Sending data failed')
+
+    ## \brief This method closes the connection after sending the answers which are still queued.
+    #
+    #  \returns Nothing.
+    #    
+    def close(self):
+        with self._lock:
+            self._closed = True
+            
+            try:
+                if len(self._outgoing) > 0:
+                    self._sock.settimeout(EVENT_INTERVAL)
+                    self._sock.sendall(self._outgoing)
+                
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                # The client may have closed the connection already
+                pass
+            
+            self._sock.close()
+        
+        print(self._compression.report())
+
+
+## \brief This class describes a request which waits in the CommandQueue.
+#
+class QueuedCommand:
+    ## \brief Constructor. 
+    #
+    #  \param [connection] A ClientConnection object. The connection on which the request has been received.
+    #
+    #  \param [request] A TlvEntry object. The request sent by the client.
+    #
+    #  \param [key] A tuple or None. Requests with the same key replace each other. See CommandQueue.collapse_key().
+    #
+    def __init__(self, connection, request, key):
+        ## \brief A ClientConnection object. The answer is sent through this connection.
+        self.connection = connection
+        ## \brief A TlvEntry object. The request sent by the client.
+        self.request = request
+        ## \brief A tuple or None. Requests with the same key replace each other.
+        self.key = key
+        ## \brief A float. The value of time.monotonic() when the request has been received.
+        self.received = time.monotonic()
+        ## \brief A list of QueuedCommand objects. The older requests which have been replaced by this one. They are
+        #         answered together with it.
+        self.superseded = []
+
+
+## \brief This class executes a request which has superseded older requests in the CommandQueue and keeps its result.
+#         The superseded requests are answered with this result, i.e. they succeed only if the request that replaced
+#         them is valid and has been executed successfully.
+#
+class ReplacingCommand:
+    ## \brief Constructor. 
+    #
+    #  \param [processor] Is a Processor object. It executes the request.
+    #
+    def __init__(self, processor):
+        ## \brief A Processor object. Executes the request.
+        self._processor = processor
+        ## \brief A tlvobject.TlvEntry object or None. The answer of the processor.
+        self.result = None
+
+    ## \brief This method executes the request and keeps the answer.
+    #
+    #  \param [tlv_param] A TlvEntry object. The request which replaced the others.
+    #
+    #  \returns A tlvobject.TlvEntry object. The answer of the processor.
+    #    
+    def process(self, tlv_param):
+        self.result = self._processor.process(tlv_param)
+        
+        return self.result
+
+
+## \brief This class answers requests which have been superseded in the CommandQueue. Nothing is drawn for them.
+#
+class SkippedCommand:
+    ## \brief Constructor. 
+    #
+    #  \param [result] A tlvobject.TlvEntry object. The answer to the request that replaced the superseded ones.
+    #
+    def __init__(self, result):
+        ## \brief A tlvobject.TlvEntry object. Is sent as answer to each superseded request.
+        self._result = result
+
+    ## \brief This method returns the answer to a superseded request.
+    #
+    #  \param [tlv_param] A TlvEntry object. The superseded request.
+    #
+    #  \returns A tlvobject.TlvEntry object. The answer to the request that replaced it.
+    #    
+    def process(self, tlv_param):
+        return self._result
+
+
+## \brief This class implements the bounded queue through which the network thread hands the requests of all clients
+#         to the render loop.
+#
+#  Clients that still send a showquestion command each second produce a stream of countdown updates for the same
+#  question, and a client that restarts a question sends several startcountdown commands for it. If the render loop
+#  falls behind, such a command which is directly followed by a newer one for the same question from the same
+#  connection is superseded. Requests of other connections or other commands in between prevent this, so that no
+#  command is reordered or dropped. Superseded requests are not drawn. They are answered in their original position
+#  with the result of the request that replaced them. The queue records its depth and the time requests spend waiting.
+#
+class CommandQueue:
+    ## \brief Constructor. 
+    #
+    #  \param [max_len] An integer. The maximum number of waiting requests. The network thread stops reading when the
+    #         queue is full.
+    #
+    def __init__(self, max_len = COMMAND_QUEUE_MAX):
+        ## \brief An integer. The maximum number of waiting requests.
+        self._max_len = max_len
+        ## \brief A collections.deque of QueuedCommand objects. Holds the waiting requests.
+        self._entries = collections.deque()
+        ## \brief A threading.Condition object. Protects all attributes and signals changes of the queue.
+        self._condition = threading.Condition()
+        ## \brief A boolean. Is set to true when the queue does not accept requests any more.
+        self._closed = False
+        ## \brief An integer. The maximum number of requests that have been waiting at the same time.
+        self.max_depth = 0
+        ## \brief An integer. Number of requests that have been taken out of the queue.
+        self.taken = 0
+        ## \brief An integer. Number of requests that have been superseded by a newer one.
+        self.collapsed = 0
+        ## \brief A float. Sum of the times in seconds the taken requests have been waiting.
+        self.total_wait = 0.0
+        ## \brief A float. Longest time in seconds a request has been waiting.
+        self.max_wait = 0.0
+
+    ## \brief This method determines whether a request can be superseded by a newer one.
+    #
+    #  \param [request] A TlvEntry object. The request sent by the client.
+    #
+    #  \returns A tuple (command, question) or None if the request is not a countdown update. Only requests with the
+    #           same key which follow each other directly on the same connection replace each other.
+    #    
+    @staticmethod
+    def collapse_key(request):
+        result = None
+        
+        try:
+            if request.tag == tlvobject.TAG_CORRELATED:
+                request = request.split_correlated()[1]
+            
+            if request.tag == tlvobject.TAG_SEQUENCE:
+                params = request.decode()
+                
+                # A request only replaces others if it is valid according to the schema of its command
+                if (len(params) > 0) and (params[0] in COLLAPSIBLE_COMMANDS):
+                    displayschema.MESSAGES[params[0]].decode(params)
+                    result = (params[0], params[1])
+        except:
+            # Malformed requests are never collapsed. They are rejected when they are executed.
+            result = None
+        
+        return result
+
+    ## \brief This property returns the number of waiting requests.
+    #
+    #  \returns An integer.
+    #    
+    @property
+    def depth(self):
+        with self._condition:
+            return len(self._entries)
+
+    ## \brief This property returns the mean time the taken requests have been waiting.
+    #
+    #  \returns A float. The time in seconds.
+    #    
+    @property
+    def mean_wait(self):
+        result = 0.0
+        
+        if self.taken > 0:
+            result = self.total_wait / self.taken
+        
+        return result
+
+    ## \brief This method appends a request. It blocks while the queue is full.
+    #
+    #  \param [entry] A QueuedCommand object.
+    #
+    #  \returns A boolean. False if the queue has been closed and the request has been dropped.
+    #    
+    def put(self, entry):
+        with self._condition:
+            while (len(self._entries) >= self._max_len) and (not self._closed):
+                self._condition.wait()
+            
+            if not self._closed:
+                previous = None
+                
+                if (entry.key != None) and (len(self._entries) > 0):
+                    previous = self._entries[-1]
+                
+                if (previous != None) and (previous.key == entry.key) and (previous.connection is entry.connection):
+                    # The newest waiting request is replaced. It is answered when the new one has been executed.
+                    entry.superseded = previous.superseded + [previous]
+                    previous.superseded = []
+                    self._entries[-1] = entry
+                    self.collapsed += 1
+                else:
+                    self._entries.append(entry)
+                
+                self.max_depth = max(self.max_depth, len(self._entries))
+                self._condition.notify_all()
+            
+            return not self._closed
+
+    ## \brief This method takes all waiting requests out of the queue.
+    #
+    #  \param [timeout] A float. The maximum time in seconds to wait for a request if the queue is empty.
+    #
+    #  \returns A list of QueuedCommand objects in the order in which they have been received. It may be empty.
+    #    
+    def take_all(self, timeout):
+        with self._condition:
+            if (len(self._entries) == 0) and (not self._closed):
+                self._condition.wait(timeout)
+            
+            result = list(self._entries)
+            self._entries.clear()
+            now = time.monotonic()
+            
+            for i in result:
+                for j in i.superseded + [i]:
+                    wait = now - j.received
+                    self.total_wait += wait
+                    self.max_wait = max(self.max_wait, wait)
+                    self.taken += 1
+
+            self._condition.notify_all()
+        
+        return result
+
+    ## \brief This method closes the queue. Requests which are put afterwards are dropped.
+    #
+    #  \returns Nothing.
+    #    
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    ## \brief This method returns a textual summary of the statistics.
+    #
+    #  \returns A string.
+    #    
+    def report(self):
+        return 'Command queue: {} requests, {} collapsed, depth max {} of {}, wait mean {:.1f} ms, max {:.1f} ms'.format(
+            self.taken, self.collapsed, self.max_depth, self._max_len, self.mean_wait * 1000, self.max_wait * 1000)
+
+
+## \brief This class implements the thread that does all network I/O of the SelectorServer. It accepts any number of
+#         clients at the same time and puts their requests into a CommandQueue. As all sockets are non-blocking, a
+#         client that sends a request only partially does not delay the requests of other clients.
+#
+class NetworkThread(threading.Thread):
+    ## \brief Constructor. The server socket is opened immediately.
+    #
+    #  \param [port] An integer. The TCP port on which the server is listening.
+    #
+    #  \param [queue] A CommandQueue object. Receives the requests of all clients.
+    #    
+    def __init__(self, port, queue):
+        threading.Thread.__init__(self, name = 'network', daemon = True)
+        ## \brief A CommandQueue object. Receives the requests of all clients.
+        self._queue = queue
+        ## \brief A selectors.BaseSelector object. Waits for the server socket and all client sockets.
+        self._selector = selectors.DefaultSelector()
+        ## \brief A set of ClientConnection objects. Contains all connected clients.
+        self._connections = set()
+        ## \brief A set of ClientConnection objects. Contains the connections on which the render loop could not send
+        #         all answers. Protected by self._lock.
+        self._write_requests = set()
+        ## \brief A threading.Lock object. Protects self._write_requests.
+        self._lock = threading.Lock()
+        ## \brief A boolean. Is set to true when the thread is to be stopped.
+        self._stop_flag = False
+        ## \brief A socket object. The listening socket.
+        self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)    
+        self._server_socket.bind(('', port))
+        self._server_socket.listen(5)
+        self._server_socket.setblocking(False)
+        ## \brief A pair of connected socket objects. Writing to the second one wakes up the thread.
+        self._wakeup = socket.socketpair()
+        
+        for i in self._wakeup:
+            i.setblocking(False)
+        
+        self._selector.register(self._server_socket, selectors.EVENT_READ)
+        self._selector.register(self._wakeup[0], selectors.EVENT_READ)
+
+    ## \brief This method wakes up the thread if it is waiting for the sockets.
+    #
+    #  \returns Nothing.
+    #    
+    def wakeup(self):
+        try:
+            self._wakeup[1].send(b'\x00')
+        except OSError:
+            # A wakeup is already pending
+            pass
+
+    ## \brief This method asks the thread to send the answers which are still queued on a connection as soon as its
+    #         socket becomes writable. It may be called from any thread.
+    #
+    #  \param [connection] A ClientConnection object.
+    #
+    #  \returns Nothing.
+    #    
+    def request_write(self, connection):
+        with self._lock:
+            self._write_requests.add(connection)
+        
+        self.wakeup()
+
+    ## \brief This method accepts a new client.
+    #
+    #  \returns Nothing.
+    #    
+    def _accept(self):
+        try:
+            client_socket, address = self._server_socket.accept()
+        except BlockingIOError:
+            # The client has given up before its connection could be accepted
+            client_socket = None
+        
+        if client_socket != None:
+            connection = ClientConnection(client_socket)
+            self._connections.add(connection)
+            self._selector.register(client_socket, selectors.EVENT_READ, connection)
+
+    ## \brief This method closes the connection to a client. Requests of this client which are still queued are dropped
+    #         by the render loop.
+    #
+    #  \param [connection] A ClientConnection object.
+    #
+    #  \returns Nothing.
+    #    
+    def _close(self, connection):
+        if connection in self._connections:
+            self._connections.discard(connection)
+            self._selector.unregister(connection.sock)
+            connection.close()
+
+    ## \brief This method lets the selector watch for the socket becoming writable only while answers are queued on
+    #         a connection.
+    #
+    #  \param [connection] A ClientConnection object.
+    #
+    #  \returns Nothing.
+    #    
+    def _update_interest(self, connection):
+        events = selectors.EVENT_READ
+        
+        if connection.wants_write:
+            events |= selectors.EVENT_WRITE
+        
+        if self._selector.get_key(connection.sock).events != events:
+            self._selector.modify(connection.sock, events, connection)
+
+    ## \brief This method handles a connection which has become readable or writable.
+    #
+    #  \param [connection] A ClientConnection object.
+    #
+    #  \param [events] An integer. A bit mask of selectors.EVENT_READ and selectors.EVENT_WRITE.
+    #
+    #  \returns Nothing.
+    #    
+    def _service(self, connection, events):
+        try:
+            if events & selectors.EVENT_WRITE:
+                connection.flush()
+            
+            if events & selectors.EVENT_READ:
+                for i in connection.receive():
+                    # Blocks while the queue is full. This stops reading from all clients until the render loop has
+                    # caught up.
+                    if not self._queue.put(QueuedCommand(connection, i, CommandQueue.collapse_key(i))):
+                        break
+            
+            self._update_interest(connection)
+        except tlvobject.TlvException:
+            # The client has closed the connection or sent garbage
+            self._close(connection)
+
+    ## \brief This method is executed by the thread. It returns when shutdown() has been called.
+    #
+    #  \returns Nothing.
+    #    
+    def run(self):
+        while not self._stop_flag:
+            for key, events in self._selector.select():
+                if key.fileobj is self._server_socket:
+                    self._accept()
+                elif key.fileobj is self._wakeup[0]:
+                    try:
+                        self._wakeup[0].recv(RECV_SIZE)
+                    except BlockingIOError:
+                        pass
+                elif not self._stop_flag:
+                    self._service(key.data, events)
+            
+            with self._lock:
+                write_requests = self._write_requests
+                self._write_requests = set()
+            
+            for i in write_requests:
+                if i in self._connections:
+                    self._update_interest(i)
+
+    ## \brief This method stops the thread and closes all connections. The answers which are still queued are sent
+    #         before.
+    #
+    #  \returns Nothing.
+    #    
+    def shutdown(self):
+        self._stop_flag = True
+        self._queue.close()
+        self.wakeup()
+        self.join()
+        
+        for i in list(self._connections):
+            try:
+                i.flush()
+            except tlvobject.TlvException:
+                self._close(i)
+        
+        # The sleep is intended to make sure that the clients close their connections first. This prevents the server
+        # socket to enter the TIME_WAIT state. If that happens the port is blocked and the server can not be restarted
+        # until the server socket is finally disposed by the operating system.
+        time.sleep(0.3)
+        
+        for i in list(self._connections):
+            self._close(i)
+        
+        self._selector.close()
+        self._server_socket.close()
+        
+        for i in self._wakeup:
+            i.close()
+
+
+## \brief This class implements the default server loop. The network I/O is done by a NetworkThread. The main thread
+#         executes the requests of all clients in the order in which they have been received, processes the pygame
+#         events and updates the screen. A slow client therefore never delays the screen and drawing never delays
+#         reading the requests of the clients.
+#
+class SelectorServer:
+    ## \brief Constructor. 
+    #
+    #  \param [screen] Is an object of type pygame.Surface. It represents the pygame window.
+    #
+    #  \param [proc] Is a Processor object. It executes the commands of all connections.
+    #
+    #  \param [max_fps] An integer. The maximum number of frames per second or 0 for no limit.
+    #
+    #  \param [queue_len] An integer. The maximum number of requests waiting in the CommandQueue.
+    #
+    #  \param [hud] A boolean. If it is true the timing overlay is shown from the start.
+    #    
+    def __init__(self, screen, proc, max_fps = FRAME_RATE_MAX, queue_len = COMMAND_QUEUE_MAX, hud = False):
+        ## \brief An object of type pygame.Surface. Represents the pygame window.
+        self._screen = screen
+        ## \brief A Processor object. It is shared by all connections.
+        self._proc = proc
+        ## \brief A FrameLimiter object. Limits the number of screen updates.
+        self._limiter = FrameLimiter(max_fps)
+        ## \brief A Hud object. Shows the timing statistics when it is toggled with F3.
+        self._hud = Hud(proc.fonts, proc.timings, hud)
+        ## \brief A CommandQueue object. Holds the requests which have been received but not executed yet.
+        self._queue = CommandQueue(queue_len)
+        ## \brief A boolean. Is set to true when the pygame window has been closed.
+        self._force_stop = False
+
+    ## \brief This property returns true when the server is to be stopped.
+    #
+    #  \returns A boolean.
+    #    
+    @property
+    def stop(self):
+        return self._proc.stop or self._force_stop
+
+    ## \brief This property returns the queue through which the requests are handed to the render loop.
+    #
+    #  \returns A CommandQueue object.
+    #    
+    @property
+    def queue(self):
+        return self._queue
+
+    ## \brief This method executes a request and sends the answer to the client.
+    #
+    #  \param [entry] A QueuedCommand object.
+    #
+    #  \param [network] A NetworkThread object. Sends the part of the answer that could not be sent immediately.
+    #
+    #  \returns Nothing.
+    #    
+    def _execute(self, entry, network):
+        processor = ReplacingCommand(self._proc)
+        
+        if not entry.connection.closed:
+            # The time spent in the queue is part of the timing statistics
+            self._proc.timings.arrival = entry.received
+            
+            try:
+                answers = self._answer(entry, processor)
+            finally:
+                self._proc.timings.arrival = None
+            
+            try:
+                for i in answers:
+                    entry.connection.send(i)
+                
+                if entry.connection.wants_write:
+                    network.request_write(entry.connection)
+            except tlvobject.TlvException:
+                # The network thread notices the broken connection and closes it
+                pass
+
+    ## \brief This method computes the answers to a request and to the requests it has superseded. No request of a
+    #         client can stop the server: If anything fails each of them is answered with ERR_ERROR.
+    #
+    #  \param [entry] A QueuedCommand object.
+    #
+    #  \param [processor] A ReplacingCommand object. Executes the request.
+    #
+    #  \returns A list of TlvEntry objects. The answers in the order in which they have to be sent, i.e. the
+    #           answers to the superseded requests precede the answer to the request that replaced them.
+    #    
+    def _answer(self, entry, processor):
+        try:
+            answer = tlvobject.TlvStream.answer_request(entry.request, processor, entry.connection.compression)
+            result = []
+            
+            if len(entry.superseded) > 0:
+                self._proc.commands.lookup(entry.key[0]).superseded += len(entry.superseded)
+                
+                for i in entry.superseded:
+                    result.append(tlvobject.TlvStream.answer_request(i.request, SkippedCommand(processor.result), entry.connection.compression))
+            
+            result.append(answer)
+        except:
+            result = [tlvobject.TlvStream.error_answer(i.request) for i in entry.superseded + [entry]]
+        
+        return result
+
+    ## \brief This method runs the server until the stop command has been received or the pygame window has been
+    #         closed.
+    #
+    #  \param [port] An integer. The TCP port on which the server is listening.
+    #
+    #  \returns Nothing.
+    #    
+    def run(self, port):
+        network = NetworkThread(port, self._queue)
+        network.start()
+        
+        try:
+            while not self.stop:
+                if handle_events(self._proc, self._hud):
+                    self._force_stop = True
+                
+                # pygame events can not be waited for together with the queue. Therefore the wait is interrupted
+                # regularly to look at them. If a frame is pending it is drawn as soon as the frame limit allows it.
+                timeout = EVENT_INTERVAL
+                
+                if self._proc.dirty:
+                    timeout = min(timeout, self._limiter.delay())
+                elif self._proc.countdown_delay() != None:
+                    timeout = min(timeout, self._proc.countdown_delay())
+                
+                for i in self._queue.take_all(timeout):
+                    # Requests which arrive after the stop command are not executed
+                    if self.stop:
+                        break
+                    
+                    self._execute(i, network)
+                
+                self._proc.tick()
+                # Make processing result visible
+                update_screen(self._screen, self._proc, self._limiter, self._hud)
+        finally:
+            network.shutdown()
+            print(self._queue.report())
+            print(self._proc.fonts.report(self._limiter.frames))
+            print(self._proc.texts.report())
+            print(self._proc.commands.report())
+            print(self._proc.timings.report())
+
+
+## \brief This function creates the surface on which the Processor draws.
+#
+#  \param [screen] Is an object of type pygame.Surface. It represents the pygame window.
+#
+#  \returns A pygame.Surface of the same size and pixel format as the screen.
+#
+def create_background(screen):
+    background = pygame.Surface(screen.get_size())
+    
+    return background.convert()
+
+## \brief This function initializes pygame and opens the window in which all drawing happens.
+#
+#  \param [size] A tuple (width, height). The size of the window in pixels. It is ignored in fullscreen mode.
+#
+#  \param [fullscreen] A boolean. If it is true the native resolution of the display is used, so that the picture
+#         does not have to be scaled.
+#
+#  \returns A tuple (screen, background). screen is the pygame.Surface that represents the window and background
+#            is the pygame.Surface on which the Processor draws.
+#
+def init_display(size = (PLAYING_FIELD_X, PLAYING_FIELD_Y), fullscreen = False):
+    pygame.init()
+    black = 0, 0, 0    
+    
+    if fullscreen:
+        # A size of (0, 0) selects the resolution of the desktop
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        pygame.mouse.set_visible(False)
+    else:
+        screen = pygame.display.set_mode(size, pygame.RESIZABLE)
+    
+    pygame.display.set_caption('Das große Quiz')
+    screen.fill(black)            
+    pygame.display.flip()
+
+    return (screen, create_background(screen))
+
+## \brief The main function of this program when the server loop based on asyncio is used.
+#
+#  \param [max_fps] An integer. The maximum number of frames per second or 0 for no limit.
+#
+#  \param [text_budget] An integer. The memory budget of the cache for rendered text in bytes.
+#
+#  \param [size] A tuple (width, height). The size of the window in pixels.
+#
+#  \param [fullscreen] A boolean. If it is true the native resolution of the display is used.
+#
+#  \param [hud] A boolean. If it is true the timing overlay is shown from the start.
+#
+def main_async(max_fps = FRAME_RATE_MAX, text_budget = TEXT_CACHE_BUDGET, size = (PLAYING_FIELD_X, PLAYING_FIELD_Y), fullscreen = False, hud = False):
+    screen, background = init_display(size, fullscreen)
+    fonts = FontCache()
+    proc = Processor(background, fonts, TextCache(fonts, text_budget))
+    asyncio.run(AsyncServer(screen, proc, max_fps, hud).run(PORT))
+
+## \brief The main function of this program.
+#
+#  \param [max_fps] An integer. The maximum number of frames per second or 0 for no limit.
+#
+#  \param [text_budget] An integer. The memory budget of the cache for rendered text in bytes.
+#
+#  \param [queue_len] An integer. The maximum number of requests waiting between network thread and render loop.
+#
+#  \param [size] A tuple (width, height). The size of the window in pixels.
+#
+#  \param [fullscreen] A boolean. If it is true the native resolution of the display is used.
+#
+#  \param [hud] A boolean. If it is true the timing overlay is shown from the start.
+#
+def main(max_fps = FRAME_RATE_MAX, text_budget = TEXT_CACHE_BUDGET, queue_len = COMMAND_QUEUE_MAX, size = (PLAYING_FIELD_X, PLAYING_FIELD_Y), fullscreen = False, hud = False):
+    screen, background = init_display(size, fullscreen)
+    fonts = FontCache()
+    proc = Processor(background, fonts, TextCache(fonts, text_budget))
+    SelectorServer(screen, proc, max_fps, queue_len, hud).run(PORT)
+
+## \brief This function parses the size of the window given on the command line.
+#
+#  \param [text] A string of the form WIDTHxHEIGHT, e.g. 1280x720.
+#
+#  \returns A tuple (width, height). An argparse.ArgumentTypeError is raised if text is malformed.
+#
+def parse_size(text):
+    try:
+        result = tuple(int(i) for i in text.lower().split('x'))
+    except ValueError:
+        result = None
+    
+    if (result == None) or (len(result) != 2) or (min(result) <= 0):
+        raise argparse.ArgumentTypeError('size has to be given as WIDTHxHEIGHT')
+    
+    return result
+
+if __name__ == "__main__":    
+    parser = argparse.ArgumentParser(description='Display server of "Das grosse Quiz"')
+    parser.add_argument('--asyncio', action='store_true', help='use a server loop based on asyncio instead of selectors')
+    parser.add_argument('--fps', type=int, default=FRAME_RATE_MAX, help='maximum number of frames per second, 0 means no limit (default: {})'.format(FRAME_RATE_MAX))
+    parser.add_argument('--text-cache', type=int, default=TEXT_CACHE_BUDGET // 1024, help='memory budget of the cache for rendered text in KiB (default: {})'.format(TEXT_CACHE_BUDGET // 1024))
+    parser.add_argument('--queue-len', type=int, default=COMMAND_QUEUE_MAX, help='maximum number of requests waiting to be executed (default: {})'.format(COMMAND_QUEUE_MAX))
+    parser.add_argument('--size', type=parse_size, default=(PLAYING_FIELD_X, PLAYING_FIELD_Y), help='size of the window as WIDTHxHEIGHT (default: {}x{})'.format(PLAYING_FIELD_X, PLAYING_FIELD_Y))
+    parser.add_argument('--fullscreen', action='store_true', help='use the whole screen in its native resolution')
+    parser.add_argument('--hud', action='store_true', help='show the timing overlay from the start, it is toggled with F3')
+    args = parser.parse_args()
+    
+    if args.asyncio:
+        main_async(args.fps, args.text_cache * 1024, args.size, args.fullscreen, args.hud)
+    else:
+        main(args.fps, args.text_cache * 1024, args.queue_len, args.size, args.fullscreen, args.hud)